@@ -1,70 +1,17 @@
 """Career agent - handles questions about work experience and roles"""
 
 import os
+from typing import List, Optional
+
 import structlog
 from langchain.prompts import ChatPromptTemplate
 
-from utils.llm_provider import get_llm
+from utils.llm_provider import invoke_llm
+from utils.model_tiering import TIER_LARGE, get_tiered_llms
 
-logger = structlog.get_logger()
+from .knowledge_base import get_knowledge_base
 
-# Edson's career data
-CAREER_DATA = """
-## Current Role
-**Apple Inc. - Platform Infrastructure Engineer (Contractor via Advantis Global)**
-- Apr 2025 - Present
-- Location: Cupertino, CA (Remote)
-- Optimized GPU infrastructure for Apple's internal LLM workloads (Siri, Maps, core services)
-- Processed 150K+ CloudWatch/CloudTrail events identifying $1.2M+ in annualized cost savings
-- Evaluated Apple Foundation Models (AFM) and GenAI platforms
-- Remediated production ML security infrastructure
-- Implemented IaC using Terraform and AWS services
-
-## Previous Roles
-
-**Arcaea - DevOps Engineer**
-- Aug 2023 - Mar 2025
-- Location: Boston, MA (Remote)
-- Architected enterprise AI platform using LLMs and RAG (20% efficiency improvement)
-- Deployed scalable vector databases (Weaviate/Chroma) with LangChain
-- Built cloud-native AI applications on AWS EKS (99.9% uptime, 90% cost reduction)
-- Implemented real-time monitoring with Prometheus/Grafana
-
-**Anagenex - Software Engineer IT & DevOps**
-- Aug 2021 - Aug 2023
-- Location: Lexington, MA (Hybrid)
-- Designed Flask-based internal tools (50% reduction in manual tasks)
-- Developed ML pipelines for drug discovery on AWS
-- Automated CI/CD workflows (40% faster model evaluation)
-- Collaborated with data scientists on production-grade AI solutions
-
-**ZebiAI Therapeutics (acquired by Relay) - DevOps Associate**
-- Jul 2020 - Jul 2021
-- Location: Waltham, MA (Hybrid)
-- Built Python/Flask microservices for data ingestion pipelines
-- Migrated 10TB+ datasets post-acquisition with 100% integrity
-- Secured Azure environments with IAM policies and Intune
-
-**Trinity College - IT Consultant**
-- Sep 2016 - May 2020
-- Location: Hartford, CT (On-site)
-- Provided campus-wide technical support
-- Configured computer labs and classroom technology
-- Led network architecture training sessions
-- Mentored trainees on IT systems debugging
-
-## Education
-- **MSc in Computer Science (ML Specialization)** - Georgia Institute of Technology (May 2023)
-- **MSc in Information Technology** - University of The Cumberlands (Aug 2024)
-- **BSc in Computer Science & Psychology (Double Major)** - Trinity College (May 2020)
-
-## Notable Achievements
-- Saved $1.2M+ annually at Apple through GPU infrastructure optimization
-- Reduced cloud costs by 90% at Arcaea
-- Improved R&D efficiency by 30% with RAG systems
-- Founded AI Learning Hub LLC (bilingual AI education)
-- Founded Girls Can Code Club (coding education in Mozambique)
-"""
+logger = structlog.get_logger()
 
 
 class CareerAgent:
@@ -72,45 +19,72 @@ class CareerAgent:
 
     def __init__(self):
         try:
-            self.llm = get_llm(temperature=0.3, max_tokens=300)
+            self.llms = get_tiered_llms(temperature=0.3, max_tokens=300)
+            self.llm = self.llms[TIER_LARGE]
             if self.llm:
                 logger.info("career_agent_initialized")
             else:
                 logger.warning("career_agent_no_llm")
         except Exception as e:
             logger.error("career_agent_init_failed", error=str(e))
+            self.llms = {}
             self.llm = None
 
-    async def process(self, query: str, language: str = "en") -> str:
+    def build_messages(
+        self,
+        query: str,
+        language: str = "en",
+        history: Optional[List] = None,
+    ) -> List:
+        """Prompt messages for a career query (system prompt, history, question)"""
+        # Read per request so knowledge base reloads apply immediately
+        knowledge = get_knowledge_base().prompt_text("career")
+
+        system_prompt = f"""You are Edson's Minion, an AI assistant representing Edson Zandamela.
+        Answer questions about Edson's career, work experience, and professional background.
+
+        Use this career information:
+        {knowledge}
+
+        Guidelines:
+        - Be professional but friendly
+        - Provide specific details from the career data
+        - Highlight achievements and impact
+        - If asked about current role, emphasize work at Apple
+        - Language: {"Portuguese" if language == "pt" else "English"}
+
+        Keep responses concise (2-3 paragraphs max).
+        """
+
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", system_prompt),
+            ("user", "{query}"),
+        ])
+
+        messages = prompt.format_messages(query=query)
+        if history:
+            # Prior turns go between the system prompt and the new question
+            messages[1:1] = history
+
+        return messages
+
+    async def process(
+        self,
+        query: str,
+        language: str = "en",
+        tier: str = TIER_LARGE,
+        history: Optional[List] = None,
+    ) -> str:
         """Process career-related query"""
 
         if not self.llm:
             return self._fallback_response(language)
 
         try:
-            system_prompt = f"""You are Edson's Minion, an AI assistant representing Edson Zandamela.
-            Answer questions about Edson's career, work experience, and professional background.
-
-            Use this career information:
-            {CAREER_DATA}
-
-            Guidelines:
-            - Be professional but friendly
-            - Provide specific details from the career data
-            - Highlight achievements and impact
-            - If asked about current role, emphasize work at Apple
-            - Language: {"Portuguese" if language == "pt" else "English"}
-
-            Keep responses concise (2-3 paragraphs max).
-            """
-
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", system_prompt),
-                ("user", "{query}"),
-            ])
+            messages = self.build_messages(query, language, history)
 
-            chain = prompt | self.llm
-            response = await chain.ainvoke({"query": query})
+            llm = self.llms.get(tier) or self.llm
+            response = await invoke_llm(llm, messages, stage="career_agent", language=language)
 
             logger.info("career_query_processed", query=query[:100])
 
@@ -0,0 +1,189 @@
+"""FAQ index - precomputed answers served without any LLM call"""
+
+import os
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional
+
+import structlog
+import yaml
+from prometheus_client import Counter
+
+from .knowledge_base import DATA_DIR
+
+logger = structlog.get_logger()
+
+# Configuration
+FAQ_PATH = os.getenv("FAQ_PATH", os.path.join(DATA_DIR, "faq.yaml"))
+FAQ_ENABLED = os.getenv("FAQ_ENABLED", "true").lower() == "true"
+FAQ_MIN_CONFIDENCE = float(os.getenv("FAQ_MIN_CONFIDENCE", "0.8"))
+
+# Function words ignored when scoring (English and Portuguese)
+STOPWORDS = frozenset("""
+    a an the is are was were be been am i me my you your he him his she her it its they them their
+    we our us what whats which who whom whose where when how do does did can could would should will
+    to of in on at for from with by about as and or but if so than then this that these those there
+    please tell know let s t d edson edsons zandamela minion hi hello hey
+    o os as um uma uns umas e de do da dos das no na nos nas em para por com sobre que quem qual
+    quais onde quando como eu ele ela seu sua seus suas dele dela me mim voce te ao aos se ser sao
+    foi pode poderia diga diz fale conte ola oi
+""".split())
+
+_WORD_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+# Metrics
+FAQ_LOOKUPS = Counter('faq_lookups_total', 'FAQ index lookups', ['result'])
+
+
+def normalize(text: str) -> List[str]:
+    """Lowercase, strip accents and split text into words"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _WORD_RE.findall(text)
+
+
+def content_words(text: str) -> List[str]:
+    """Words of a query that carry meaning (stopwords removed)"""
+    return [word for word in normalize(text) if word not in STOPWORDS]
+
+
+@dataclass(frozen=True)
+class FAQEntry:
+    """Single precomputed FAQ answer"""
+    id: str
+    route: str
+    triggers: FrozenSet[str]
+    vocabulary: FrozenSet[str]
+    answers: Dict[str, str]
+    questions: Dict[str, str]
+
+
+@dataclass(frozen=True)
+class FAQMatch:
+    """FAQ lookup result"""
+    entry: FAQEntry
+    answer: str
+    confidence: float
+
+
+class FAQIndex:
+    """
+    Word-set index over the FAQ data file
+
+    A query matches an entry when it contains one of the entry's trigger
+    words; confidence is the share of the query's content words that the
+    entry knows about (triggers + vocabulary). Lookups are a handful of set
+    operations - no LLM, no I/O.
+    """
+
+    def __init__(self, entries: List[FAQEntry], min_confidence: float = FAQ_MIN_CONFIDENCE):
+        self.entries = entries
+        self.min_confidence = min_confidence
+        self._by_trigger: Dict[str, List[FAQEntry]] = {}
+        for entry in entries:
+            for trigger in entry.triggers:
+                self._by_trigger.setdefault(trigger, []).append(entry)
+
+    @classmethod
+    def load(cls, path: str = FAQ_PATH) -> "FAQIndex":
+        """Build the index from the FAQ data file (empty index on failure)"""
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = yaml.safe_load(f) or {}
+
+            entries = [
+                FAQEntry(
+                    id=item["id"],
+                    route=item.get("route", "general"),
+                    triggers=frozenset(w for t in item["triggers"] for w in normalize(str(t))),
+                    vocabulary=frozenset(w for v in item.get("vocabulary", []) for w in normalize(str(v))),
+                    answers={lang: text.strip() for lang, text in item.get("answers", {}).items()},
+                    questions=item.get("questions", {}),
+                )
+                for item in data.get("entries", [])
+            ]
+
+            logger.info("faq_index_loaded", path=path, entries=len(entries))
+            return cls(entries)
+
+        except Exception as e:
+            logger.error("faq_index_load_failed", path=path, error=str(e))
+            return cls([])
+
+    def match(self, query: str, language: str = "en") -> Optional[FAQMatch]:
+        """Return the best high-confidence answer for a query, if any"""
+        words = content_words(query)
+        if not words:
+            FAQ_LOOKUPS.labels(result="miss").inc()
+            return None
+
+        candidates = {entry.id: entry for word in words for entry in self._by_trigger.get(word, ())}
+
+        best: Optional[FAQMatch] = None
+        for entry in candidates.values():
+            answer = entry.answers.get(language) or entry.answers.get("en")
+            if not answer:
+                continue
+
+            known = entry.triggers | entry.vocabulary
+            confidence = sum(1 for word in words if word in known) / len(words)
+
+            if confidence >= self.min_confidence and (best is None or confidence > best.confidence):
+                best = FAQMatch(entry=entry, answer=answer, confidence=confidence)
+
+        FAQ_LOOKUPS.labels(result="hit" if best else "miss").inc()
+        return best
+
+
+async def regenerate(path: str = FAQ_PATH):
+    """Regenerate every FAQ answer offline with the real agents"""
+    from .supervisor import SupervisorAgent
+
+    with open(path, encoding="utf-8") as f:
+        raw = f.read()
+    data = yaml.safe_load(raw)
+
+    # Keep the explanatory header comment when rewriting the file
+    header = "".join(line + "\n" for line in raw.splitlines() if line.startswith("#"))
+
+    supervisor = SupervisorAgent()
+
+    for item in data.get("entries", []):
+        for language, question in item.get("questions", {}).items():
+            response = await supervisor.process_query(
+                query=question,
+                language=language,
+                use_faq=False,
+            )
+
+            if response.agent_used == "fallback":
+                logger.warning("faq_regeneration_skipped", id=item["id"], language=language)
+                continue
+
+            item.setdefault("answers", {})[language] = response.message.strip()
+            logger.info("faq_answer_regenerated", id=item["id"], language=language)
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(header)
+        yaml.safe_dump(data, f, allow_unicode=True, sort_keys=False, width=120)
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+
+    parser = argparse.ArgumentParser(description="FAQ answer table tools")
+    parser.add_argument("--regenerate", action="store_true", help="Regenerate answers with the real agents")
+    parser.add_argument("--path", default=FAQ_PATH, help="FAQ data file")
+    parser.add_argument("--query", help="Look up a single query")
+    parser.add_argument("--language", default="en", choices=["en", "pt"])
+    args = parser.parse_args()
+
+    if args.regenerate:
+        asyncio.run(regenerate(args.path))
+    elif args.query:
+        result = FAQIndex.load(args.path).match(args.query, args.language)
+        print(f"{result.entry.id} ({result.confidence:.2f}): {result.answer}" if result else "no match")
+    else:
+        parser.print_help()
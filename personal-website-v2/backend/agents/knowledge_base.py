@@ -0,0 +1,200 @@
+"""Knowledge base - versioned, hot-reloadable agent data loaded from data files"""
+
+import asyncio
+import hashlib
+import os
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+import structlog
+from prometheus_client import Counter
+
+logger = structlog.get_logger()
+
+# Configuration
+DATA_DIR = os.getenv(
+    "DATA_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"),
+)
+KNOWLEDGE_DIR = os.getenv("KNOWLEDGE_DIR", os.path.join(DATA_DIR, "knowledge"))
+KB_WATCH_ENABLED = os.getenv("KB_WATCH_ENABLED", "true").lower() == "true"
+KB_WATCH_INTERVAL_SECONDS = float(os.getenv("KB_WATCH_INTERVAL_SECONDS", "5"))
+KB_EXTENSIONS = (".md", ".yaml", ".yml")
+
+# Metrics
+KB_RELOADS = Counter('knowledge_base_reloads_total', 'Knowledge base reloads', ['result'])
+
+
+@dataclass(frozen=True)
+class KnowledgeSnapshot:
+    """Immutable view of the knowledge base at one version"""
+    version: str
+    sections: Mapping[str, str]
+    fingerprint: Tuple
+
+
+EMPTY_SNAPSHOT = KnowledgeSnapshot(version="empty", sections=MappingProxyType({}), fingerprint=())
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class KnowledgeBase:
+    """
+    Agent knowledge loaded from Markdown/YAML files in KNOWLEDGE_DIR
+
+    Each file is one section named after its stem (career.md -> "career").
+    The content hash of all files is the version. Reloads build a complete
+    new snapshot and swap the reference in one assignment, so readers never
+    see a half-loaded knowledge base; subscribers are then notified to drop
+    anything derived from the previous version.
+
+    If the first load fails (KNOWLEDGE_DIR missing or unreadable), the
+    knowledge base starts empty and logs an error, so the agents can still be
+    built; the watcher installs the files once they can be read. A failed
+    reload keeps the previous snapshot.
+    """
+
+    def __init__(self, directory: str = KNOWLEDGE_DIR):
+        self.directory = directory
+        self._listeners: List[Callable[[KnowledgeSnapshot], None]] = []
+        self._watch_task: Optional[asyncio.Task] = None
+        try:
+            self._snapshot = self._load()
+        except Exception as e:
+            KB_RELOADS.labels(result="failed").inc()
+            logger.error("knowledge_base_load_failed", directory=directory, error=str(e))
+            self._snapshot = EMPTY_SNAPSHOT
+
+    @property
+    def snapshot(self) -> KnowledgeSnapshot:
+        return self._snapshot
+
+    @property
+    def version(self) -> str:
+        return self._snapshot.version
+
+    def get(self, section: str) -> str:
+        """Get a section's text (empty string if missing)"""
+        return self._snapshot.sections.get(section, "")
+
+    def prompt_text(self, section: str) -> str:
+        """Section text with braces escaped for use inside a ChatPromptTemplate"""
+        return self.get(section).replace("{", "{{").replace("}", "}}")
+
+    def subscribe(self, callback: Callable[[KnowledgeSnapshot], None]):
+        """Register a callback invoked with the new snapshot after each reload"""
+        self._listeners.append(callback)
+
+    def _fingerprint(self) -> Tuple:
+        """Cheap change detector: (name, size, mtime) of every data file"""
+        entries = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(KB_EXTENSIONS):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((name, stat.st_size, stat.st_mtime_ns))
+        return tuple(entries)
+
+    def _load(self) -> KnowledgeSnapshot:
+        """Load every data file into a new snapshot"""
+        fingerprint = self._fingerprint()
+        digest = hashlib.sha256()
+        sections: Dict[str, str] = {}
+
+        for name, _, _ in fingerprint:
+            content = _read(os.path.join(self.directory, name))
+            digest.update(name.encode("utf-8") + b"\0" + content + b"\0")
+            sections[os.path.splitext(name)[0]] = content.decode("utf-8").strip()
+
+        snapshot = KnowledgeSnapshot(
+            version=digest.hexdigest()[:12],
+            sections=MappingProxyType(sections),
+            fingerprint=fingerprint,
+        )
+
+        logger.info(
+            "knowledge_base_loaded",
+            directory=self.directory,
+            version=snapshot.version,
+            sections=list(sections),
+        )
+
+        return snapshot
+
+    def _swap(self, snapshot: KnowledgeSnapshot) -> bool:
+        """Install a loaded snapshot; returns True if the content version changed"""
+        if snapshot.version == self._snapshot.version:
+            # Touched but unchanged - keep the fingerprint current
+            self._snapshot = snapshot
+            KB_RELOADS.labels(result="unchanged").inc()
+            return False
+
+        previous = self._snapshot.version
+        self._snapshot = snapshot
+        KB_RELOADS.labels(result="changed").inc()
+        logger.info("knowledge_base_swapped", previous=previous, version=snapshot.version)
+
+        for callback in self._listeners:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                logger.error("knowledge_base_listener_failed", error=str(e))
+
+        return True
+
+    def reload(self) -> bool:
+        """Reload from disk; returns True if the content version changed"""
+        try:
+            snapshot = self._load()
+        except Exception as e:
+            KB_RELOADS.labels(result="failed").inc()
+            logger.error("knowledge_base_reload_failed", error=str(e))
+            return False
+
+        return self._swap(snapshot)
+
+    async def _watch(self, interval: float):
+        """Poll data file metadata and reload on change"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await asyncio.to_thread(self._fingerprint) == self._snapshot.fingerprint:
+                    continue
+                # File I/O off the event loop; the swap and listeners run on it
+                snapshot = await asyncio.to_thread(self._load)
+            except Exception as e:
+                KB_RELOADS.labels(result="failed").inc()
+                logger.error("knowledge_base_reload_failed", error=str(e))
+                continue
+
+            self._swap(snapshot)
+
+    def start_watcher(self, interval: float = KB_WATCH_INTERVAL_SECONDS):
+        """Start the background file watcher on the running event loop"""
+        if self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch(interval))
+            logger.info("knowledge_base_watcher_started", interval=interval)
+
+    async def stop_watcher(self):
+        """Stop the background file watcher"""
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+
+_knowledge_base: Optional[KnowledgeBase] = None
+
+
+def get_knowledge_base() -> KnowledgeBase:
+    """Get the process-wide knowledge base (loaded on first use)"""
+    global _knowledge_base
+    if _knowledge_base is None:
+        _knowledge_base = KnowledgeBase()
+    return _knowledge_base
@@ -0,0 +1,228 @@
+"""Conversation memory - bounded per-conversation history with a running summary"""
+
+import json
+import os
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import redis.asyncio as redis
+import structlog
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from prometheus_client import Counter, Histogram
+
+from utils.token_counter import count_tokens
+
+logger = structlog.get_logger()
+
+# Configuration
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+MEMORY_ENABLED = os.getenv("CONVERSATION_MEMORY_ENABLED", "true").lower() == "true"
+# Max tokens of history (summary + verbatim turns) injected into a prompt
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "400"))
+# Max tokens kept in the running summary of older turns
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", "120"))
+# Conversations kept in the in-process LRU
+CONVERSATION_CACHE_SIZE = int(os.getenv("CONVERSATION_CACHE_SIZE", "1000"))
+CONVERSATION_TTL_SECONDS = int(os.getenv("CONVERSATION_TTL_SECONDS", "3600"))
+# Longest text stored for a single turn
+TURN_MAX_CHARS = 600
+
+USER = "u"
+ASSISTANT = "a"
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Metrics
+HISTORY_TOKENS = Histogram(
+    'conversation_history_tokens',
+    'History tokens injected into agent prompts per request',
+    buckets=[0, 25, 50, 100, 200, 300, 400, 600, 800],
+)
+HISTORY_SUMMARIZED_TURNS = Counter(
+    'conversation_summarized_turns_total',
+    'Turns rolled into the running conversation summary',
+)
+MEMORY_LOOKUPS = Counter('conversation_memory_lookups_total', 'Conversation lookups', ['tier'])
+
+
+def _compact_text(text: str, max_chars: int = TURN_MAX_CHARS) -> str:
+    """Collapse whitespace and cap length"""
+    text = _WHITESPACE_RE.sub(" ", text).strip()
+    return text if len(text) <= max_chars else text[: max_chars - 3].rstrip() + "..."
+
+
+def _first_sentence(text: str, max_chars: int) -> str:
+    """First sentence of text, capped at max_chars"""
+    sentence = _SENTENCE_END_RE.split(text, maxsplit=1)[0]
+    return _compact_text(sentence, max_chars)
+
+
+@dataclass
+class Turn:
+    """One message of a conversation (compact: role char, text, token count)"""
+    role: str
+    text: str
+    tokens: int
+
+
+@dataclass
+class Conversation:
+    """Recent turns kept verbatim plus a summary of older ones"""
+    turns: List[Turn] = field(default_factory=list)
+    summary: str = ""
+    summary_tokens: int = 0
+
+    @property
+    def history_tokens(self) -> int:
+        return self.summary_tokens + sum(turn.tokens for turn in self.turns)
+
+    @property
+    def last_question(self) -> Optional[str]:
+        """Most recent user turn (compaction always keeps it verbatim)"""
+        return next((turn.text for turn in reversed(self.turns) if turn.role == USER), None)
+
+    def to_messages(self) -> List[BaseMessage]:
+        """History as chat messages for injection between system prompt and query"""
+        messages: List[BaseMessage] = []
+        if self.summary:
+            messages.append(SystemMessage(content=f"Summary of the earlier conversation:\n{self.summary}"))
+        for turn in self.turns:
+            if turn.role == USER:
+                messages.append(HumanMessage(content=turn.text))
+            else:
+                messages.append(AIMessage(content=turn.text))
+        return messages
+
+    def dumps(self) -> str:
+        """Compact JSON representation"""
+        return json.dumps(
+            {"s": self.summary, "st": self.summary_tokens, "t": [[t.role, t.text, t.tokens] for t in self.turns]},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def loads(cls, raw: str) -> "Conversation":
+        data = json.loads(raw)
+        return cls(
+            turns=[Turn(role, text, tokens) for role, text, tokens in data.get("t", [])],
+            summary=data.get("s", ""),
+            summary_tokens=data.get("st", 0),
+        )
+
+
+class ConversationStore:
+    """
+    Two-tier conversation store
+
+    An in-process LRU serves the common case (follow-ups landing on the same
+    pod); Redis shares conversations across replicas. History is kept under
+    HISTORY_TOKEN_BUDGET by rolling the oldest turns into an extractive
+    summary - no extra LLM call per request.
+    """
+
+    def __init__(
+        self,
+        max_conversations: int = CONVERSATION_CACHE_SIZE,
+        token_budget: int = HISTORY_TOKEN_BUDGET,
+        summary_budget: int = SUMMARY_TOKEN_BUDGET,
+    ):
+        self.max_conversations = max_conversations
+        self.token_budget = token_budget
+        self.summary_budget = summary_budget
+        self._cache: "OrderedDict[str, Conversation]" = OrderedDict()
+        self.redis_client = None
+
+    async def _get_redis(self) -> redis.Redis:
+        """Get or create Redis connection"""
+        if not self.redis_client:
+            self.redis_client = await redis.from_url(
+                REDIS_URL,
+                encoding="utf-8",
+                decode_responses=True,
+            )
+        return self.redis_client
+
+    @staticmethod
+    def _key(conversation_id: str) -> str:
+        return f"conv:{conversation_id}"
+
+    def _remember(self, conversation_id: str, conversation: Conversation):
+        """Insert into the LRU, evicting the least recently used conversation"""
+        self._cache[conversation_id] = conversation
+        self._cache.move_to_end(conversation_id)
+        while len(self._cache) > self.max_conversations:
+            self._cache.popitem(last=False)
+
+    async def get(self, conversation_id: str) -> Optional[Conversation]:
+        """Load a conversation (LRU first, then Redis)"""
+        conversation = self._cache.get(conversation_id)
+        if conversation is not None:
+            self._cache.move_to_end(conversation_id)
+            MEMORY_LOOKUPS.labels(tier="memory").inc()
+            return conversation
+
+        try:
+            redis_client = await self._get_redis()
+            raw = await redis_client.get(self._key(conversation_id))
+        except Exception as e:
+            logger.error("conversation_load_failed", error=str(e))
+            raw = None
+
+        if not raw:
+            MEMORY_LOOKUPS.labels(tier="miss").inc()
+            return None
+
+        conversation = Conversation.loads(raw)
+        self._remember(conversation_id, conversation)
+        MEMORY_LOOKUPS.labels(tier="redis").inc()
+        return conversation
+
+    async def append(self, conversation_id: str, query: str, answer: str):
+        """Add a question/answer exchange and persist the conversation"""
+        conversation = await self.get(conversation_id) or Conversation()
+
+        for role, text in ((USER, query), (ASSISTANT, answer)):
+            text = _compact_text(text)
+            conversation.turns.append(Turn(role, text, count_tokens(text)))
+
+        self._compact(conversation)
+        self._remember(conversation_id, conversation)
+
+        try:
+            redis_client = await self._get_redis()
+            await redis_client.set(
+                self._key(conversation_id),
+                conversation.dumps(),
+                ex=CONVERSATION_TTL_SECONDS,
+            )
+        except Exception as e:
+            logger.error("conversation_save_failed", error=str(e))
+
+    def _compact(self, conversation: Conversation):
+        """Roll the oldest exchanges into the summary until history fits the budget"""
+        summarized = 0
+
+        # Always keep the latest exchange verbatim
+        while conversation.history_tokens > self.token_budget and len(conversation.turns) > 2:
+            question = conversation.turns.pop(0)
+            answer = conversation.turns.pop(0) if conversation.turns[0].role == ASSISTANT else None
+            summarized += 2 if answer else 1
+
+            line = f"- Q: {_first_sentence(question.text, 120)}"
+            if answer:
+                line += f" A: {_first_sentence(answer.text, 160)}"
+
+            lines = [l for l in conversation.summary.split("\n") if l] + [line]
+            # Drop the oldest summary lines once the summary itself is over budget
+            while len(lines) > 1 and count_tokens("\n".join(lines)) > self.summary_budget:
+                lines.pop(0)
+
+            conversation.summary = "\n".join(lines)
+            conversation.summary_tokens = count_tokens(conversation.summary)
+
+        if summarized:
+            HISTORY_SUMMARIZED_TURNS.inc(summarized)
@@ -0,0 +1,194 @@
+"""Query log - anonymized popular questions, replayed to warm caches on startup"""
+
+import asyncio
+import os
+import re
+import time
+from collections import Counter
+from typing import List, Optional, Tuple
+
+import redis.asyncio as redis
+import structlog
+from prometheus_client import Counter as MetricCounter, Gauge
+
+from .response_cache import normalize_query
+
+logger = structlog.get_logger()
+
+# Configuration
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+QUERY_LOG_ENABLED = os.getenv("QUERY_LOG_ENABLED", "true").lower() == "true"
+QUERY_LOG_KEY = os.getenv("QUERY_LOG_KEY", "querylog")
+QUERY_LOG_MAX_ENTRIES = int(os.getenv("QUERY_LOG_MAX_ENTRIES", "2000"))
+QUERY_LOG_FLUSH_SECONDS = float(os.getenv("QUERY_LOG_FLUSH_SECONDS", "10"))
+# Longer questions rarely repeat and are more likely to be personal
+QUERY_LOG_MAX_WORDS = int(os.getenv("QUERY_LOG_MAX_WORDS", "20"))
+CACHE_WARM_ENABLED = os.getenv("CACHE_WARM_ENABLED", "true").lower() == "true"
+CACHE_WARM_TOP_K = int(os.getenv("CACHE_WARM_TOP_K", "50"))
+CACHE_WARM_INTERVAL_MS = float(os.getenv("CACHE_WARM_INTERVAL_MS", "100"))
+CACHE_WARM_MAX_SECONDS = float(os.getenv("CACHE_WARM_MAX_SECONDS", "300"))
+
+# Anything that could identify the visitor: emails, URLs, phone/ID numbers
+_PII_RE = re.compile(r"[\w.+-]+@[\w-]+\.\w|https?://|www\.|\d{5,}|(?:\d[\s().-]*){7,}", re.IGNORECASE)
+_SEPARATOR = "|"
+
+# Metrics
+QUERY_LOG_RECORDS = MetricCounter('query_log_records_total', 'Queries offered to the query log', ['result'])
+CACHE_WARM_DURATION = Gauge('cache_warm_duration_seconds', 'Duration of the last startup cache warm')
+CACHE_WARMED_ENTRIES = Gauge('cache_warmed_entries', 'Response cache entries filled by the last startup warm')
+
+
+def anonymize(query: str) -> Optional[str]:
+    """Normalized query safe to store, or None if it may contain personal data"""
+    if _PII_RE.search(query):
+        return None
+    normalized = normalize_query(query)
+    if not normalized or len(normalized.split()) > QUERY_LOG_MAX_WORDS:
+        return None
+    return normalized
+
+
+class QueryLog:
+    """
+    Popularity-ranked log of answered questions in a Redis sorted set
+
+    Members are "language|route|normalized query"; scores are counts. Only
+    the normalized text is kept (lowercase, no accents or punctuation) and
+    queries with emails, URLs or long numbers are never recorded. Counts are
+    buffered in-process and flushed in one pipeline every
+    QUERY_LOG_FLUSH_SECONDS, so recording costs nothing on the request path.
+    """
+
+    def __init__(self, key: str = QUERY_LOG_KEY, max_entries: int = QUERY_LOG_MAX_ENTRIES):
+        self.key = key
+        self.max_entries = max_entries
+        self.redis_client = None
+        self._pending: Counter = Counter()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def _get_redis(self) -> redis.Redis:
+        """Get or create Redis connection"""
+        if not self.redis_client:
+            self.redis_client = await redis.from_url(
+                REDIS_URL,
+                encoding="utf-8",
+                decode_responses=True,
+            )
+        return self.redis_client
+
+    def record(self, query: str, language: str, route: str):
+        """Count an answered question"""
+        normalized = anonymize(query)
+        if normalized is None:
+            QUERY_LOG_RECORDS.labels(result="rejected").inc()
+            return
+        self._pending[_SEPARATOR.join((language, route, normalized))] += 1
+        QUERY_LOG_RECORDS.labels(result="recorded").inc()
+
+    async def flush(self):
+        """Write buffered counts and trim the log to max_entries"""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, Counter()
+
+        try:
+            redis_client = await self._get_redis()
+            pipe = redis_client.pipeline(transaction=False)
+            for member, count in pending.items():
+                pipe.zincrby(self.key, count, member)
+            pipe.zremrangebyrank(self.key, 0, -(self.max_entries + 1))
+            await pipe.execute()
+        except Exception as e:
+            logger.error("query_log_flush_failed", error=str(e), dropped=len(pending))
+
+    async def top(self, k: int) -> List[Tuple[str, str, str, int]]:
+        """Most frequent questions as (language, route, query, count)"""
+        try:
+            redis_client = await self._get_redis()
+            members = await redis_client.zrevrange(self.key, 0, k - 1, withscores=True)
+        except Exception as e:
+            logger.error("query_log_read_failed", error=str(e))
+            return []
+
+        entries = []
+        for member, score in members:
+            language, route, query = member.split(_SEPARATOR, 2)
+            entries.append((language, route, query, int(score)))
+        return entries
+
+    async def _flush_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    def start(self, interval: float = QUERY_LOG_FLUSH_SECONDS):
+        """Start periodic flushing on the running event loop"""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop(interval))
+
+    async def stop(self):
+        """Stop periodic flushing and write what is buffered"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+
+async def warm_caches(
+    supervisor,
+    query_log: QueryLog,
+    top_k: int = CACHE_WARM_TOP_K,
+    interval_ms: float = CACHE_WARM_INTERVAL_MS,
+    max_seconds: float = CACHE_WARM_MAX_SECONDS,
+) -> int:
+    """
+    Replay the top-K logged questions through the supervisor
+
+    Fills the response cache and warms the provider's prompt/KV caches
+    before traffic arrives. Runs one query at a time with a pause between
+    queries so live requests always win, and stops after max_seconds.
+    Returns the number of cache entries warmed.
+    """
+    start_time = time.perf_counter()
+    warmed = 0
+    entries = await query_log.top(top_k)
+    cache = supervisor.response_cache
+
+    for language, route, query, _ in entries:
+        if time.perf_counter() - start_time > max_seconds:
+            logger.warning("cache_warm_time_budget_exhausted", warmed=warmed, remaining=len(entries) - warmed)
+            break
+        if cache is not None and cache.get(query, language) is not None:
+            continue
+
+        try:
+            # Lowest priority - under load, warming is shed before real traffic
+            await supervisor.process_query(query, language=language, route=route, priority="low")
+        except Exception as e:
+            logger.error("cache_warm_query_failed", error=str(e))
+            continue
+
+        if cache is not None and cache.get(query, language) is not None:
+            warmed += 1
+        await asyncio.sleep(interval_ms / 1000)
+
+    duration = time.perf_counter() - start_time
+    CACHE_WARM_DURATION.set(duration)
+    CACHE_WARMED_ENTRIES.set(warmed)
+    logger.info("cache_warm_completed", candidates=len(entries), warmed=warmed, duration=duration)
+    return warmed
+
+
+_query_log: Optional[QueryLog] = None
+
+
+def get_query_log() -> QueryLog:
+    """Get the process-wide query log"""
+    global _query_log
+    if _query_log is None:
+        _query_log = QueryLog()
+    return _query_log
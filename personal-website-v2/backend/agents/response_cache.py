@@ -0,0 +1,96 @@
+"""Response cache - answers to first-turn questions, keyed by knowledge base version"""
+
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import structlog
+from prometheus_client import Counter, Gauge
+
+from .faq import normalize
+from .knowledge_base import get_knowledge_base
+
+logger = structlog.get_logger()
+
+# Configuration
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "500"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+
+# Metrics
+RESPONSE_CACHE_LOOKUPS = Counter('response_cache_lookups_total', 'Response cache lookups', ['result'])
+RESPONSE_CACHE_ENTRIES = Gauge('response_cache_entries', 'Entries in the response cache')
+
+
+@dataclass(frozen=True)
+class CachedAnswer:
+    """Agent answer stored without per-request fields"""
+    message: str
+    agent_used: str
+    confidence: float
+    tier: Optional[str]
+    route: str
+    stored_at: float
+
+
+def normalize_query(query: str) -> str:
+    """Canonical form of a question (lowercase, no accents or punctuation)"""
+    return " ".join(normalize(query))
+
+
+class ResponseCache:
+    """
+    In-process LRU of agent answers for first-turn questions
+
+    Keyed by (knowledge base version, language, normalized query), so a
+    knowledge base change can never serve a stale answer; the cache is also
+    cleared on reload to free the old entries. Follow-up questions are not
+    cached - their answers depend on conversation history.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str, str], CachedAnswer]" = OrderedDict()
+        get_knowledge_base().subscribe(self._on_knowledge_base_reload)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(query: str, language: str) -> Tuple[str, str, str]:
+        return get_knowledge_base().version, language, normalize_query(query)
+
+    def get(self, query: str, language: str) -> Optional[CachedAnswer]:
+        key = self.key(query, language)
+        answer = self._entries.get(key)
+        if answer is None:
+            RESPONSE_CACHE_LOOKUPS.labels(result="miss").inc()
+            return None
+        if time.monotonic() - answer.stored_at > self.ttl:
+            del self._entries[key]
+            RESPONSE_CACHE_ENTRIES.set(len(self._entries))
+            RESPONSE_CACHE_LOOKUPS.labels(result="expired").inc()
+            return None
+
+        self._entries.move_to_end(key)
+        RESPONSE_CACHE_LOOKUPS.labels(result="hit").inc()
+        return answer
+
+    def put(self, query: str, language: str, route: str, message: str, agent_used: str, confidence: float, tier: Optional[str]):
+        key = self.key(query, language)
+        self._entries[key] = CachedAnswer(message, agent_used, confidence, tier, route, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        RESPONSE_CACHE_ENTRIES.set(len(self._entries))
+
+    def clear(self):
+        self._entries.clear()
+        RESPONSE_CACHE_ENTRIES.set(0)
+
+    def _on_knowledge_base_reload(self, snapshot):
+        self.clear()
+        logger.info("response_cache_cleared", kb_version=snapshot.version)
@@ -1,13 +1,25 @@
 """Supervisor agent that routes queries to specialized agents"""
 
+import asyncio
 import os
+import time
 import uuid
+from collections import defaultdict
+from contextlib import aclosing, nullcontext
 import structlog
-from typing import Optional, Dict, Any
+from typing import AsyncIterator, Optional, Dict, List, Tuple, Union
 from langchain.prompts import ChatPromptTemplate
 from pydantic import BaseModel
 
-from utils.llm_provider import get_classifier_llm
+from guardrails.load_shedder import get_load_shedder
+from utils.classifier_batcher import ClassifierBatcher, with_previous_question
+from utils.llm_provider import CLASSIFIER_STOP, get_classifier_llm, stream_llm
+from utils.model_tiering import MODEL_TIER_LATENCY, MODEL_TIER_REQUESTS, TieringPolicy
+from utils.token_counter import get_ledger, start_ledger
+from .faq import FAQ_ENABLED, FAQIndex, FAQMatch
+from .knowledge_base import get_knowledge_base
+from .memory import HISTORY_TOKENS, MEMORY_ENABLED, Conversation, ConversationStore
+from .response_cache import RESPONSE_CACHE_ENABLED, ResponseCache
 from .career_agent import CareerAgent
 from .technical_agent import TechnicalAgent
 from .general_agent import GeneralAgent
@@ -22,6 +34,25 @@ class AgentResponse(BaseModel):
     tokens_used: int
     agent_used: str
     confidence: float
+    tier: Optional[str] = None
+    cached: bool = False  # served from the response cache
+
+
+ROUTING_INSTRUCTIONS = """You are a routing agent. Determine which agent should handle the user's question:
+
+                - career: Questions about work experience, job roles, companies, positions
+                - technical: Questions about skills, technologies, programming languages, tools, projects
+                - general: General questions about education, background, contact info, interests
+
+                A follow-up may come with the previous question of the conversation;
+                route the follow-up, reading it in that context.
+
+                Respond with ONLY one word: career, technical, or general"""
+
+ROUTING_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", ROUTING_INSTRUCTIONS),
+    ("user", "{query}"),
+])
 
 
 class SupervisorAgent:
@@ -35,9 +66,33 @@ class SupervisorAgent:
     """
 
     def __init__(self):
+        # Precomputed answers for deterministic questions (no LLM needed)
+        self.faq = FAQIndex.load() if FAQ_ENABLED else FAQIndex([])
+
+        # FAQ answers are derived from the knowledge base - refresh them with it
+        get_knowledge_base().subscribe(self._on_knowledge_base_reload)
+
+        # Bounded per-conversation history for follow-up questions
+        self.memory = ConversationStore()
+
+        # Answers to repeated first-turn questions (cleared on knowledge base reload)
+        self.response_cache = ResponseCache() if RESPONSE_CACHE_ENABLED else None
+
         try:
             # Initialize routing LLM (uses classifier - small and fast)
             self.llm = get_classifier_llm()
+            # Concurrent routing calls share one classifier prompt
+            self.router = ClassifierBatcher(
+                self.llm,
+                stage="routing",
+                single_messages=lambda query: ROUTING_PROMPT.format_messages(query=query),
+                instructions=ROUTING_INSTRUCTIONS,
+                labels=("career", "technical", "general"),
+                stop=CLASSIFIER_STOP,
+            )
+
+            # Decides small vs large model per query
+            self.tiering = TieringPolicy()
 
             # Initialize specialized agents
             self.career_agent = CareerAgent()
@@ -53,31 +108,26 @@ class SupervisorAgent:
             logger.error("supervisor_init_failed", error=str(e))
             self.llm = None
 
-    async def route_query(self, query: str) -> str:
+    def _on_knowledge_base_reload(self, snapshot):
+        """Swap in a freshly loaded FAQ index after a knowledge base change"""
+        if FAQ_ENABLED:
+            self.faq = FAQIndex.load()
+        logger.info("supervisor_caches_invalidated", kb_version=snapshot.version)
+
+    async def route_query(self, query: str, previous_question: Optional[str] = None) -> str:
         """
         Determine which agent should handle the query
 
+        previous_question is the conversation's last user turn - follow-ups
+        like "and before that?" are routed in its context.
+
         Returns: "career" | "technical" | "general"
         """
         if not self.llm:
             return "general"
 
         try:
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", """You are a routing agent. Determine which agent should handle the user's question:
-
-                - career: Questions about work experience, job roles, companies, positions
-                - technical: Questions about skills, technologies, programming languages, tools, projects
-                - general: General questions about education, background, contact info, interests
-
-                Respond with ONLY one word: career, technical, or general"""),
-                ("user", "{query}"),
-            ])
-
-            chain = prompt | self.llm
-            response = await chain.ainvoke({"query": query})
-
-            route = response.content.strip().lower()
+            route = await self.router.classify(with_previous_question(query, previous_question))
 
             if route not in ["career", "technical", "general"]:
                 route = "general"
@@ -94,61 +144,365 @@ class SupervisorAgent:
             logger.error("routing_failed", error=str(e))
             return "general"
 
+    def _select_agent(self, route: str):
+        """Specialized agent for a route -> (agent, agent_used)"""
+        if route == "career":
+            return self.career_agent, "career_agent"
+        if route == "technical":
+            return self.technical_agent, "technical_agent"
+        return self.general_agent, "general_agent"
+
+    def _admission(self, priority: Optional[str]):
+        """Load shedder slot for an agent run (no-op without a priority)"""
+        shedder = get_load_shedder() if priority else None
+        return shedder.slot(priority) if shedder else nullcontext()
+
+    async def _load_conversation(self, conversation_id: str, is_new_conversation: bool) -> Optional[Conversation]:
+        """Earlier turns of this conversation (summary + recent exchanges)"""
+        conversation = None
+        if MEMORY_ENABLED and not is_new_conversation:
+            conversation = await self.memory.get(conversation_id)
+        HISTORY_TOKENS.observe(conversation.history_tokens if conversation else 0)
+        return conversation
+
+    async def previous_question(self, conversation_id: Optional[str]) -> Optional[str]:
+        """Last user turn of a conversation, as context for classifying a follow-up"""
+        if not MEMORY_ENABLED or not conversation_id:
+            return None
+        conversation = await self.memory.get(conversation_id)
+        return conversation.last_question if conversation else None
+
+    async def remember_exchange(self, query: str, response: AgentResponse):
+        """
+        Add an answered exchange to conversation memory
+
+        Called by the endpoints once the answer passed output validation, so
+        a rejected answer is never fed back to the model as history.
+        Fallback answers are not kept.
+        """
+        if MEMORY_ENABLED and response.agent_used != "fallback":
+            await self.memory.append(response.conversation_id, query, response.message)
+
+    async def _faq_response(
+        self,
+        query: str,
+        conversation_id: str,
+        language: str,
+        faq_match: Optional[FAQMatch] = None,
+    ) -> Optional[AgentResponse]:
+        """Answer from the FAQ table if there is a high-confidence match"""
+        faq_match = faq_match or self.faq.match(query, language)
+        if not faq_match:
+            return None
+
+        logger.info(
+            "faq_answered",
+            faq_id=faq_match.entry.id,
+            confidence=faq_match.confidence,
+        )
+        return AgentResponse(
+            message=faq_match.answer,
+            conversation_id=conversation_id,
+            tokens_used=0,
+            agent_used="faq",
+            confidence=faq_match.confidence,
+        )
+
+    async def _cached_response(
+        self,
+        query: str,
+        conversation_id: str,
+        language: str,
+    ) -> Optional[AgentResponse]:
+        """Answer a first-turn question from the response cache"""
+        cached = self.response_cache.get(query, language)
+        if cached is None:
+            return None
+
+        return AgentResponse(
+            message=cached.message,
+            conversation_id=conversation_id,
+            tokens_used=0,
+            agent_used=cached.agent_used,
+            confidence=cached.confidence,
+            tier=cached.tier,
+            cached=True,
+        )
+
+    def _cache_answer(self, query, language, route, message, agent_used, tier, ledger):
+        """Cache an answer the agent's LLM actually produced (not a fallback)"""
+        if self.response_cache is not None and agent_used in ledger.by_stage:
+            self.response_cache.put(query, language, route, message, agent_used, 0.85, tier)
+
     async def process_query(
         self,
         query: str,
         conversation_id: Optional[str] = None,
         language: str = "en",
+        use_faq: bool = True,
+        route: Optional[str] = None,
+        priority: Optional[str] = None,
+        faq_match: Optional[FAQMatch] = None,
+        use_cache: bool = True,
     ) -> AgentResponse:
         """
         Process a query through the multi-agent system
 
-        1. Route to appropriate agent
-        2. Agent processes query
-        3. Return response
+        1. Answer from the FAQ table if there is a high-confidence match
+        2. Route to appropriate agent (unless the caller already routed it)
+        3. Agent processes query
+        4. Return response
+
+        The exchange is not added to conversation memory - callers pass the
+        response to remember_exchange once it passed output validation. With a
+        priority, the agent run waits for a load shedder slot and may raise
+        LoadShedError; FAQ and cache hits never wait. Callers that already
+        looked the query up in the FAQ table pass use_faq=False and the
+        faq_match they found, if any. use_cache=False neither reads nor
+        fills the response cache.
         """
         # Generate conversation ID if not provided
-        if not conversation_id:
+        is_new_conversation = not conversation_id
+        if is_new_conversation:
             conversation_id = str(uuid.uuid4())
 
+        # Deterministic questions are answered straight from the FAQ table
+        if use_faq or faq_match:
+            faq_response = await self._faq_response(query, conversation_id, language, faq_match)
+            if faq_response:
+                return faq_response
+
+        # Repeated first-turn questions are answered from the response cache
+        if use_cache and is_new_conversation and self.response_cache is not None:
+            cached_response = await self._cached_response(query, conversation_id, language)
+            if cached_response:
+                return cached_response
+
         # If no LLM configured, return fallback response
         if not self.llm:
             return await self._fallback_response(query, conversation_id, language)
 
-        try:
-            # Route query to appropriate agent
-            route = await self.route_query(query)
-
-            # Process with selected agent
-            if route == "career":
-                response = await self.career_agent.process(query, language)
-                agent_used = "career_agent"
-            elif route == "technical":
-                response = await self.technical_agent.process(query, language)
-                agent_used = "technical_agent"
-            else:
-                response = await self.general_agent.process(query, language)
-                agent_used = "general_agent"
-
-            # Estimate tokens (rough approximation)
-            tokens_used = len(query.split()) + len(response.split())
-
-            return AgentResponse(
-                message=response,
-                conversation_id=conversation_id,
-                tokens_used=tokens_used,
-                agent_used=agent_used,
-                confidence=0.85,
-            )
+        # Token usage is accumulated across every LLM call of the request
+        # (topic classification, routing, agent generation)
+        ledger = get_ledger() or start_ledger()
 
-        except Exception as e:
-            logger.error(
-                "query_processing_failed",
-                error=str(e),
-                exc_info=True,
-            )
+        # Only agent runs are queued and shed
+        async with self._admission(priority):
+            try:
+                conversation = await self._load_conversation(conversation_id, is_new_conversation)
 
-            return await self._fallback_response(query, conversation_id, language)
+                # Route query to appropriate agent
+                if route is None:
+                    route = await self.route_query(query, conversation.last_question if conversation else None)
+
+                # Simple questions go to the small model, complex ones to the large one
+                tier = self.tiering.select_tier(query)
+
+                history = conversation.to_messages() if conversation else None
+
+                start_time = time.perf_counter()
+
+                # Process with selected agent
+                agent, agent_used = self._select_agent(route)
+                response = await agent.process(query, language, tier, history)
+
+                MODEL_TIER_LATENCY.labels(tier=tier).observe(time.perf_counter() - start_time)
+                MODEL_TIER_REQUESTS.labels(tier=tier, agent=agent_used).inc()
+
+                if use_cache and is_new_conversation:
+                    self._cache_answer(query, language, route, response, agent_used, tier, ledger)
+
+                tokens_used = ledger.total_tokens
+
+                logger.info(
+                    "query_tokens_accounted",
+                    route=route,
+                    tier=tier,
+                    tokens_used=tokens_used,
+                    by_stage=ledger.by_stage,
+                    by_model=ledger.by_model,
+                )
+
+                return AgentResponse(
+                    message=response,
+                    conversation_id=conversation_id,
+                    tokens_used=tokens_used,
+                    agent_used=agent_used,
+                    confidence=0.85,
+                    tier=tier,
+                )
+
+            except Exception as e:
+                logger.error(
+                    "query_processing_failed",
+                    error=str(e),
+                    exc_info=True,
+                )
+
+                return await self._fallback_response(query, conversation_id, language)
+
+    async def process_batch(
+        self,
+        queries: List[Tuple[str, str]],
+        concurrency: int = 4,
+        use_faq: bool = True,
+        use_cache: bool = False,
+    ) -> AsyncIterator[Tuple[int, str, AgentResponse, float]]:
+        """
+        Process many (query, language) pairs with bounded concurrency
+
+        All queries are routed first, then answered one route group at a
+        time (largest first) so consecutive calls share the same agent
+        prompt prefix and stay warm in the provider's prompt cache. Yields
+        (index, route, response, seconds) as each query completes. Batch
+        queries start no conversations. They bypass the
+        response cache unless use_cache is set (cache warming), so offline
+        runs (language variants, use_faq=False) neither serve nor overwrite
+        the answers interactive users get.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def classify(index: int, query: str, language: str):
+            if use_faq and self.faq.match(query, language):
+                return index, "faq", 0
+            ledger = start_ledger()
+            async with semaphore:
+                return index, await self.route_query(query), ledger.total_tokens
+
+        groups: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        for index, route, routing_tokens in await asyncio.gather(
+            *(classify(i, query, language) for i, (query, language) in enumerate(queries))
+        ):
+            groups[route].append((index, routing_tokens))
+
+        async def answer(index: int, route: str, routing_tokens: int):
+            query, language = queries[index]
+            async with semaphore:
+                start_ledger()
+                start_time = time.perf_counter()
+                response = await self.process_query(
+                    query,
+                    language=language,
+                    use_faq=use_faq,
+                    route=None if route == "faq" else route,
+                    use_cache=use_cache,
+                )
+                response.tokens_used += routing_tokens
+                return index, route, response, time.perf_counter() - start_time
+
+        for route, items in sorted(groups.items(), key=lambda group: -len(group[1])):
+            tasks = [asyncio.create_task(answer(index, route, tokens)) for index, tokens in items]
+            try:
+                for completed in asyncio.as_completed(tasks):
+                    yield await completed
+            finally:
+                # Consumer went away - do not keep generating
+                for task in tasks:
+                    task.cancel()
+
+    async def stream_query(
+        self,
+        query: str,
+        conversation_id: Optional[str] = None,
+        language: str = "en",
+        use_faq: bool = True,
+        priority: Optional[str] = None,
+        faq_match: Optional[FAQMatch] = None,
+    ) -> AsyncIterator[Union[str, AgentResponse]]:
+        """
+        Process a query like process_query, streaming the answer
+
+        Yields text chunks as the agent generates them, then the final
+        AgentResponse (whose message is the full answer). FAQ and fallback
+        answers arrive as a single chunk. LoadShedError is raised before the
+        first chunk when the request is shed. As with process_query, the
+        caller adds the exchange to memory with remember_exchange.
+        """
+        is_new_conversation = not conversation_id
+        if is_new_conversation:
+            conversation_id = str(uuid.uuid4())
+
+        if use_faq or faq_match:
+            faq_response = await self._faq_response(query, conversation_id, language, faq_match=faq_match)
+            if faq_response:
+                yield faq_response.message
+                yield faq_response
+                return
+
+        if is_new_conversation and self.response_cache is not None:
+            cached_response = await self._cached_response(query, conversation_id, language)
+            if cached_response:
+                yield cached_response.message
+                yield cached_response
+                return
+
+        if not self.llm:
+            fallback = await self._fallback_response(query, conversation_id, language)
+            yield fallback.message
+            yield fallback
+            return
+
+        ledger = get_ledger() or start_ledger()
+        parts = []
+
+        # Held until the answer is fully streamed
+        async with self._admission(priority):
+            try:
+                conversation = await self._load_conversation(conversation_id, is_new_conversation)
+                route = await self.route_query(query, conversation.last_question if conversation else None)
+                tier = self.tiering.select_tier(query)
+                history = conversation.to_messages() if conversation else None
+                agent, agent_used = self._select_agent(route)
+                llm = agent.llms.get(tier) or agent.llm
+
+                start_time = time.perf_counter()
+
+                if llm is None:
+                    parts.append(await agent.process(query, language, tier, history))
+                    yield parts[0]
+                else:
+                    messages = agent.build_messages(query, language, history)
+                    # Closed with us, so an aborted stream stops generating and is still charged
+                    async with aclosing(stream_llm(llm, messages, stage=agent_used, language=language)) as chunks:
+                        async for chunk in chunks:
+                            parts.append(chunk)
+                            yield chunk
+
+                MODEL_TIER_LATENCY.labels(tier=tier).observe(time.perf_counter() - start_time)
+                MODEL_TIER_REQUESTS.labels(tier=tier, agent=agent_used).inc()
+
+            except Exception as e:
+                logger.error("query_streaming_failed", error=str(e), exc_info=True)
+                if parts:
+                    # Part of the answer is already with the client - cannot substitute
+                    raise
+                fallback = await self._fallback_response(query, conversation_id, language)
+                yield fallback.message
+                yield fallback
+                return
+
+        response = "".join(parts)
+        if is_new_conversation:
+            self._cache_answer(query, language, route, response, agent_used, tier, ledger)
+
+        logger.info(
+            "query_tokens_accounted",
+            route=route,
+            tier=tier,
+            tokens_used=ledger.total_tokens,
+            by_stage=ledger.by_stage,
+            by_model=ledger.by_model,
+            streamed=True,
+        )
+
+        yield AgentResponse(
+            message=response,
+            conversation_id=conversation_id,
+            tokens_used=ledger.total_tokens,
+            agent_used=agent_used,
+            confidence=0.85,
+            tier=tier,
+        )
 
     async def _fallback_response(
         self,
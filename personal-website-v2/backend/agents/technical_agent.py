@@ -1,72 +1,17 @@
 """Technical agent - handles questions about skills, technologies, and projects"""
 
 import os
+from typing import List, Optional
+
 import structlog
 from langchain.prompts import ChatPromptTemplate
 
-from utils.llm_provider import get_llm
+from utils.llm_provider import invoke_llm
+from utils.model_tiering import TIER_LARGE, get_tiered_llms
+
+from .knowledge_base import get_knowledge_base
 
 logger = structlog.get_logger()
-TECHNICAL_DATA = """
-## Core Technical Skills
-
-### Generative AI & ML
-- LLMs: OpenAI (GPT-4, GPT-3.5), Anthropic Claude, Apple Foundation Models, Llama 3.2, Mistral
-- RAG Systems: LangChain, LangGraph, Vector Databases (Weaviate, Chroma)
-- Multi-Agent Systems: LangGraph-based orchestration, supervisor patterns
-- Fine-Tuning: Experience with model customization and training
-- Frameworks: Transformers, PyTorch, Hugging Face
-
-### Cloud & Infrastructure
-- AWS: EKS, EC2, S3, Lambda, CloudFormation, SQS/SNS, DynamoDB, Route53, CloudWatch
-- Kubernetes: Production-grade cluster management, Helm, ArgoCD, GitOps
-- IaC: Terraform, CloudFormation
-- Containers: Docker, Docker Compose
-
-### DevOps & Automation
-- CI/CD: GitHub Actions, GitLab CI, Jenkins
-- Monitoring: Prometheus, Grafana, Datadog, CloudWatch
-- Scripting: Python, Bash
-- Tools: Git, ArgoCD, Helm Charts
-
-### Software Development
-- Languages: Python (expert), JavaScript, TypeScript, SQL
-- Frameworks: FastAPI, Flask, React, Next.js, Streamlit, Gradio
-- APIs: REST APIs, Microservices architecture
-- Databases: PostgreSQL, MongoDB, Redis, Vector DBs
-
-## Recent Certifications (2024-2025)
-- Google Cloud: AI Infrastructure - Introduction to AI Hypercomputer!
-- LangChain: Project: Deep Research with LangGraph
-- DeepLearning.AI: Claude Code - Highly Agentic Coding Assistant
-- Udacity: Foundations of Generative AI
-- NVIDIA: Augment your LLM Using RAG
-- DeepLearning.AI: ChatGPT Prompt Engineering, Finetuning LLMs, Multimodal Search and RAG
-- IBM Cloud For The Enterprise
-
-## Notable Projects
-
-### AI Learning Hub LLC (2024-Present)
-- Founded bilingual (English/Portuguese) AI education company
-- Published "AI-Powered Content Creation & Automation" course on Udemy (5★ rating)
-- Producing daily Portuguese-language AI content on LinkedIn
-- Audience across 4 continents
-
-### Enterprise RAG System (Arcaea)
-- Architected LLM-powered platform with RAG using LangChain and Weaviate
-- Improved content production efficiency by 20%
-- Integrated with biotech R&D workflows
-
-### Girls Can Code Club (Mozambique, 2020-2023)
-- Founded remote coding education initiative during COVID-19
-- Taught web development to 50+ young women
-- Partnered with US Embassy Maputo
-
-### Health Interoperability Platform
-- FHIR-compliant web app for medical record sharing
-- Used Smart-on-FHIR API and Firebase
-- Enables patient-controlled data sharing
-"""
 
 
 class TechnicalAgent:
@@ -74,45 +19,72 @@ class TechnicalAgent:
 
     def __init__(self):
         try:
-            self.llm = get_llm(temperature=0.3, max_tokens=300)
+            self.llms = get_tiered_llms(temperature=0.3, max_tokens=300)
+            self.llm = self.llms[TIER_LARGE]
             if self.llm:
                 logger.info("technical_agent_initialized")
             else:
                 logger.warning("technical_agent_no_llm")
         except Exception as e:
             logger.error("technical_agent_init_failed", error=str(e))
+            self.llms = {}
             self.llm = None
 
-    async def process(self, query: str, language: str = "en") -> str:
+    def build_messages(
+        self,
+        query: str,
+        language: str = "en",
+        history: Optional[List] = None,
+    ) -> List:
+        """Prompt messages for a technical query (system prompt, history, question)"""
+        # Read per request so knowledge base reloads apply immediately
+        knowledge = get_knowledge_base().prompt_text("technical")
+
+        system_prompt = f"""You are Edson's Minion, representing Edson Zandamela's technical expertise.
+        Answer questions about his skills, technologies, tools, and projects.
+
+        Technical Information:
+        {knowledge}
+
+        Guidelines:
+        - Be detailed about technical skills and experience
+        - Mention specific technologies and versions when relevant
+        - Highlight recent certifications and learning
+        - Connect skills to real projects and achievements
+        - Language: {"Portuguese" if language == "pt" else "English"}
+
+        Keep responses concise (2-3 paragraphs max).
+        """
+
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", system_prompt),
+            ("user", "{query}"),
+        ])
+
+        messages = prompt.format_messages(query=query)
+        if history:
+            # Prior turns go between the system prompt and the new question
+            messages[1:1] = history
+
+        return messages
+
+    async def process(
+        self,
+        query: str,
+        language: str = "en",
+        tier: str = TIER_LARGE,
+        history: Optional[List] = None,
+    ) -> str:
         """Process technical query"""
 
         if not self.llm:
             return self._fallback_response(language)
 
         try:
-            system_prompt = f"""You are Edson's Minion, representing Edson Zandamela's technical expertise.
-            Answer questions about his skills, technologies, tools, and projects.
-
-            Technical Information:
-            {TECHNICAL_DATA}
-
-            Guidelines:
-            - Be detailed about technical skills and experience
-            - Mention specific technologies and versions when relevant
-            - Highlight recent certifications and learning
-            - Connect skills to real projects and achievements
-            - Language: {"Portuguese" if language == "pt" else "English"}
-
-            Keep responses concise (2-3 paragraphs max).
-            """
-
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", system_prompt),
-                ("user", "{query}"),
-            ])
+            messages = self.build_messages(query, language, history)
 
-            chain = prompt | self.llm
-            response = await chain.ainvoke({"query": query})
+            llm = self.llms.get(tier) or self.llm
+            response = await invoke_llm(llm, messages, stage="technical_agent", language=language)
 
             return response.content
 
@@ -0,0 +1,39 @@
+"""Admin endpoints (require X-Admin-Token)"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from guardrails.admin_auth import require_admin
+from utils import profiler
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(10.0, gt=0, le=profiler.PROFILER_MAX_SECONDS),
+    interval_ms: float = Query(profiler.PROFILER_INTERVAL_MS, ge=1, le=100),
+):
+    """
+    Sample the event-loop thread and return collapsed stacks
+
+    Stacks are prefixed with the asyncio task and chat pipeline stage, e.g.
+    "task:RequestResponseCycle.run_asgi;stage:agent;...". Feed the output to
+    flamegraph.pl or speedscope. Only one profile runs at a time.
+    """
+    if not profiler.PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler disabled")
+
+    try:
+        result = await profiler.profile(seconds, interval_ms)
+    except profiler.ProfilerBusyError:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+
+    return PlainTextResponse(
+        result.collapsed(),
+        headers={
+            "X-Profile-Samples": str(result.samples),
+            "X-Profile-Duration": f"{result.duration:.3f}",
+            "X-Profile-Interval-Ms": str(interval_ms),
+        },
+    )
@@ -1,27 +1,97 @@
 """Chat API endpoints"""
 
 from fastapi import APIRouter, HTTPException, Request, Depends
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response, StreamingResponse
+import hashlib
+import orjson
 import structlog
 import uuid
 from datetime import datetime
-
-from models.chat import ChatRequest, ChatResponse, TokenUsage
-from guardrails.rate_limiter import RateLimiter, get_client_ip
-from guardrails.content_filter import ContentFilter
-from agents.supervisor import SupervisorAgent
+from typing import TYPE_CHECKING, Dict, Optional
+
+from api.responses import ModelResponse
+from models.chat import BatchChatRequest, BatchChatResult, ChatRequest, ChatResponse, TokenUsage
+from guardrails.load_shedder import LOAD_SHED_RETRY_AFTER_SECONDS, LoadShedError, request_priority
+from guardrails.client_identity import get_client_ip
+from guardrails.rate_limiter import RateLimiter
+from guardrails.admin_auth import require_admin
+from agents.query_log import QUERY_LOG_ENABLED, get_query_log
+from utils.analytics import record_chat_event
+from utils.stage_timer import StageTimer
+from utils.token_counter import start_ledger
+
+if TYPE_CHECKING:
+    from agents.supervisor import SupervisorAgent
+    from guardrails.content_filter import ContentFilter
 
 logger = structlog.get_logger()
 
 router = APIRouter()
 
-# Initialize components
+# Initialize components - the LLM-backed ones pull in LangChain and the
+# provider SDKs, so they are built by init_agents() after the server is up
 rate_limiter = RateLimiter()
-content_filter = ContentFilter()
-supervisor_agent = SupervisorAgent()
+content_filter: Optional["ContentFilter"] = None
+supervisor_agent: Optional["SupervisorAgent"] = None
+
+
+def init_agents():
+    """Import and build the content filter and agents (blocking - run in a thread)"""
+    global content_filter, supervisor_agent
+    from agents.supervisor import SupervisorAgent
+    from guardrails.content_filter import ContentFilter
+
+    content_filter = ContentFilter()
+    # Assigned last - a non-None supervisor means everything is ready
+    supervisor_agent = SupervisorAgent()
+
+
+def agents_ready() -> bool:
+    return supervisor_agent is not None
+
+
+async def require_agents():
+    """Reject chat requests until init_agents() has finished"""
+    if not agents_ready():
+        raise HTTPException(
+            status_code=503,
+            detail="Chat is starting up, please retry shortly",
+            headers={"Retry-After": "5"},
+        )
+
 
+def token_usage(client_ip: str, usage: Dict) -> TokenUsage:
+    """TokenUsage from a RateLimiter.get_usage dict"""
+    return TokenUsage(
+        ip_address=client_ip,
+        tokens_used_today=usage["tokens_used"],
+        tokens_remaining=usage["tokens_remaining"],
+        requests_today=usage["requests_today"],
+        last_request=usage["last_request"],
+        is_rate_limited=usage["is_rate_limited"],
+    )
 
-@router.post("/chat", response_model=ChatResponse)
+
+def usage_etag(client_ip: str, usage: Dict) -> str:
+    """Weak ETag over everything the usage response is built from"""
+    state = (
+        f"{client_ip}|{usage['tokens_used']}|{usage['tokens_remaining']}|{usage['requests_today']}"
+        f"|{usage['last_request']}|{usage['is_rate_limited']}"
+    )
+    return f'W/"{hashlib.blake2b(state.encode(), digest_size=8).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check with weak comparison (RFC 9110 13.1.2)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+@router.post("/chat", response_model=ChatResponse, dependencies=[Depends(require_agents)])
 async def chat(
     request: ChatRequest,
     http_request: Request,
@@ -30,16 +100,23 @@ async def chat(
     Chat with Edson's Minion - Multi-agent RAG chatbot
 
     Guardrails:
-    - Rate limiting: 3 requests/minute, 50 tokens/day per IP
+    - Rate limiting: 3 requests/minute, 20000 tokens/day per IP
     - Content filtering: Only answers questions about Edson
     - Input validation: Max 1000 characters
     - Topic classification: Ensures on-topic questions
+
+    Per-stage durations are returned in the Server-Timing header.
     """
     client_ip = get_client_ip(http_request)
 
+    # Accumulates real token usage across every LLM call in this request
+    ledger = start_ledger()
+    timer = StageTimer()
+
     try:
         # 1. Rate Limiting Check
-        is_allowed, tokens_remaining, reason = await rate_limiter.check_rate_limit(client_ip)
+        with timer.stage("rate_limit"):
+            is_allowed, tokens_remaining, reason = await rate_limiter.check_rate_limit(client_ip)
 
         if not is_allowed:
             logger.warning(
@@ -53,7 +130,8 @@ async def chat(
             )
 
         # 2. Content Filtering - Input Validation
-        is_valid, validation_reason = await content_filter.validate_input(request.message)
+        with timer.stage("input_validation"):
+            is_valid, validation_reason = await content_filter.validate_input(request.message)
 
         if not is_valid:
             logger.warning(
@@ -66,8 +144,13 @@ async def chat(
                 detail=f"Invalid input: {validation_reason}",
             )
 
-        # 3. Topic Classification
-        is_on_topic = await content_filter.is_on_topic(request.message)
+        # 3. Topic Classification - a FAQ match is on-topic, no classifier call needed;
+        # follow-ups are classified with the conversation's previous question
+        with timer.stage("topic_classification"):
+            faq_match = supervisor_agent.faq.match(request.message, request.language)
+            is_on_topic = faq_match is not None or await content_filter.is_on_topic(
+                request.message, await supervisor_agent.previous_question(request.conversation_id)
+            )
 
         if not is_on_topic:
             # Politely decline off-topic questions
@@ -83,16 +166,35 @@ async def chat(
                     "pergunte-me algo sobre o Edson!"
                 )
 
-            return ChatResponse(
-                message=response_message,
-                conversation_id=request.conversation_id or str(uuid.uuid4()),
-                tokens_used=0,
-                tokens_remaining=tokens_remaining,
+            # The topic classifier may have been called - charge its real cost
+            if ledger.total_tokens:
+                with timer.stage("usage_recording"):
+                    await rate_limiter.record_usage(client_ip, ledger.total_tokens)
+
+            conversation_id = request.conversation_id or str(uuid.uuid4())
+            record_chat_event(
+                "http", "off_topic", request.message, request.language, timer,
+                conversation_id=conversation_id,
                 agent_used="content_filter",
-                confidence=1.0,
+                tokens_used=ledger.total_tokens,
                 is_on_topic=False,
             )
 
+            return ModelResponse(
+                ChatResponse(
+                    message=response_message,
+                    conversation_id=conversation_id,
+                    tokens_used=ledger.total_tokens,
+                    tokens_remaining=tokens_remaining - ledger.total_tokens,
+                    agent_used="content_filter",
+                    confidence=1.0,
+                    is_on_topic=False,
+                    # Served from the limiter's cache - saves the client a /chat/usage call
+                    usage=token_usage(client_ip, await rate_limiter.get_usage(client_ip)),
+                ),
+                headers={"Server-Timing": timer.server_timing()},
+            )
+
         # 4. Process with Multi-Agent System
         logger.info(
             "processing_chat_request",
@@ -101,28 +203,62 @@ async def chat(
             message_length=len(request.message),
         )
 
-        agent_response = await supervisor_agent.process_query(
-            query=request.message,
-            conversation_id=request.conversation_id,
-            language=request.language,
-        )
+        with timer.stage("agent"):
+            agent_response = await supervisor_agent.process_query(
+                query=request.message,
+                conversation_id=request.conversation_id,
+                language=request.language,
+                # Under load, first messages and clients with budget left go first
+                priority=request_priority(not request.conversation_id, tokens_remaining),
+                # Already looked up above
+                use_faq=False,
+                faq_match=faq_match,
+            )
 
         # 5. Update Rate Limiter
-        await rate_limiter.record_usage(client_ip, agent_response.tokens_used)
+        with timer.stage("usage_recording"):
+            await rate_limiter.record_usage(client_ip, agent_response.tokens_used)
 
         # 6. Content Filtering - Output Validation
-        is_safe, safety_reason = await content_filter.validate_output(agent_response.message)
+        with timer.stage("output_validation"):
+            is_safe, safety_reason = await content_filter.validate_output(agent_response.message)
 
         if not is_safe:
             logger.error(
                 "unsafe_output_detected",
                 reason=safety_reason,
             )
+            record_chat_event(
+                "http", "unsafe", request.message, request.language, timer,
+                conversation_id=agent_response.conversation_id,
+                agent_used=agent_response.agent_used,
+                tier=agent_response.tier,
+                tokens_used=agent_response.tokens_used,
+                cache_hit=agent_response.cached,
+            )
             raise HTTPException(
                 status_code=500,
                 detail="Unable to process request safely",
             )
 
+        # Only validated answers become history for later turns
+        with timer.stage("memory"):
+            await supervisor_agent.remember_exchange(request.message, agent_response)
+
+        # Popular questions are replayed to warm caches after a restart
+        if QUERY_LOG_ENABLED and agent_response.agent_used.endswith("_agent"):
+            get_query_log().record(request.message, request.language, agent_response.agent_used.removesuffix("_agent"))
+
+        record_chat_event(
+            "http", "answered", request.message, request.language, timer,
+            conversation_id=agent_response.conversation_id,
+            answer=agent_response.message,
+            agent_used=agent_response.agent_used,
+            tier=agent_response.tier,
+            tokens_used=agent_response.tokens_used,
+            cache_hit=agent_response.cached,
+        )
+
         # 7. Return Response
         logger.info(
             "chat_request_completed",
@@ -131,18 +267,36 @@ async def chat(
             agent_used=agent_response.agent_used,
         )
 
-        return ChatResponse(
-            message=agent_response.message,
-            conversation_id=agent_response.conversation_id,
-            tokens_used=agent_response.tokens_used,
-            tokens_remaining=tokens_remaining - agent_response.tokens_used,
-            agent_used=agent_response.agent_used,
-            confidence=agent_response.confidence,
-            is_on_topic=True,
+        return ModelResponse(
+            ChatResponse(
+                message=agent_response.message,
+                conversation_id=agent_response.conversation_id,
+                tokens_used=agent_response.tokens_used,
+                tokens_remaining=tokens_remaining - agent_response.tokens_used,
+                agent_used=agent_response.agent_used,
+                confidence=agent_response.confidence,
+                is_on_topic=True,
+                usage=token_usage(client_ip, await rate_limiter.get_usage(client_ip)),
+            ),
+            headers={"Server-Timing": timer.server_timing()},
         )
 
     except HTTPException:
         raise
+    except LoadShedError:
+        # Classifier calls already made are still charged
+        if ledger.total_tokens:
+            await rate_limiter.record_usage(client_ip, ledger.total_tokens)
+        record_chat_event(
+            "http", "shed", request.message, request.language, timer,
+            conversation_id=request.conversation_id,
+            tokens_used=ledger.total_tokens,
+        )
+        raise HTTPException(
+            status_code=503,
+            detail="Edson's Minion is busy right now, please retry shortly",
+            headers={"Retry-After": str(LOAD_SHED_RETRY_AFTER_SECONDS)},
+        )
     except Exception as e:
         logger.error(
             "chat_request_failed",
@@ -150,27 +304,84 @@ async def chat(
             error=str(e),
             exc_info=True,
         )
+        record_chat_event(
+            "http", "failed", request.message, request.language, timer,
+            conversation_id=request.conversation_id,
+            tokens_used=ledger.total_tokens,
+        )
         raise HTTPException(
             status_code=500,
             detail="An error occurred while processing your request",
         )
 
 
+@router.post("/chat/batch", dependencies=[Depends(require_admin), Depends(require_agents)])
+async def chat_batch(request: BatchChatRequest):
+    """
+    Answer many queries at once (admin only - requires X-Admin-Token)
+
+    For offline evaluation, FAQ pre-generation and cache warming. Skips the
+    per-IP rate limiter and topic classification; answers are still checked
+    by output validation (is_safe). Queries are grouped by route and run
+    with bounded concurrency; results stream back as NDJSON, one
+    BatchChatResult per line, in completion order. The response cache is
+    only read and filled with use_cache (cache warming).
+    """
+    queries = [(query.message, query.language) for query in request.queries]
+
+    async def results():
+        answered = 0
+        start_time = datetime.now()
+
+        async for index, route, agent_response, seconds in supervisor_agent.process_batch(
+            queries,
+            concurrency=request.concurrency,
+            use_faq=request.use_faq,
+            use_cache=request.use_cache,
+        ):
+            is_safe, _ = await content_filter.validate_output(agent_response.message)
+            answered += 1
+            yield orjson.dumps(BatchChatResult(
+                index=index,
+                id=request.queries[index].id,
+                route=route,
+                message=agent_response.message,
+                agent_used=agent_response.agent_used,
+                tier=agent_response.tier,
+                tokens_used=agent_response.tokens_used,
+                confidence=agent_response.confidence,
+                is_safe=is_safe,
+                latency_ms=round(seconds * 1000, 2),
+            ).model_dump(), option=orjson.OPT_APPEND_NEWLINE)
+
+        logger.info(
+            "chat_batch_completed",
+            queries=len(queries),
+            answered=answered,
+            duration=(datetime.now() - start_time).total_seconds(),
+        )
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
 @router.get("/chat/usage", response_model=TokenUsage)
 async def get_usage(http_request: Request):
-    """Get current token usage for the requesting IP"""
+    """
+    Get current token usage for the requesting IP
+
+    Usage comes from the rate limiter's short per-client cache. Responses
+    carry a weak ETag derived from the counters; a request whose
+    If-None-Match matches gets 304 Not Modified with no body.
+    """
     client_ip = get_client_ip(http_request)
 
     usage = await rate_limiter.get_usage(client_ip)
+    headers = {"ETag": usage_etag(client_ip, usage), "Cache-Control": "private, no-cache"}
 
-    return TokenUsage(
-        ip_address=client_ip,
-        tokens_used_today=usage["tokens_used"],
-        tokens_remaining=usage["tokens_remaining"],
-        requests_today=usage["requests_today"],
-        last_request=usage.get("last_request") or datetime.now(),
-        is_rate_limited=usage["is_rate_limited"],
-    )
+    if etag_matches(http_request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    return ModelResponse(token_usage(client_ip, usage), headers=headers)
 
 
 @router.post("/chat/reset-usage")
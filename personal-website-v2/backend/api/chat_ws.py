@@ -0,0 +1,477 @@
+"""WebSocket chat endpoint - one persistent session per connection"""
+
+import asyncio
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional
+
+import orjson
+import structlog
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from prometheus_client import Counter, Gauge
+from pydantic import ValidationError
+from starlette.websockets import WebSocketState
+
+from agents.query_log import QUERY_LOG_ENABLED, get_query_log
+from api import chat
+from api.chat import rate_limiter
+from api.cors import origin_allowed
+from guardrails.client_identity import get_client_ip
+from guardrails.load_shedder import LOAD_SHED_RETRY_AFTER_SECONDS, LoadShedError, request_priority
+from guardrails.rate_limiter import MAX_MESSAGES_PER_DAY, MAX_REQUESTS_PER_MINUTE, MAX_TOKENS_PER_DAY
+from models.chat import ChatRequest, ChatResponse, TokenUsage
+from utils.analytics import record_chat_event
+from utils.stage_timer import StageTimer
+from utils.token_counter import start_ledger
+
+if TYPE_CHECKING:
+    from agents.supervisor import AgentResponse
+
+logger = structlog.get_logger()
+
+router = APIRouter()
+
+# Configuration
+WS_IDLE_TIMEOUT_SECONDS = float(os.getenv("WS_IDLE_TIMEOUT_SECONDS", "120"))
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "64"))
+WS_SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "10"))
+
+# Close codes (RFC 6455 / IANA registry)
+CLOSE_NORMAL = 1000
+CLOSE_POLICY_VIOLATION = 1008
+CLOSE_TRY_AGAIN_LATER = 1013
+
+# Metrics
+WS_CONNECTIONS = Gauge('chat_ws_connections', 'Open chat WebSocket connections')
+WS_MESSAGES = Counter('chat_ws_messages_total', 'Chat WebSocket messages handled', ['result'])
+WS_CLOSED = Counter('chat_ws_closed_total', 'Chat WebSocket connections closed', ['reason'])
+
+OFF_TOPIC_MESSAGES = {
+    "en": (
+        "I'm Edson's Minion, and I can only answer questions about Edson Zandamela's "
+        "professional experience, skills, and projects. Please ask me something about Edson!"
+    ),
+    "pt": (
+        "Sou o Minion do Edson e só posso responder perguntas sobre a experiência "
+        "profissional, habilidades e projetos do Edson Zandamela. Por favor, "
+        "pergunte-me algo sobre o Edson!"
+    ),
+}
+
+
+class SlowConsumerError(Exception):
+    """The client is not reading frames fast enough"""
+
+
+class ChatSession:
+    """
+    State for one WebSocket connection
+
+    The client's IP is resolved once and its usage is loaded once at connect,
+    then kept current locally: limits that are already exhausted are refused
+    without a Redis round trip, and usage is pushed after every answer
+    instead of being polled. Outgoing frames go through a bounded queue
+    drained by a dedicated sender task - when the client reads slower than
+    tokens are produced, generation waits (backpressure), and a client that
+    stops reading is disconnected.
+    """
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.client_ip = get_client_ip(websocket)
+        self.conversation_id: Optional[str] = None
+        self.usage: dict = {}
+        self._minute = ""
+        self._queue: "asyncio.Queue[Optional[dict]]" = asyncio.Queue(maxsize=WS_SEND_QUEUE_SIZE)
+        self._sender: Optional[asyncio.Task] = None
+
+    # ---- Outgoing frames ----
+
+    async def _send_loop(self):
+        while True:
+            frame = await self._queue.get()
+            if frame is None:
+                return
+            await self.websocket.send_json(frame)
+
+    async def send(self, frame: dict):
+        """Queue a frame; waits while the queue is full"""
+        if self._sender is not None and self._sender.done():
+            raise WebSocketDisconnect(CLOSE_NORMAL)
+        try:
+            await asyncio.wait_for(self._queue.put(frame), WS_SEND_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            raise SlowConsumerError()
+
+    # ---- Rate-limit state ----
+
+    def _roll_minute(self):
+        minute = datetime.now().strftime('%Y-%m-%d-%H-%M')
+        if minute != self._minute:
+            self._minute = minute
+            self.usage["requests_this_minute"] = 0
+
+    def _locally_limited(self) -> Optional[str]:
+        """Reason the cached state already rules the message out, if any"""
+        self._roll_minute()
+        if self.usage["tokens_used"] >= MAX_TOKENS_PER_DAY:
+            return "Daily token limit exceeded"
+        if self.usage["requests_this_minute"] >= MAX_REQUESTS_PER_MINUTE:
+            return "Too many requests per minute"
+        if self.usage["requests_today"] >= MAX_MESSAGES_PER_DAY:
+            return "Daily message limit exceeded"
+        return None
+
+    def _token_usage(self) -> dict:
+        tokens_used = self.usage["tokens_used"]
+        return TokenUsage(
+            ip_address=self.client_ip,
+            tokens_used_today=tokens_used,
+            tokens_remaining=MAX_TOKENS_PER_DAY - tokens_used,
+            requests_today=self.usage["requests_today"],
+            last_request=datetime.now(),
+            is_rate_limited=self._locally_limited() is not None,
+        ).model_dump(mode="json")
+
+    async def push_usage(self):
+        await self.send({"type": "usage", **self._token_usage()})
+
+    # ---- Message handling ----
+
+    async def handle_chat(self, payload: dict):
+        try:
+            request = ChatRequest(
+                message=payload.get("message", ""),
+                conversation_id=payload.get("conversation_id") or self.conversation_id,
+                language=payload.get("language", "en"),
+            )
+        except ValidationError as e:
+            WS_MESSAGES.labels(result="invalid").inc()
+            await self.send({"type": "error", "code": 422, "detail": e.errors(include_url=False, include_context=False)})
+            return
+
+        # The agents are built in the background after startup
+        if not chat.agents_ready():
+            WS_MESSAGES.labels(result="starting").inc()
+            await self.send({"type": "error", "code": 503, "detail": "Chat is starting up, please retry shortly"})
+            return
+        content_filter = chat.content_filter
+
+        ledger = start_ledger()
+        timer = StageTimer()
+
+        # 1. Rate limiting - cached state first, Redis for the shared counters
+        with timer.stage("rate_limit"):
+            reason = self._locally_limited()
+            if reason is None:
+                is_allowed, tokens_remaining, reason = await rate_limiter.check_rate_limit(self.client_ip)
+                self.usage["tokens_used"] = MAX_TOKENS_PER_DAY - tokens_remaining
+                if is_allowed:
+                    self.usage["requests_this_minute"] += 1
+                    self.usage["requests_today"] += 1
+
+        if reason != "OK":
+            WS_MESSAGES.labels(result="rate_limited").inc()
+            logger.warning("rate_limit_exceeded", ip=self.client_ip, reason=reason, transport="websocket")
+            await self.send({"type": "error", "code": 429, "detail": f"Rate limit exceeded: {reason}"})
+            await self.push_usage()
+            return
+
+        # 2. Input validation
+        with timer.stage("input_validation"):
+            is_valid, validation_reason = await content_filter.validate_input(request.message)
+
+        if not is_valid:
+            WS_MESSAGES.labels(result="blocked").inc()
+            logger.warning("content_filter_blocked", ip=self.client_ip, reason=validation_reason, transport="websocket")
+            await self.send({"type": "error", "code": 400, "detail": f"Invalid input: {validation_reason}"})
+            return
+
+        # 3. Topic classification - a FAQ match is on-topic, no classifier call needed;
+        # follow-ups are classified with the conversation's previous question
+        with timer.stage("topic_classification"):
+            faq_match = chat.supervisor_agent.faq.match(request.message, request.language)
+            is_on_topic = faq_match is not None or await content_filter.is_on_topic(
+                request.message, await chat.supervisor_agent.previous_question(request.conversation_id)
+            )
+
+        if not is_on_topic:
+            conversation_id = request.conversation_id or str(uuid.uuid4())
+            await self._finish(
+                ChatResponse(
+                    message=OFF_TOPIC_MESSAGES.get(request.language, OFF_TOPIC_MESSAGES["en"]),
+                    conversation_id=conversation_id,
+                    tokens_used=ledger.total_tokens,
+                    tokens_remaining=MAX_TOKENS_PER_DAY - self.usage["tokens_used"] - ledger.total_tokens,
+                    agent_used="content_filter",
+                    confidence=1.0,
+                    is_on_topic=False,
+                ),
+                timer,
+                result="off_topic",
+            )
+            record_chat_event(
+                "websocket", "off_topic", request.message, request.language, timer,
+                conversation_id=conversation_id,
+                agent_used="content_filter",
+                tokens_used=ledger.total_tokens,
+                is_on_topic=False,
+            )
+            return
+
+        # 4. Stream the answer - the validator only releases text no violation
+        # can reach, so unsafe output never leaves the server
+        await self.send({"type": "start", "conversation_id": request.conversation_id})
+        agent_response: Optional["AgentResponse"] = None
+        validator = content_filter.stream_validator()
+        stream = chat.supervisor_agent.stream_query(
+            query=request.message,
+            conversation_id=request.conversation_id,
+            language=request.language,
+            priority=request_priority(
+                not request.conversation_id, MAX_TOKENS_PER_DAY - self.usage["tokens_used"]
+            ),
+            use_faq=False,
+            faq_match=faq_match,
+        )
+        try:
+            with timer.stage("agent"):
+                try:
+                    async for item in stream:
+                        if not isinstance(item, str):
+                            agent_response = item
+                            continue
+                        safe_text = validator.feed(item)
+                        if validator.violation is not None:
+                            break
+                        if safe_text:
+                            await self.send({"type": "token", "text": safe_text})
+                finally:
+                    # Stops generation and frees the agent slot on an early exit
+                    await stream.aclose()
+        except (WebSocketDisconnect, SlowConsumerError):
+            raise
+        except LoadShedError:
+            # Shed before the first token - nothing to retract
+            await self._record(ledger.total_tokens, timer)
+            WS_MESSAGES.labels(result="shed").inc()
+            record_chat_event(
+                "websocket", "shed", request.message, request.language, timer,
+                conversation_id=request.conversation_id,
+                tokens_used=ledger.total_tokens,
+            )
+            await self.send({
+                "type": "error",
+                "code": 503,
+                "detail": "Edson's Minion is busy right now, please retry shortly",
+                "retry_after": LOAD_SHED_RETRY_AFTER_SECONDS,
+            })
+            await self.push_usage()
+            return
+        except Exception as e:
+            # The provider failed after part of the answer was streamed
+            logger.error("chat_ws_stream_failed", ip=self.client_ip, error=str(e))
+            await self._record(ledger.total_tokens, timer)
+            WS_MESSAGES.labels(result="failed").inc()
+            record_chat_event(
+                "websocket", "failed", request.message, request.language, timer,
+                conversation_id=request.conversation_id,
+                tokens_used=ledger.total_tokens,
+            )
+            await self.send({"type": "error", "code": 500, "detail": "An error occurred while processing your request", "retract": True})
+            await self.push_usage()
+            return
+
+        # 5. Output validation of the tail the validator held back
+        with timer.stage("output_validation"):
+            held_text = validator.finish()
+        safety_reason = validator.violation
+
+        if safety_reason:
+            logger.error("unsafe_output_detected", reason=safety_reason, transport="websocket", streamed_chars=validator.chars)
+            # Aborted streams are charged for what was generated
+            await self._record(ledger.total_tokens, timer)
+            WS_MESSAGES.labels(result="unsafe").inc()
+            record_chat_event(
+                "websocket", "unsafe", request.message, request.language, timer,
+                conversation_id=agent_response.conversation_id if agent_response else request.conversation_id,
+                agent_used=agent_response.agent_used if agent_response else None,
+                tier=agent_response.tier if agent_response else None,
+                tokens_used=ledger.total_tokens,
+                cache_hit=agent_response.cached if agent_response else False,
+            )
+            # Only text before the violation was sent - tell the client to drop the partial answer
+            await self.send({"type": "error", "code": 500, "detail": "Unable to process request safely", "retract": True})
+            await self.push_usage()
+            return
+
+        if held_text:
+            await self.send({"type": "token", "text": held_text})
+
+        # Only validated answers become history for later turns
+        with timer.stage("memory"):
+            await chat.supervisor_agent.remember_exchange(request.message, agent_response)
+
+        if QUERY_LOG_ENABLED and agent_response.agent_used.endswith("_agent"):
+            get_query_log().record(request.message, request.language, agent_response.agent_used.removesuffix("_agent"))
+
+        await self._finish(
+            ChatResponse(
+                message=agent_response.message,
+                conversation_id=agent_response.conversation_id,
+                tokens_used=agent_response.tokens_used,
+                tokens_remaining=MAX_TOKENS_PER_DAY - self.usage["tokens_used"] - agent_response.tokens_used,
+                agent_used=agent_response.agent_used,
+                confidence=agent_response.confidence,
+                is_on_topic=True,
+            ),
+            timer,
+            result="answered",
+        )
+        record_chat_event(
+            "websocket", "answered", request.message, request.language, timer,
+            conversation_id=agent_response.conversation_id,
+            answer=agent_response.message,
+            agent_used=agent_response.agent_used,
+            tier=agent_response.tier,
+            tokens_used=agent_response.tokens_used,
+            cache_hit=agent_response.cached,
+        )
+
+    async def _record(self, tokens_used: int, timer: StageTimer):
+        if tokens_used:
+            with timer.stage("usage_recording"):
+                await rate_limiter.record_usage(self.client_ip, tokens_used)
+            self.usage["tokens_used"] += tokens_used
+
+    async def _finish(self, response: ChatResponse, timer: StageTimer, result: str):
+        """Record usage, send the final answer frame and push updated usage"""
+        await self._record(response.tokens_used, timer)
+        self.conversation_id = response.conversation_id
+        WS_MESSAGES.labels(result=result).inc()
+
+        await self.send({
+            "type": "end",
+            **response.model_dump(mode="json"),
+            "timing": {name: round(duration * 1000, 2) for name, duration in timer.durations.items()},
+        })
+        await self.push_usage()
+
+        logger.info(
+            "chat_request_completed",
+            ip=self.client_ip,
+            tokens_used=response.tokens_used,
+            agent_used=response.agent_used,
+            transport="websocket",
+        )
+
+    # ---- Connection lifecycle ----
+
+    async def run(self):
+        self.usage = await rate_limiter.get_usage(self.client_ip)
+        self._roll_minute()
+        self._sender = asyncio.create_task(self._send_loop())
+        await self.send({"type": "session", "usage": self._token_usage()})
+
+        while True:
+            receive = asyncio.ensure_future(self.websocket.receive_text())
+            done, _ = await asyncio.wait({receive, self._sender}, timeout=WS_IDLE_TIMEOUT_SECONDS, return_when=asyncio.FIRST_COMPLETED)
+
+            if receive not in done:
+                receive.cancel()
+                if self._sender in done:
+                    # Sending failed - the client is gone
+                    raise WebSocketDisconnect(CLOSE_NORMAL)
+                WS_CLOSED.labels(reason="idle").inc()
+                await self.close(CLOSE_NORMAL, "Idle timeout")
+                return
+
+            try:
+                payload = orjson.loads(receive.result())
+            except orjson.JSONDecodeError:
+                payload = None
+            if not isinstance(payload, dict):
+                await self.send({"type": "error", "code": 400, "detail": "Expected a JSON object"})
+                continue
+
+            kind = payload.get("type", "chat")
+            if kind == "ping":
+                await self.send({"type": "pong", "ts": time.time()})
+            elif kind == "usage":
+                await self.push_usage()
+            elif kind == "chat":
+                await self.handle_chat(payload)
+            else:
+                await self.send({"type": "error", "code": 400, "detail": f"Unknown message type: {kind}"})
+
+    async def close(self, code: int, reason: str = ""):
+        """Flush queued frames, then close the socket"""
+        if self._sender is not None and not self._sender.done():
+            try:
+                await asyncio.wait_for(self._queue.put(None), WS_SEND_TIMEOUT_SECONDS)
+                await asyncio.wait_for(self._sender, WS_SEND_TIMEOUT_SECONDS)
+            except (asyncio.TimeoutError, Exception):
+                self._sender.cancel()
+        if self.websocket.client_state == WebSocketState.CONNECTED:
+            await self.websocket.close(code=code, reason=reason)
+
+    def abort(self):
+        """Stop the sender without flushing (the socket is gone or unusable)"""
+        if self._sender is None:
+            return
+        if self._sender.done():
+            if not self._sender.cancelled():
+                self._sender.exception()  # retrieved - it is the disconnect itself
+        else:
+            self._sender.cancel()
+
+
+@router.websocket("/chat/ws")
+async def chat_websocket(websocket: WebSocket):
+    """
+    Chat over a persistent WebSocket
+
+    Client frames (JSON):
+    - {"type": "chat", "message": "...", "language": "en", "conversation_id": null}
+    - {"type": "usage"} / {"type": "ping"}
+
+    Server frames: "session" (initial usage), then per message "start",
+    "token"*, "end" (the ChatResponse fields plus stage timings) and
+    "usage"; "error" frames carry an HTTP-style code. The same guardrails
+    as POST /api/chat apply. Idle connections are closed after
+    WS_IDLE_TIMEOUT_SECONDS. Handshakes from origins outside CORS_ORIGINS
+    are rejected (HTTP 403).
+    """
+    origin = websocket.headers.get("origin")
+    if not origin_allowed(origin):
+        WS_CLOSED.labels(reason="origin").inc()
+        logger.warning("chat_ws_origin_rejected", origin=origin, ip=get_client_ip(websocket))
+        # Closing before accept() refuses the handshake
+        await websocket.close(code=CLOSE_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    session = ChatSession(websocket)
+    WS_CONNECTIONS.inc()
+    logger.info("chat_ws_connected", ip=session.client_ip)
+
+    try:
+        await session.run()
+    except WebSocketDisconnect:
+        WS_CLOSED.labels(reason="client").inc()
+        session.abort()
+    except SlowConsumerError:
+        WS_CLOSED.labels(reason="slow_consumer").inc()
+        logger.warning("chat_ws_slow_consumer", ip=session.client_ip)
+        session.abort()
+        if websocket.client_state == WebSocketState.CONNECTED:
+            await websocket.close(code=CLOSE_TRY_AGAIN_LATER, reason="Client too slow")
+    except Exception as e:
+        WS_CLOSED.labels(reason="error").inc()
+        logger.error("chat_ws_failed", ip=session.client_ip, error=str(e), exc_info=True)
+        await session.close(CLOSE_TRY_AGAIN_LATER, "Internal error")
+    finally:
+        WS_CONNECTIONS.dec()
+        logger.info("chat_ws_closed", ip=session.client_ip)
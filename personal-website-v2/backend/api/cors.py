@@ -0,0 +1,26 @@
+"""Browser origins allowed to call the API - shared by CORS and the WebSocket handshake"""
+
+import os
+from typing import Optional
+
+# Configuration
+CORS_ORIGINS = [
+    origin.strip()
+    for origin in os.getenv(
+        "CORS_ORIGINS",
+        "http://localhost:3000,https://edsonzandamela.com,https://www.edsonzandamela.com",
+    ).split(",")
+    if origin.strip()
+]
+
+
+def origin_allowed(origin: Optional[str]) -> bool:
+    """
+    Whether a WebSocket handshake from this Origin may be accepted
+
+    Browsers always send Origin and WebSockets are not covered by CORS, so
+    without this check any site could open a socket with a visitor's
+    address (and so their rate-limit budget). Non-browser clients send no
+    Origin and are let through - they can forge the header anyway.
+    """
+    return origin is None or "*" in CORS_ORIGINS or origin in CORS_ORIGINS
@@ -1,30 +1,42 @@
 """Health check endpoints"""
 
 from fastapi import APIRouter, Response
-import psutil
+from fastapi.responses import ORJSONResponse
+import orjson
 import os
 
+from agents.knowledge_base import get_knowledge_base
+
 router = APIRouter()
 
+# Set by main once the agents are built; until then the pod takes no traffic
+_ready = False
+
+# Constant payload - encoded once instead of on every probe
+HEALTH_BODY = orjson.dumps({
+    "status": "healthy",
+    "service": "edson-portfolio-api",
+    "version": "2.0.0",
+})
+
 
 @router.get("/health")
 async def health_check():
     """Basic health check endpoint"""
-    return {
-        "status": "healthy",
-        "service": "edson-portfolio-api",
-        "version": "2.0.0",
-    }
+    return Response(content=HEALTH_BODY, media_type="application/json")
 
 
 @router.get("/health/detailed")
 async def detailed_health_check():
     """Detailed health check with system metrics"""
+    # Imported here - only this endpoint needs it, and it slows startup
+    import psutil
+
     cpu_percent = psutil.cpu_percent(interval=1)
     memory = psutil.virtual_memory()
     disk = psutil.disk_usage('/')
 
-    return {
+    return ORJSONResponse({
         "status": "healthy",
         "service": "edson-portfolio-api",
         "version": "2.0.0",
@@ -38,14 +50,23 @@ async def detailed_health_check():
         "process": {
             "pid": os.getpid(),
         },
-    }
+        "knowledge_base": {
+            "version": get_knowledge_base().version,
+        },
+    })
+
+
+def mark_ready():
+    """Report ready to the readiness probe"""
+    global _ready
+    _ready = True
 
 
 @router.get("/health/readiness")
 async def readiness_check():
-    """Kubernetes readiness probe"""
-    # Add checks for dependencies (DB, Redis, etc.)
-    # For now, return healthy
+    """Kubernetes readiness probe - 503 until the agents are built"""
+    if not _ready:
+        return Response(status_code=503, content="Starting")
     return Response(status_code=200, content="OK")
 
 
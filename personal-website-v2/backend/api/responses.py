@@ -0,0 +1,26 @@
+"""Response classes that skip FastAPI's generic JSON encoding path"""
+
+from typing import Any
+
+import orjson
+from pydantic import BaseModel
+from starlette.responses import Response
+
+
+class ModelResponse(Response):
+    """
+    JSON response rendered straight from a pydantic model
+
+    Uses pydantic-core's model_dump_json (orjson for anything else).
+    Returning a Response from an endpoint also skips FastAPI's
+    response_model revalidation and jsonable_encoder pass - the model was
+    already validated when it was built. Keep response_model on the route
+    for the OpenAPI schema.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode("utf-8")
+        return orjson.dumps(content)
@@ -0,0 +1,293 @@
+"""
+Microbenchmarks for the guardrail hot path
+
+Measures ops/sec and allocations for the pure-Python per-request checks:
+ContentFilter.validate_input / validate_output / is_on_topic (keyword scan
+only), the streaming output validator, get_client_ip trusted-proxy resolution and RateLimiter.check_rate_limit
+against an in-memory fake Redis. Inputs are a fixed corpus, so numbers are
+comparable between runs.
+
+Usage (from backend/):
+    python -m benchmarks.guardrails_bench
+    python -m benchmarks.guardrails_bench --output guardrails.json
+    python -m benchmarks.guardrails_bench --baseline guardrails.json --tolerance 0.15
+"""
+
+import argparse
+import asyncio
+import gc
+import inspect
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from benchmarks.load_test import DEFAULT_CORPUS, client_ip, load_corpus
+
+KNOWLEDGE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "knowledge")
+
+
+class FakePipeline:
+    """Queues FakeRedis commands until execute(), like redis.asyncio pipelines"""
+
+    def __init__(self, redis: "FakeRedis"):
+        self.redis = redis
+        self.commands: List[tuple] = []
+
+    def __getattr__(self, name):
+        def queue(*args):
+            self.commands.append((name, args))
+            return self
+
+        return queue
+
+    async def execute(self):
+        commands, self.commands = self.commands, []
+        return [await getattr(self.redis, name)(*args) for name, args in commands]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.commands = []
+
+
+class FakeRedis:
+    """In-memory stand-in for redis.asyncio.Redis (commands used by RateLimiter)"""
+
+    def __init__(self):
+        self.data: Dict[Any, Any] = {}
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+    async def hmget(self, key, *fields):
+        hash_ = self.data.get(key, {})
+        return [None if hash_.get(field) is None else str(hash_[field]) for field in fields]
+
+    async def hgetall(self, key):
+        return {field: str(value) for field, value in self.data.get(key, {}).items()}
+
+    async def hincrby(self, key, field, amount=1):
+        hash_ = self.data.setdefault(key, {})
+        hash_[field] = int(hash_.get(field, 0)) + amount
+        return hash_[field]
+
+    async def hset(self, key, field, value):
+        hash_ = self.data.setdefault(key, {})
+        created = field not in hash_
+        hash_[field] = value
+        return int(created)
+
+    async def expire(self, key, seconds):
+        return key in self.data
+
+    async def expireat(self, key, when):
+        return key in self.data
+
+    async def delete(self, *keys):
+        return sum(1 for key in keys if self.data.pop(key, None) is not None)
+
+    async def pfadd(self, key, *members):
+        # Exact set instead of a HyperLogLog - same interface, no Redis needed
+        before = len(self.data.setdefault(key, set()))
+        self.data[key].update(members)
+        return int(len(self.data[key]) > before)
+
+    async def pfcount(self, *keys):
+        return len(set().union(*(self.data.get(key, set()) for key in keys)))
+
+    async def info(self, section=None):
+        return {"used_memory": 0}
+
+
+def input_corpus() -> List[str]:
+    """User inputs: replay corpus plus long and symbol-heavy messages"""
+    messages = [q["message"] for q in load_corpus(DEFAULT_CORPUS)]
+    messages += [
+        "Tell me everything about Edson's infrastructure work " * 18,  # ~1000 chars
+        "What " + "really " * 150 + "matters?",
+        "?!" * 200,
+    ]
+    return messages
+
+
+def output_corpus() -> List[str]:
+    """Assistant outputs: knowledge base paragraphs plus PII-bearing answers"""
+    outputs = []
+    for name in sorted(os.listdir(KNOWLEDGE_DIR)):
+        with open(os.path.join(KNOWLEDGE_DIR, name), encoding="utf-8") as f:
+            outputs += [p.strip() for p in f.read().split("\n\n") if p.strip()]
+    outputs += [
+        "You can reach him at 555-123-4567 or edsonaguiar17@gmail.com.",
+        "His SSN is 123-45-6789, which should never be shown.",
+        "Card: 4111 1111 1111 1111 exp 12/29.",
+    ]
+    return outputs
+
+
+def fake_requests(count: int) -> List[Any]:
+    """Starlette requests with the header shapes seen behind the ingress"""
+    from starlette.requests import Request
+
+    requests = []
+    for i in range(count):
+        ip = client_ip(i)
+        if i % 3 == 0:
+            headers = [(b"x-forwarded-for", f"{ip}, 10.0.0.{i % 250}, 10.1.0.1".encode())]
+        elif i % 3 == 1:
+            headers = [(b"x-real-ip", ip.encode())]
+        else:
+            headers = []
+        headers += [(b"user-agent", b"Mozilla/5.0"), (b"accept", b"application/json")]
+        requests.append(Request({"type": "http", "headers": headers, "client": ("10.42.0.7", 50000 + i)}))
+    return requests
+
+
+def silence_logging():
+    """Keep structlog rendering (it is part of the cost) but discard the output"""
+    import structlog
+
+    structlog.configure(logger_factory=structlog.PrintLoggerFactory(open(os.devnull, "w")))
+
+
+def build_benchmarks() -> Dict[str, tuple]:
+    """name -> (callable, inputs)"""
+    from guardrails.content_filter import ContentFilter
+    from guardrails.client_identity import get_client_ip
+    from guardrails.rate_limiter import RateLimiter
+
+    content_filter = ContentFilter()
+    # Keyword scan only - the LLM fallback is network-bound, not CPU
+    content_filter.llm = None
+
+    rate_limiter = RateLimiter()
+    rate_limiter.redis_client = FakeRedis()
+
+    inputs = input_corpus()
+    ips = [client_ip(i) for i in range(5000)]
+
+    def stream_validate(chunks: List[str]):
+        validator = content_filter.stream_validator()
+        for chunk in chunks:
+            validator.feed(chunk)
+            if validator.violation is not None:
+                break
+        validator.finish()
+        return validator.violation
+
+    # Outputs as a model streams them, ~4 characters per token
+    streamed = [[text[i:i + 4] for i in range(0, len(text), 4)] for text in output_corpus()]
+
+    return {
+        "content_filter.validate_input": (content_filter.validate_input, inputs),
+        "content_filter.validate_output": (content_filter.validate_output, output_corpus()),
+        "content_filter.stream_validator": (stream_validate, streamed),
+        "content_filter.is_on_topic": (content_filter.is_on_topic, inputs),
+        "client_identity.get_client_ip": (get_client_ip, fake_requests(300)),
+        "rate_limiter.check_rate_limit": (rate_limiter.check_rate_limit, ips),
+    }
+
+
+async def _run_async(func: Callable, inputs: List[Any], iterations: int):
+    n = len(inputs)
+    for i in range(iterations):
+        await func(inputs[i % n])
+
+
+def _run_sync(func: Callable, inputs: List[Any], iterations: int):
+    n = len(inputs)
+    for i in range(iterations):
+        func(inputs[i % n])
+
+
+def measure(func: Callable, inputs: List[Any], iterations: int, repeats: int) -> Dict[str, float]:
+    """Best-of-N throughput plus allocation profile of one pass"""
+    is_async = inspect.iscoroutinefunction(func)
+
+    def run(count):
+        if is_async:
+            asyncio.run(_run_async(func, inputs, count))
+        else:
+            _run_sync(func, inputs, count)
+
+    run(min(iterations, 200))  # warm caches (regex compilation, etc.)
+
+    best = float("inf")
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        run(iterations)
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    run(iterations)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.collect()
+    retained_blocks = sys.getallocatedblocks() - blocks_before
+
+    return {
+        "iterations": iterations,
+        "ops_per_sec": round(iterations / best, 1),
+        "ns_per_op": round(best / iterations * 1e9, 1),
+        "peak_alloc_bytes": peak,
+        "retained_blocks_per_1k_ops": round(retained_blocks / iterations * 1000, 2),
+    }
+
+
+def compare_to_baseline(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """Benchmarks whose throughput dropped more than tolerance"""
+    regressions = []
+    for name, base in baseline.get("benchmarks", {}).items():
+        current = results.get(name)
+        if current and current["ops_per_sec"] < base["ops_per_sec"] * (1 - tolerance):
+            regressions.append(f"{name}: {current['ops_per_sec']} ops/s < baseline {base['ops_per_sec']} (-{tolerance:.0%})")
+    return regressions
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Guardrail and rate-limiter microbenchmarks")
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="Run only benchmarks containing these substrings")
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--baseline", help="Baseline report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    silence_logging()
+    results = {}
+    for name, (func, inputs) in build_benchmarks().items():
+        if args.only and not any(part in name for part in args.only):
+            continue
+        results[name] = measure(func, inputs, args.iterations, args.repeats)
+        r = results[name]
+        print(
+            f"{name:<34} {r['ops_per_sec']:>12,.0f} ops/s {r['ns_per_op']:>10,.0f} ns/op "
+            f"{r['peak_alloc_bytes']:>10,} B peak {r['retained_blocks_per_1k_ops']:>8} blk/1k",
+            file=sys.stderr,
+        )
+
+    report = {"python": sys.version.split()[0], "benchmarks": results}
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["regressions"] = compare_to_baseline(results, json.load(f), args.tolerance)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if report.get("regressions"):
+        print("\nREGRESSIONS:\n  " + "\n  ".join(report["regressions"]), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
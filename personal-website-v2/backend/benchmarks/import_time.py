@@ -0,0 +1,165 @@
+"""
+Cold-start import profile and budget check
+
+Runs `python -X importtime -c "import main"` in fresh interpreters and
+reports the slowest modules. Fails (exit code 1) when the median import
+time exceeds the budget or when a module that must stay lazy - LangChain,
+the provider SDKs, SQLAlchemy, the agents - is imported by `main`. Those are loaded by
+the lifespan's background startup task, after the server is accepting
+connections.
+
+Usage (from backend/):
+    LLM_PROVIDER=mock python -m benchmarks.import_time
+    LLM_PROVIDER=mock python -m benchmarks.import_time --budget-ms 1500 --agents --output imports.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy modules that `import main` must not pull in
+LAZY_MODULES = [
+    "agents.supervisor",
+    "guardrails.content_filter",
+    "langchain",
+    "langchain_core",
+    "langchain_community",
+    "langchain_openai",
+    "openai",
+    "tiktoken",
+    "psutil",
+    "sqlalchemy",
+]
+
+IMPORT_MAIN = "import main, sys; print(','.join(sorted(sys.modules)), file=sys.stdout)"
+BUILD_AGENTS = (
+    "import time, main; from api import chat; start = time.perf_counter(); "
+    "chat.init_agents(); print(time.perf_counter() - start)"
+)
+
+
+def run_python(args: List[str], code: str) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    return subprocess.run(
+        [sys.executable, *args, "-c", code],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """(module, depth, self_us, cumulative_us) for each `-X importtime` line"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped) - 1) // 2
+        modules.append((stripped, depth, int(self_us), int(cumulative_us)))
+    return modules
+
+
+def direct_imports(profile: List[Tuple[str, int, int, int]], parent: str) -> Dict[str, int]:
+    """Cumulative microseconds of each module imported directly by `parent`"""
+    # -X importtime prints children before their parent
+    children: Dict[str, int] = {}
+    for name, depth, _, cumulative in profile:
+        if depth == 1:
+            children[name] = cumulative
+        elif depth == 0:
+            if name == parent:
+                return children
+            children = {}
+    return {}
+
+
+def profile_imports(repeats: int) -> Tuple[List[float], List[Tuple[str, int, int, int]], List[str]]:
+    """Import main in `repeats` fresh interpreters; keep the fastest run's profile"""
+    totals, best_profile, loaded = [], None, []
+    for _ in range(repeats):
+        result = run_python(["-X", "importtime"], IMPORT_MAIN)
+        profile = parse_importtime(result.stderr)
+        total = sum(cumulative for _, depth, _, cumulative in profile if depth == 0) / 1e6
+        totals.append(total)
+        if best_profile is None or total <= min(totals):
+            best_profile = profile
+            loaded = result.stdout.strip().split(",")
+    return totals, best_profile, loaded
+
+
+def lazy_violations(loaded: List[str]) -> List[str]:
+    """LAZY_MODULES (or their submodules) that were imported by main"""
+    loaded = set(loaded)
+    return [
+        name for name in LAZY_MODULES
+        if name in loaded or any(module.startswith(name + ".") for module in loaded)
+    ]
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Backend cold-start import profile")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to list")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_TIME_BUDGET_MS", "1500")))
+    parser.add_argument("--agents", action="store_true", help="Also time init_agents() (the background startup)")
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    totals, profile, loaded = profile_imports(args.repeats)
+    median_ms = statistics.median(totals) * 1000
+
+    by_package = direct_imports(profile, "main")
+    slowest = sorted(profile, key=lambda m: m[2], reverse=True)[:args.top]
+
+    print(f"import main: median {median_ms:.0f} ms over {args.repeats} runs (budget {args.budget_ms:.0f} ms)", file=sys.stderr)
+    print("\nImported by main (cumulative):", file=sys.stderr)
+    for package, cumulative in sorted(by_package.items(), key=lambda p: p[1], reverse=True)[:args.top]:
+        print(f"  {package:<40} {cumulative / 1000:>8.1f} ms", file=sys.stderr)
+    print("\nSlowest modules (self):", file=sys.stderr)
+    for name, _, self_us, cumulative in slowest:
+        print(f"  {name:<40} {self_us / 1000:>8.1f} ms self {cumulative / 1000:>8.1f} ms cumulative", file=sys.stderr)
+
+    report = {
+        "python": sys.version.split()[0],
+        "import_main_ms": {"median": round(median_ms, 1), "runs": [round(t * 1000, 1) for t in totals]},
+        "budget_ms": args.budget_ms,
+        "imported_by_main_ms": {package: round(us / 1000, 1) for package, us in by_package.items()},
+        "slowest_modules": [
+            {"module": name, "self_ms": round(self_us / 1000, 1), "cumulative_ms": round(cumulative / 1000, 1)}
+            for name, _, self_us, cumulative in slowest
+        ],
+        "regressions": [],
+    }
+
+    if args.agents:
+        seconds = float(run_python([], BUILD_AGENTS).stdout.strip().splitlines()[-1])
+        report["init_agents_ms"] = round(seconds * 1000, 1)
+        print(f"\ninit_agents (background, after bind): {seconds * 1000:.0f} ms", file=sys.stderr)
+
+    if median_ms > args.budget_ms:
+        report["regressions"].append(f"import main took {median_ms:.0f} ms > budget {args.budget_ms:.0f} ms")
+    for name in lazy_violations(loaded):
+        report["regressions"].append(f"{name} is imported at startup - it must stay lazy")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if report["regressions"]:
+        print("\nREGRESSIONS:\n  " + "\n  ".join(report["regressions"]), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
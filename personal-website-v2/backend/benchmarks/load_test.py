@@ -0,0 +1,291 @@
+"""
+Load test for the chat API
+
+Drives /api/chat, /api/chat/usage and the health endpoints either in-process
+(ASGI transport, no server needed) or against a running server. Each
+simulated client gets its own X-Forwarded-For address so per-IP rate limits
+behave like real traffic. The JSON report has throughput plus p50/p95/p99
+latency per endpoint and per chat pipeline stage (from Server-Timing).
+
+Usage (from backend/):
+    LLM_PROVIDER=mock python -m benchmarks.load_test --requests 500 --concurrency 32
+    python -m benchmarks.load_test --base-url http://localhost:8000 --output report.json
+    python -m benchmarks.load_test --baseline baseline.json --tolerance 0.2
+
+The run waits for /api/health/readiness before sending traffic. It exits
+with status 1 when more than --max-non-2xx of the responses are errors, or
+when --baseline is given and a regression is found. In-process runs send
+the app's logs to stderr, so stdout carries only the report.
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+import httpx
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "queries.jsonl")
+
+# RFC 2544 benchmarking range - never a real client, never a trusted proxy
+CLIENT_NETWORK = ipaddress.ip_network("198.18.0.0/15")
+
+HEALTH_ENDPOINTS = ["/api/health", "/api/health/liveness", "/api/health/readiness"]
+
+
+def load_corpus(path: str, kinds: Optional[List[str]] = None) -> List[dict]:
+    """Load the replayable query corpus (one JSON object per line)"""
+    with open(path, encoding="utf-8") as f:
+        queries = [json.loads(line) for line in f if line.strip()]
+    if kinds:
+        queries = [q for q in queries if q.get("kind") in kinds]
+    if not queries:
+        raise SystemExit(f"No queries loaded from {path}")
+    return queries
+
+
+def client_ip(index: int) -> str:
+    """Deterministic distinct client address"""
+    return str(CLIENT_NETWORK[index % CLIENT_NETWORK.num_addresses])
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(samples_ms: List[float], duration: float) -> Dict[str, float]:
+    """Latency summary for one endpoint or stage"""
+    values = sorted(samples_ms)
+    return {
+        "count": len(values),
+        "rps": round(len(values) / duration, 2) if duration else 0.0,
+        "mean_ms": round(sum(values) / len(values), 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 50), 3),
+        "p95_ms": round(percentile(values, 95), 3),
+        "p99_ms": round(percentile(values, 99), 3),
+        "max_ms": round(values[-1], 3) if values else 0.0,
+    }
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """Parse 'stage;dur=1.23, other;dur=4.5' into {stage: ms}"""
+    stages = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "dur" and name:
+                try:
+                    stages[name] = float(value)
+                except ValueError:
+                    pass
+    return stages
+
+
+class LoadTest:
+    """Closed-loop load generator with a fixed number of concurrent workers"""
+
+    def __init__(self, args):
+        self.args = args
+        self.corpus = load_corpus(args.corpus, args.kinds)
+        self.rng = random.Random(args.seed)
+        self.endpoint_samples: Dict[str, List[float]] = defaultdict(list)
+        self.stage_samples: Dict[str, List[float]] = defaultdict(list)
+        self.status_codes: Counter = Counter()
+        self.errors = 0
+        self._next = 0
+
+    def _plan(self, index: int):
+        """Deterministic (endpoint, method, path, body, ip) for request #index"""
+        rng = random.Random(self.args.seed * 1_000_003 + index)
+        ip = client_ip(rng.randrange(self.args.ips))
+        roll = rng.random()
+
+        if roll < self.args.usage_ratio:
+            return "usage", "GET", "/api/chat/usage", None, ip
+        if roll < self.args.usage_ratio + self.args.health_ratio:
+            path = rng.choice(HEALTH_ENDPOINTS + (["/api/health/detailed"] if self.args.detailed_health else []))
+            return "health", "GET", path, None, ip
+
+        query = rng.choice(self.corpus)
+        body = {"message": query["message"], "language": query.get("language", "en")}
+        return "chat", "POST", "/api/chat", body, ip
+
+    async def _worker(self, client: httpx.AsyncClient):
+        while self._next < self.args.requests:
+            index = self._next
+            self._next += 1
+
+            endpoint, method, path, body, ip = self._plan(index)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body, headers={"X-Forwarded-For": ip})
+            except httpx.HTTPError:
+                self.errors += 1
+                self.status_codes["error"] += 1
+                continue
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.status_codes[str(response.status_code)] += 1
+            self.endpoint_samples[endpoint].append(elapsed_ms)
+
+            timing = response.headers.get("server-timing")
+            if timing:
+                for stage, duration_ms in parse_server_timing(timing).items():
+                    self.stage_samples[stage].append(duration_ms)
+
+    @asynccontextmanager
+    async def _client(self):
+        timeout = httpx.Timeout(self.args.timeout)
+        if self.args.base_url:
+            limits = httpx.Limits(max_connections=self.args.concurrency)
+            async with httpx.AsyncClient(base_url=self.args.base_url, timeout=timeout, limits=limits) as client:
+                yield client
+            return
+
+        # In-process: run the app's lifespan and talk to it over ASGI
+        import main
+        from utils.logging_config import configure_logging
+
+        # The app logs to stdout on import - keep stdout for the report
+        configure_logging(stream=sys.stderr)
+
+        async with main.app.router.lifespan_context(main.app):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout) as client:
+                yield client
+
+    async def _wait_ready(self, client: httpx.AsyncClient):
+        """Poll the readiness probe - until the agents are built, chat answers 503"""
+        deadline = time.perf_counter() + self.args.ready_timeout
+        while True:
+            try:
+                response = await client.get("/api/health/readiness")
+                if response.status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            if time.perf_counter() > deadline:
+                raise SystemExit(f"Server not ready after {self.args.ready_timeout:.0f}s (/api/health/readiness)")
+            await asyncio.sleep(0.1)
+
+    async def run(self) -> dict:
+        async with self._client() as client:
+            await self._wait_ready(client)
+
+            # Warm-up requests are not measured
+            for i in range(self.args.warmup):
+                _, method, path, body, ip = self._plan(-1 - i)
+                await client.request(method, path, json=body, headers={"X-Forwarded-For": ip})
+
+            start = time.perf_counter()
+            await asyncio.gather(*(self._worker(client) for _ in range(self.args.concurrency)))
+            duration = time.perf_counter() - start
+
+        completed = sum(len(samples) for samples in self.endpoint_samples.values())
+        non_2xx = sum(count for status, count in self.status_codes.items() if not status.startswith("2"))
+        return {
+            "config": {
+                "target": self.args.base_url or "in-process",
+                "requests": self.args.requests,
+                "concurrency": self.args.concurrency,
+                "distinct_ips": self.args.ips,
+                "corpus": os.path.basename(self.args.corpus),
+                "corpus_size": len(self.corpus),
+                "seed": self.args.seed,
+                "llm_provider": os.getenv("LLM_PROVIDER", "auto"),
+            },
+            "duration_seconds": round(duration, 3),
+            "completed": completed,
+            "errors": self.errors,
+            "rps": round(completed / duration, 2) if duration else 0.0,
+            "status_codes": dict(self.status_codes),
+            # Rate limits and blocked inputs are expected, but when they dominate
+            # the latencies describe the error path, not the chat pipeline
+            "non_2xx_ratio": round(non_2xx / (completed + self.errors), 3) if completed + self.errors else 0.0,
+            "endpoints": {name: summarize(samples, duration) for name, samples in sorted(self.endpoint_samples.items())},
+            "stages": {name: summarize(samples, duration) for name, samples in sorted(self.stage_samples.items())},
+        }
+
+
+def compare_to_baseline(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """List regressions of throughput and tail latency against a baseline report"""
+    regressions = []
+
+    if baseline.get("rps") and report["rps"] < baseline["rps"] * (1 - tolerance):
+        regressions.append(f"rps {report['rps']} < baseline {baseline['rps']} (-{tolerance:.0%})")
+
+    for section in ("endpoints", "stages"):
+        for name, base in baseline.get(section, {}).items():
+            current = report[section].get(name)
+            if not current:
+                continue
+            for key in ("p95_ms", "p99_ms"):
+                # Ignore sub-millisecond noise
+                limit = max(base[key] * (1 + tolerance), base[key] + 1.0)
+                if current[key] > limit:
+                    regressions.append(f"{section}.{name}.{key} {current[key]} > baseline {base[key]} (+{tolerance:.0%})")
+
+    return regressions
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Chat API load test")
+    parser.add_argument("--base-url", help="Target server (default: in-process ASGI app)")
+    parser.add_argument("--requests", type=int, default=300, help="Total measured requests")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent workers")
+    parser.add_argument("--ips", type=int, default=1000, help="Distinct client IPs (X-Forwarded-For)")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Query corpus (JSONL)")
+    parser.add_argument("--kinds", nargs="*", help="Only replay these kinds (faq, on_topic, off_topic, malicious)")
+    parser.add_argument("--usage-ratio", type=float, default=0.2, help="Share of /api/chat/usage requests")
+    parser.add_argument("--health-ratio", type=float, default=0.1, help="Share of health endpoint requests")
+    parser.add_argument("--detailed-health", action="store_true", help="Include /api/health/detailed")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured warm-up requests")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout (seconds)")
+    parser.add_argument("--ready-timeout", type=float, default=120.0, help="Wait this long for /api/health/readiness")
+    parser.add_argument("--max-non-2xx", type=float, default=0.5, help="Fail when a larger share of responses is not 2xx")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--baseline", help="Baseline report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    report = asyncio.run(LoadTest(args).run())
+
+    if report["non_2xx_ratio"] > args.max_non_2xx:
+        report["failed"] = (
+            f"{report['non_2xx_ratio']:.0%} of responses were not 2xx (limit {args.max_non_2xx:.0%}): "
+            f"{report['status_codes']}"
+        )
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["regressions"] = compare_to_baseline(report, json.load(f), args.tolerance)
+
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(rendered + "\n")
+    print(rendered)
+
+    if report.get("failed"):
+        print(f"\nFAILED: {report['failed']}", file=sys.stderr)
+    if report.get("regressions"):
+        print("\nREGRESSIONS:\n  " + "\n  ".join(report["regressions"]), file=sys.stderr)
+    if report.get("failed") or report.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
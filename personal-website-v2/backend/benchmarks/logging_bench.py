@@ -0,0 +1,123 @@
+"""
+Logging overhead per chat request
+
+Emits the info events a successful /api/chat request logs and measures the
+time spent on the calling (event-loop) thread under different setups:
+
+    default         structlog defaults (console renderer, synchronous write)
+    sync_json       JSONRenderer, synchronous write
+    queued          utils.logging_config pipeline, no sampling
+    queued_sampled  utils.logging_config pipeline with LOG_SAMPLE_RATES-style rates
+
+Output goes to /dev/null, so numbers exclude terminal or pipe back-pressure -
+which the queued pipeline also hides from the event loop in production.
+
+Usage (from backend/):
+    python -m benchmarks.logging_bench --requests 20000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import structlog
+
+from utils import logging_config
+
+# Events (and fields) logged by one successful chat request
+REQUEST_EVENTS = [
+    ("processing_chat_request", {"ip": "198.18.0.7", "language": "en", "message_length": 42}),
+    ("query_routed", {"query": "What is Edson's experience with Kubernetes?", "route": "technical"}),
+    ("technical_query_processed", {"query_length": 42, "language": "en", "tier": "large"}),
+    ("query_tokens_accounted", {"route": "technical", "tier": "large", "tokens": 412, "stages": {"routing": 96, "technical_agent": 316}}),
+    ("usage_recorded", {"ip": "198.18.0.7", "tokens": 412}),
+    ("chat_request_completed", {"ip": "198.18.0.7", "tokens_used": 412, "agent_used": "technical"}),
+    ("request_completed", {"method": "POST", "path": "/api/chat", "status_code": 200, "duration": 0.8123}),
+]
+
+DEFAULT_SAMPLE_RATES = {
+    "request_completed": 0.1,
+    "query_routed": 0.1,
+    "usage_recorded": 0.1,
+    "query_tokens_accounted": 0.1,
+}
+
+
+def configure(mode: str, devnull):
+    """Configure structlog for one mode; returns a closer that waits for pending writes"""
+    structlog.reset_defaults()
+
+    if mode == "default":
+        structlog.configure(logger_factory=structlog.PrintLoggerFactory(devnull))
+        return lambda: None
+
+    if mode == "sync_json":
+        structlog.configure(
+            processors=[
+                structlog.processors.add_log_level,
+                structlog.processors.TimeStamper(fmt="iso"),
+                structlog.processors.JSONRenderer(),
+            ],
+            logger_factory=structlog.PrintLoggerFactory(devnull),
+        )
+        return lambda: None
+
+    rates = DEFAULT_SAMPLE_RATES if mode == "queued_sampled" else {}
+    writer = logging_config.configure_logging(level="INFO", fmt="json", sample_rates=rates, stream=devnull)
+    return writer.close
+
+
+def run_mode(mode: str, requests: int, devnull) -> dict:
+    close = configure(mode, devnull)
+    logger = structlog.get_logger()
+
+    for _ in range(200):  # warm up
+        for event, fields in REQUEST_EVENTS:
+            logger.info(event, **fields)
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        for event, fields in REQUEST_EVENTS:
+            logger.info(event, **fields)
+    caller = time.perf_counter() - start
+
+    close()
+    drained = time.perf_counter() - start
+
+    return {
+        "caller_us_per_request": round(caller / requests * 1e6, 2),
+        "caller_ns_per_event": round(caller / (requests * len(REQUEST_EVENTS)) * 1e9, 1),
+        "total_us_per_request": round(drained / requests * 1e6, 2),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Structured logging overhead benchmark")
+    parser.add_argument("--requests", type=int, default=20000, help="Simulated chat requests per mode")
+    parser.add_argument("--modes", nargs="*", default=["default", "sync_json", "queued", "queued_sampled"])
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    results = {}
+    with open(os.devnull, "w") as devnull:
+        for mode in args.modes:
+            results[mode] = run_mode(mode, args.requests, devnull)
+            r = results[mode]
+            print(
+                f"{mode:<16} {r['caller_us_per_request']:>8.2f} us/request on caller "
+                f"({r['caller_ns_per_event']:>7.0f} ns/event), {r['total_us_per_request']:>8.2f} us incl. drain",
+                file=sys.stderr,
+            )
+
+    report = {"events_per_request": len(REQUEST_EVENTS), "requests": args.requests, "modes": results}
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(rendered + "\n")
+    print(rendered)
+
+
+if __name__ == "__main__":
+    main_cli()
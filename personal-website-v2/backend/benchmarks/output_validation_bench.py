@@ -0,0 +1,139 @@
+"""
+Throughput of output validation for streamed answers
+
+Compares the two ways of checking a streamed answer:
+
+- buffered: keep every chunk, join them at the end and run
+  ContentFilter.validate_output over the full text (O(response) memory,
+  the violation is only found after the whole answer was sent)
+- incremental: feed each chunk to StreamingOutputValidator, which keeps
+  an overlap window of OUTPUT_STREAM_WINDOW characters (O(window) memory)
+
+Answers are built from the knowledge base paragraphs (no violations, so
+every character is scanned) at several lengths and chunk sizes. Reports
+MB/s, ns per chunk and the tracemalloc peak of one pass.
+
+Usage (from backend/):
+    python -m benchmarks.output_validation_bench
+    python -m benchmarks.output_validation_bench --sizes 1024 65536 --chunk-sizes 4 --output validation.json
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from benchmarks.guardrails_bench import output_corpus, silence_logging
+
+
+def answer(size: int) -> str:
+    """A clean answer of about size characters"""
+    paragraphs = output_corpus()[:-3]  # without the PII-bearing answers
+    text = ""
+    while len(text) < size:
+        text += "\n\n".join(paragraphs)
+    return text[:size]
+
+
+def chunked(text: str, chunk_size: int) -> List[str]:
+    return [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+
+
+def build_modes() -> Dict[str, Callable]:
+    """name -> async callable(chunks) returning a violation or None"""
+    from guardrails.content_filter import ContentFilter
+
+    content_filter = ContentFilter()
+    content_filter.llm = None
+
+    async def buffered(chunks: List[str]):
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk)
+        is_safe, reason = await content_filter.validate_output("".join(parts))
+        return None if is_safe else reason
+
+    async def incremental(chunks: List[str]):
+        validator = content_filter.stream_validator()
+        for chunk in chunks:
+            validator.feed(chunk)
+            if validator.violation is not None:
+                break
+        validator.finish()
+        return validator.violation
+
+    return {"buffered": buffered, "incremental": incremental}
+
+
+async def _run(func: Callable, chunks: List[str], passes: int):
+    for _ in range(passes):
+        await func(chunks)
+
+
+def measure(func: Callable, chunks: List[str], passes: int, repeats: int) -> Dict[str, float]:
+    """Best-of-N throughput plus the allocation peak of one pass"""
+    chars = sum(len(chunk) for chunk in chunks)
+    asyncio.run(_run(func, chunks, 1))  # warm up
+
+    best = float("inf")
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        asyncio.run(_run(func, chunks, passes))
+        best = min(best, (time.perf_counter() - start) / passes)
+
+    gc.collect()
+    tracemalloc.start()
+    asyncio.run(_run(func, chunks, 1))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "mb_per_sec": round(chars / best / 1e6, 2),
+        "ns_per_chunk": round(best / len(chunks) * 1e9, 1),
+        "peak_alloc_bytes": peak,
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Buffered vs incremental output validation")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[1024, 16384, 262144], help="Answer lengths in characters")
+    parser.add_argument("--chunk-sizes", type=int, nargs="*", default=[4, 16], help="Characters per streamed chunk")
+    parser.add_argument("--chars", type=int, default=2_000_000, help="Characters validated per timed run")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    silence_logging()
+    from guardrails.content_filter import OUTPUT_STREAM_WINDOW
+
+    modes = build_modes()
+    results = []
+    for size in args.sizes:
+        text = answer(size)
+        for chunk_size in args.chunk_sizes:
+            chunks = chunked(text, chunk_size)
+            passes = max(1, args.chars // size)
+            for name, func in modes.items():
+                r = {"mode": name, "size": size, "chunk_size": chunk_size, **measure(func, chunks, passes, args.repeats)}
+                results.append(r)
+                print(
+                    f"{name:<12} {size:>8,} chars  {chunk_size:>3}/chunk  {r['mb_per_sec']:>8.2f} MB/s "
+                    f"{r['ns_per_chunk']:>8,.0f} ns/chunk {r['peak_alloc_bytes']:>10,} B peak",
+                    file=sys.stderr,
+                )
+
+    report = {"python": sys.version.split()[0], "window": OUTPUT_STREAM_WINDOW, "results": results}
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(rendered + "\n")
+    print(rendered)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,157 @@
+"""
+Redis memory per active client for the rate-limit key schemas
+
+Fills an empty Redis database with the rate-limit state of N simulated
+clients, each seen `--messages` times today, once with the legacy schema
+(three string keys per client: tokens:, messages:, requests_minute: with
+ISO dates, each with its own EXPIRE) and once with the compact schema used
+by RateLimiter (one hash per client-day under a short binary key). Reports
+used_memory growth, keys and bytes per client for both.
+
+Needs a real Redis (MEMORY USAGE / INFO are not emulated). The database is
+flushed between runs, so point it at a scratch database.
+
+Usage (from backend/):
+    python -m benchmarks.redis_memory --redis-url redis://localhost:6379/15 --clients 100000
+    python -m benchmarks.redis_memory --clients 100000 --ipv6-share 0.3 --output redis_memory.json
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import json
+import random
+import sys
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+import redis.asyncio as redis
+
+from benchmarks.load_test import client_ip
+from guardrails.client_identity import client_key
+from guardrails.rate_limiter import FIELD_LAST_REQUEST, FIELD_MESSAGES, FIELD_TOKENS, key_expiry, minute_field, usage_key
+
+# Documentation range for simulated IPv6 clients
+IPV6_NETWORK = ipaddress.ip_network("2001:db8::/32")
+
+PIPELINE_CHUNK = 1000
+
+
+def clients(count: int, ipv6_share: float, seed: int) -> List[str]:
+    """Client identities as RateLimiter sees them (IPv6 already bucketed to /64)"""
+    rng = random.Random(seed)
+    identities = []
+    for i in range(count):
+        if rng.random() < ipv6_share:
+            address = IPV6_NETWORK[rng.getrandbits(96)]
+            identities.append(client_key(address))
+        else:
+            identities.append(client_ip(i))
+    return identities
+
+
+def legacy_writes(pipe, client: str, minutes: List[datetime], tokens: int):
+    """The pre-hash schema: one string key per counter, each with its own EXPIRE"""
+    today = minutes[0].date()
+    for _ in minutes:
+        pipe.incr(f"messages:{client}:{today}")
+        pipe.expire(f"messages:{client}:{today}", 86400)
+    # Earlier minute keys have expired - an active client holds the current one
+    requests_minute_key = f"requests_minute:{client}:{minutes[-1].strftime('%Y-%m-%d-%H-%M')}"
+    pipe.incr(requests_minute_key)
+    pipe.expire(requests_minute_key, 60)
+    pipe.incrby(f"tokens:{client}:{today}", tokens)
+    pipe.expire(f"tokens:{client}:{today}", 86400)
+
+
+def compact_writes(pipe, client: str, minutes: List[datetime], tokens: int):
+    """RateLimiter's schema: one hash per client-day, a single EXPIREAT"""
+    today = minutes[0].date()
+    key = usage_key(client, today)
+    for minute in minutes:
+        pipe.hincrby(key, FIELD_MESSAGES, 1)
+        pipe.hincrby(key, minute_field(minute), 1)
+        pipe.hset(key, FIELD_LAST_REQUEST, int(minute.timestamp()))
+        pipe.expireat(key, key_expiry(today))
+    pipe.hincrby(key, FIELD_TOKENS, tokens)
+    pipe.expireat(key, key_expiry(today))
+
+
+async def measure(client: redis.Redis, name: str, write: Callable, identities: List[str], messages: int, seed: int) -> dict:
+    await client.flushdb()
+    before = (await client.info("memory"))["used_memory"]
+
+    rng = random.Random(seed)
+    day_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    for start in range(0, len(identities), PIPELINE_CHUNK):
+        async with client.pipeline(transaction=False) as pipe:
+            for identity in identities[start:start + PIPELINE_CHUNK]:
+                minutes = sorted(day_start + timedelta(minutes=rng.randrange(1440)) for _ in range(messages))
+                write(pipe, identity, minutes, rng.randint(5, 50))
+            await pipe.execute()
+
+    after = (await client.info("memory"))["used_memory"]
+    keys = await client.dbsize()
+    sample = [key async for key in client.scan_iter(count=1000)][:200]
+    sampled = [await client.memory_usage(key) or 0 for key in sample]
+
+    result = {
+        "clients": len(identities),
+        "keys": keys,
+        "keys_per_client": round(keys / len(identities), 2),
+        "used_memory_bytes": after - before,
+        "bytes_per_client": round((after - before) / len(identities), 1),
+        "memory_usage_per_key": round(sum(sampled) / len(sampled), 1) if sampled else 0,
+    }
+    print(
+        f"{name:<8} {result['keys']:>9,} keys  {result['keys_per_client']:>5} keys/client  "
+        f"{result['used_memory_bytes'] / 2**20:>8.1f} MiB  {result['bytes_per_client']:>7.1f} B/client",
+        file=sys.stderr,
+    )
+    return result
+
+
+async def run(redis_url: str, count: int, messages: int, ipv6_share: float, seed: int, force: bool) -> dict:
+    client = redis.from_url(redis_url)
+    try:
+        if await client.dbsize() and not force:
+            raise SystemExit(f"{redis_url} is not empty - use a scratch database or pass --force to flush it")
+
+        identities = clients(count, ipv6_share, seed)
+        report = {
+            "messages_per_client": messages,
+            "ipv6_share": ipv6_share,
+            "legacy": await measure(client, "legacy", legacy_writes, identities, messages, seed),
+            "compact": await measure(client, "compact", compact_writes, identities, messages, seed),
+        }
+        await client.flushdb()
+    finally:
+        await client.aclose()
+
+    legacy, compact = report["legacy"]["bytes_per_client"], report["compact"]["bytes_per_client"]
+    report["reduction"] = round(1 - compact / legacy, 3) if legacy else 0.0
+    print(f"compact schema uses {report['reduction']:.0%} less memory per active client", file=sys.stderr)
+    return report
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Rate-limit Redis memory per active client")
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15", help="Scratch database (flushed)")
+    parser.add_argument("--clients", type=int, default=100000)
+    parser.add_argument("--messages", type=int, default=3, help="Requests per client today")
+    parser.add_argument("--ipv6-share", type=float, default=0.0, help="Share of clients on IPv6")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--force", action="store_true", help="Flush the database even if it is not empty")
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.redis_url, args.clients, args.messages, args.ipv6_share, args.seed, args.force))
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(rendered + "\n")
+    print(rendered)
+
+
+if __name__ == "__main__":
+    main_cli()
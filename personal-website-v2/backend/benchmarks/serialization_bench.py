@@ -0,0 +1,156 @@
+"""
+Response serialization cost per payload
+
+Compares what FastAPI does for a returned model with response_model set
+(revalidate + jsonable_encoder + JSONResponse) with the response classes in
+api/responses.py, for ChatResponse, TokenUsage and the health payloads.
+
+Usage (from backend/):
+    python -m benchmarks.serialization_bench --iterations 50000
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from api.health import HEALTH_BODY
+from api.responses import ModelResponse
+from models.chat import ChatResponse, TokenUsage
+from starlette.responses import Response
+
+CHAT = ChatResponse(
+    message=(
+        "Edson has hands-on experience running Kubernetes for ML workloads: EKS clusters provisioned "
+        "with Terraform, GPU node pools, Helm charts for model serving, and Prometheus/Grafana "
+        "monitoring. At Apple he worked on GenAI infrastructure with LangChain-based RAG services."
+    ),
+    conversation_id="3f0e1c8a-5b1d-4a57-9c52-1e8f2d8a6b90",
+    tokens_used=412,
+    tokens_remaining=1588,
+    agent_used="technical",
+    confidence=0.85,
+    is_on_topic=True,
+)
+
+USAGE = TokenUsage(
+    ip_address="198.18.0.7",
+    tokens_used_today=412,
+    tokens_remaining=1588,
+    requests_today=3,
+    last_request=datetime(2026, 1, 1, 12, 30, 0),
+    is_rate_limited=False,
+)
+
+HEALTH_DETAILED = {
+    "status": "healthy",
+    "service": "edson-portfolio-api",
+    "version": "2.0.0",
+    "system": {
+        "cpu_percent": 12.5,
+        "memory_percent": 41.2,
+        "memory_available_mb": 2048.7,
+        "disk_percent": 63.0,
+        "disk_available_gb": 18.4,
+    },
+    "process": {"pid": 1},
+    "knowledge_base": {"version": "a1b2c3d4e5f6"},
+}
+
+
+def fastapi_default(model_type):
+    """FastAPI's path for a returned object with response_model=model_type"""
+    field = create_response_field("response", model_type, mode="serialization")
+
+    async def render(content):
+        return JSONResponse(await serialize_response(field=field, response_content=content)).body
+
+    return render
+
+
+async def dict_default(content):
+    """FastAPI's path for a returned dict without response_model"""
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+CASES = {
+    "chat_response": {
+        "fastapi_default": (fastapi_default(ChatResponse), CHAT),
+        "model_response": (lambda m: ModelResponse(m).body, CHAT),
+        "orjson_dump": (lambda m: ORJSONResponse(m.model_dump()).body, CHAT),
+    },
+    "token_usage": {
+        "fastapi_default": (fastapi_default(TokenUsage), USAGE),
+        "model_response": (lambda m: ModelResponse(m).body, USAGE),
+        "orjson_dump": (lambda m: ORJSONResponse(m.model_dump()).body, USAGE),
+    },
+    "health_detailed": {
+        "fastapi_default": (dict_default, HEALTH_DETAILED),
+        "orjson_response": (lambda d: ORJSONResponse(d).body, HEALTH_DETAILED),
+    },
+    "health": {
+        "fastapi_default": (dict_default, json.loads(HEALTH_BODY)),
+        "prebuilt_body": (lambda body: Response(body, media_type="application/json").body, HEALTH_BODY),
+    },
+}
+
+
+async def time_case(func, payload, iterations: int, repeats: int) -> float:
+    """Best-of-N seconds per call"""
+    is_async = asyncio.iscoroutinefunction(func)
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        if is_async:
+            for _ in range(iterations):
+                await func(payload)
+        else:
+            for _ in range(iterations):
+                func(payload)
+        best = min(best, (time.perf_counter() - start) / iterations)
+    return best
+
+
+async def run(iterations: int, repeats: int) -> dict:
+    results = {}
+    for payload_name, variants in CASES.items():
+        results[payload_name] = {}
+        baseline = None
+        for variant, (func, payload) in variants.items():
+            seconds = await time_case(func, payload, iterations, repeats)
+            baseline = baseline or seconds
+            results[payload_name][variant] = {
+                "us_per_response": round(seconds * 1e6, 3),
+                "speedup": round(baseline / seconds, 2),
+            }
+            print(
+                f"{payload_name:<16} {variant:<16} {seconds * 1e6:>8.2f} us  x{baseline / seconds:.2f}",
+                file=sys.stderr,
+            )
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Response serialization benchmark")
+    parser.add_argument("--iterations", type=int, default=50000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.iterations, args.repeats))
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(rendered + "\n")
+    print(rendered)
+
+
+if __name__ == "__main__":
+    main_cli()
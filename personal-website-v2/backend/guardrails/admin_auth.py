@@ -0,0 +1,28 @@
+"""Admin authentication for operational endpoints"""
+
+import hmac
+import os
+from typing import Optional
+
+from fastapi import Header, HTTPException
+import structlog
+
+logger = structlog.get_logger()
+
+# Configuration
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    FastAPI dependency guarding admin endpoints
+
+    Requires the X-Admin-Token header to match ADMIN_TOKEN. Without an
+    ADMIN_TOKEN configured every admin endpoint is closed.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin API disabled")
+
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        logger.warning("admin_auth_failed")
+        raise HTTPException(status_code=401, detail="Invalid admin token")
@@ -0,0 +1,135 @@
+"""Client identity - the address rate limits are keyed on, behind trusted proxies"""
+
+import ipaddress
+import os
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Optional, Union
+
+import structlog
+
+logger = structlog.get_logger()
+
+# Configuration
+# Peers allowed to set X-Forwarded-For / X-Real-IP (the ingress, load balancers).
+# Defaults to loopback and private ranges, where the cluster ingress lives.
+TRUSTED_PROXIES = os.getenv(
+    "TRUSTED_PROXIES",
+    "127.0.0.0/8,::1/128,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16,fc00::/7",
+)
+# IPv6 clients are bucketed by this prefix - one household or host usually owns
+# a whole /64, so per-address limits are trivially dodged. 128 disables bucketing.
+IPV6_CLIENT_PREFIX = int(os.getenv("IPV6_CLIENT_PREFIX", "64"))
+CLIENT_IDENTITY_CACHE_SIZE = int(os.getenv("CLIENT_IDENTITY_CACHE_SIZE", "4096"))
+
+IPAddress = Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+
+
+class TrustedProxies:
+    """
+    Precompiled CIDR set
+
+    Networks are stored as {prefix length: {network bits}} per IP version, so
+    a lookup is one shift and one set probe per distinct prefix length
+    instead of a scan over every configured network.
+    """
+
+    def __init__(self, cidrs: Iterable[str]):
+        self._networks: Dict[int, Dict[int, FrozenSet[int]]] = {4: {}, 6: {}}
+        networks: Dict[int, Dict[int, set]] = {4: {}, 6: {}}
+        for cidr in cidrs:
+            cidr = cidr.strip()
+            if not cidr:
+                continue
+            try:
+                network = ipaddress.ip_network(cidr, strict=False)
+            except ValueError:
+                logger.warning("trusted_proxy_invalid", cidr=cidr)
+                continue
+            shift = network.max_prefixlen - network.prefixlen
+            networks[network.version].setdefault(shift, set()).add(int(network.network_address) >> shift)
+        for version, by_shift in networks.items():
+            self._networks[version] = {shift: frozenset(bits) for shift, bits in by_shift.items()}
+
+    def __contains__(self, address: IPAddress) -> bool:
+        value = int(address)
+        return any(value >> shift in bits for shift, bits in self._networks[address.version].items())
+
+
+def _parse(value: str) -> Optional[IPAddress]:
+    """IP address from a header or peer value; None if it is not an address"""
+    value = value.strip()
+    if value.startswith("[") and "]" in value:
+        value = value[1:value.index("]")]  # [v6]:port
+    elif value.count(":") == 1:
+        value = value.split(":", 1)[0]  # v4:port
+    try:
+        address = ipaddress.ip_address(value)
+    except ValueError:
+        return None
+    if address.version == 6 and address.ipv4_mapped is not None:
+        return address.ipv4_mapped
+    return address
+
+
+def client_key(address: IPAddress, ipv6_prefix: int = IPV6_CLIENT_PREFIX) -> str:
+    """Rate-limit identity for an address (IPv6 bucketed by prefix)"""
+    if address.version == 6 and ipv6_prefix < 128:
+        return str(ipaddress.ip_network((address, ipv6_prefix), strict=False))
+    return str(address)
+
+
+class ClientResolver:
+    """
+    Resolve the real client behind a chain of trusted proxies
+
+    Forwarding headers are only honoured when the direct peer is a trusted
+    proxy. X-Forwarded-For is then read right to left - each hop was
+    appended by the proxy in front of it - and the first address that is
+    not a trusted proxy is the client. Everything left of it was supplied
+    by the client and is ignored, so rotating fake addresses in the header
+    does not create new identities. Results are cached per header tuple.
+    """
+
+    def __init__(self, trusted_proxies: Iterable[str], ipv6_prefix: int = IPV6_CLIENT_PREFIX, cache_size: int = CLIENT_IDENTITY_CACHE_SIZE):
+        self.trusted = TrustedProxies(trusted_proxies)
+        self.ipv6_prefix = ipv6_prefix
+        self.resolve = lru_cache(maxsize=cache_size)(self._resolve)
+
+    def _resolve(self, peer: str, forwarded_for: Optional[str], real_ip: Optional[str]) -> str:
+        address = _parse(peer)
+        if address is None:
+            # Unix socket or test client - nothing to resolve
+            return peer
+        if address not in self.trusted:
+            return client_key(address, self.ipv6_prefix)
+
+        if forwarded_for:
+            for hop in reversed(forwarded_for.split(",")):
+                hop_address = _parse(hop)
+                if hop_address is None:
+                    # Garbage written by a trusted hop - stop at the last good one
+                    break
+                address = hop_address
+                if address not in self.trusted:
+                    break
+        elif real_ip:
+            address = _parse(real_ip) or address
+
+        return client_key(address, self.ipv6_prefix)
+
+    def __call__(self, request) -> str:
+        client = request.client
+        return self.resolve(
+            client.host if client else "unknown",
+            request.headers.get("x-forwarded-for"),
+            request.headers.get("x-real-ip"),
+        )
+
+
+_resolver = ClientResolver(TRUSTED_PROXIES.split(","))
+
+
+def get_client_ip(request) -> str:
+    """Client identity for rate limiting (an IPv4 address or an IPv6 prefix)"""
+    return _resolver(request)
+
@@ -1,9 +1,10 @@
 """Content filtering and topic classification for chatbot"""
 
 import re
-from typing import Tuple
+from typing import Optional, Tuple
 import structlog
-from utils.llm_provider import get_classifier_llm
+from utils.classifier_batcher import ClassifierBatcher, with_previous_question
+from utils.llm_provider import CLASSIFIER_STOP, get_classifier_llm
 from langchain.prompts import ChatPromptTemplate
 import os
 
@@ -31,6 +32,34 @@ MALICIOUS_PATTERNS = [
     r"eval\s*\(",  # Code injection
 ]
 
+# Output checks, compiled once: (regex, log event, reason). They run on
+# lowercased text - case-sensitive literals let re skip ahead, IGNORECASE
+# patterns are several times slower.
+PHONE_PATTERN = re.compile(r"\b\d{3}[-.]?\d{3}[-.]?\d{4}\b")
+OUTPUT_VIOLATIONS = [
+    (re.compile(r"\b\d{3}-\d{2}-\d{4}\b"), "ssn_detected_in_output", "Sensitive data detected"),
+    (re.compile(r"\b\d{4}[\s-]?\d{4}[\s-]?\d{4}[\s-]?\d{4}\b"), "credit_card_detected_in_output", "Sensitive data detected"),
+] + [
+    (re.compile(pattern), "malicious_content_in_output", "Unsafe content detected")
+    for pattern in MALICIOUS_PATTERNS
+]
+
+# Characters of streamed output kept for matches that span chunks - must
+# exceed the longest match (a card number is 19)
+OUTPUT_STREAM_WINDOW = int(os.getenv("OUTPUT_STREAM_WINDOW", "32"))
+
+TOPIC_INSTRUCTIONS = """You are a topic classifier. Determine if the following question
+                    is about Edson Zandamela's professional experience, skills, education, or projects.
+                    A follow-up may come with the previous question of the conversation;
+                    judge the follow-up in that context.
+
+                    Answer ONLY with 'yes' or 'no'."""
+
+TOPIC_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", TOPIC_INSTRUCTIONS),
+    ("user", "{question}"),
+])
+
 
 class ContentFilter:
     """Content filtering and topic classification"""
@@ -46,6 +75,16 @@ class ContentFilter:
             logger.warning("llm_init_failed", error=str(e))
             self.llm = None
 
+        # Concurrent topic checks share one classifier prompt
+        self.classifier = ClassifierBatcher(
+            self.llm,
+            stage="topic_classification",
+            single_messages=lambda question: TOPIC_PROMPT.format_messages(question=question),
+            instructions=TOPIC_INSTRUCTIONS,
+            labels=("yes", "no"),
+            stop=CLASSIFIER_STOP,
+        ) if self.llm else None
+
     async def validate_input(self, text: str) -> Tuple[bool, str]:
         """
         Validate user input for malicious content
@@ -74,11 +113,14 @@ class ContentFilter:
 
         return True, "OK"
 
-    async def is_on_topic(self, text: str) -> bool:
+    async def is_on_topic(self, text: str, previous_question: Optional[str] = None) -> bool:
         """
         Check if the question is about Edson
 
-        Uses keyword matching first, then LLM classification if available
+        Uses keyword matching first, then LLM classification if available.
+        previous_question is the conversation's last user turn - the
+        classifier sees it, so follow-ups like "and before that?" are judged
+        in context.
         """
         text_lower = text.lower()
 
@@ -92,18 +134,7 @@ class ContentFilter:
         # If no keywords found, use LLM for more accurate classification
         if self.llm:
             try:
-                prompt = ChatPromptTemplate.from_messages([
-                    ("system", """You are a topic classifier. Determine if the following question
-                    is about Edson Zandamela's professional experience, skills, education, or projects.
-
-                    Answer ONLY with 'yes' or 'no'."""),
-                    ("user", "{question}"),
-                ])
-
-                chain = prompt | self.llm
-                response = await chain.ainvoke({"question": text})
-
-                result = response.content.strip().lower()
+                result = await self.classifier.classify(with_previous_question(text, previous_question))
 
                 logger.info(
                     "topic_classification",
@@ -129,31 +160,24 @@ class ContentFilter:
             (is_safe, reason)
         """
         # Check for potential PII leakage (phone numbers, SSN, etc.)
-        phone_pattern = r"\b\d{3}[-.]?\d{3}[-.]?\d{4}\b"
-        ssn_pattern = r"\b\d{3}-\d{2}-\d{4}\b"
-        credit_card_pattern = r"\b\d{4}[\s-]?\d{4}[\s-]?\d{4}[\s-]?\d{4}\b"
-
-        if re.search(phone_pattern, text):
+        if PHONE_PATTERN.search(text):
             logger.warning("potential_phone_number_in_output")
             # This is actually okay if it's Edson's contact info
             # return False, "PII detected"
 
-        if re.search(ssn_pattern, text):
-            logger.error("ssn_detected_in_output")
-            return False, "Sensitive data detected"
-
-        if re.search(credit_card_pattern, text):
-            logger.error("credit_card_detected_in_output")
-            return False, "Sensitive data detected"
-
-        # Check for malicious content in output
-        for pattern in MALICIOUS_PATTERNS:
-            if re.search(pattern, text, re.IGNORECASE):
-                logger.error("malicious_content_in_output", pattern=pattern)
-                return False, "Unsafe content detected"
+        # SSN, credit card, then malicious content
+        lowered = _lower(text)
+        for regex, event, reason in OUTPUT_VIOLATIONS:
+            if regex.search(lowered):
+                logger.error(event, pattern=regex.pattern)
+                return False, reason
 
         return True, "OK"
 
+    def stream_validator(self) -> "StreamingOutputValidator":
+        """Validator for an answer that is streamed chunk by chunk"""
+        return StreamingOutputValidator()
+
     async def detect_jailbreak(self, text: str) -> bool:
         """
         Detect potential jailbreak attempts
@@ -184,3 +208,76 @@ class ContentFilter:
                 return True
 
         return False
+
+
+def _lower(text: str) -> str:
+    """Lowercase without changing the length, so offsets match the original text"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    # Rare characters that expand when lowercased ("İ") are kept as they are
+    return "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+class StreamingOutputValidator:
+    """
+    validate_output for streamed answers, one chunk at a time
+
+    The last `window` characters are held back: each chunk is checked
+    together with them, so matches spanning chunk boundaries are still
+    found, and feed() only releases text that has left the window. No
+    violation can reach back that far (the window is longer than any
+    match), so everything released is safe to send, and memory stays
+    O(window) however long the answer is. A match that touches the end of
+    the text seen so far is not reported until more text arrives (or
+    finish()), since the next chunk could extend it or break its word
+    boundary - the result is the same as validating the full text for any
+    match shorter than the window. Whitespace runs in the malicious
+    patterns are unbounded; a match longer than the window can be missed.
+    """
+
+    def __init__(self, window: int = OUTPUT_STREAM_WINDOW):
+        self.window = window
+        self.violation: Optional[str] = None
+        self.chars = 0
+        self._held = ""
+        self._lowered = ""
+        # Once text was released, the first held character is lookbehind context only
+        self._truncated = False
+
+    def feed(self, chunk: str) -> str:
+        """Check the next chunk; returns the text now safe to send ("" once a violation is found)"""
+        if self.violation is not None or not chunk:
+            return ""
+        self.chars += len(chunk)
+        held = self._held + chunk
+        lowered = self._lowered + _lower(chunk)
+        self._check(lowered, final=False)
+        if self.violation is not None:
+            self._held = self._lowered = ""
+            return ""
+
+        release = len(held) - self.window
+        if release <= 0:
+            self._held, self._lowered = held, lowered
+            return ""
+        self._held, self._lowered = held[release:], lowered[release:]
+        self._truncated = True
+        return held[:release]
+
+    def finish(self) -> str:
+        """Check the end of the stream; returns the held-back tail ("" on a violation)"""
+        if self.violation is None:
+            self._check(self._lowered, final=True)
+        held = "" if self.violation is not None else self._held
+        self._held = self._lowered = ""
+        return held
+
+    def _check(self, buffer: str, final: bool):
+        start = 1 if self._truncated else 0
+        for regex, event, reason in OUTPUT_VIOLATIONS:
+            match = regex.search(buffer, start)
+            if match and (final or match.end() < len(buffer)):
+                logger.error(event, pattern=regex.pattern, streamed_chars=self.chars)
+                self.violation = reason
+                return
@@ -0,0 +1,209 @@
+"""Load shedding - priority admission in front of agent execution"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+
+import structlog
+from prometheus_client import Counter, Gauge, Histogram
+
+from guardrails.rate_limiter import MAX_TOKENS_PER_DAY
+
+logger = structlog.get_logger()
+
+# Configuration
+LOAD_SHED_ENABLED = os.getenv("LOAD_SHED_ENABLED", "true").lower() == "true"
+# Agent runs (routing + generation) allowed at once; the rest queue
+LOAD_SHED_MAX_CONCURRENT = int(os.getenv("LOAD_SHED_MAX_CONCURRENT", "8"))
+LOAD_SHED_QUEUE_SIZE = int(os.getenv("LOAD_SHED_QUEUE_SIZE", "32"))
+# Longest a queued request waits for a slot, per class
+LOAD_SHED_MAX_WAIT_MS = {
+    "high": float(os.getenv("LOAD_SHED_WAIT_HIGH_MS", "10000")),
+    "normal": float(os.getenv("LOAD_SHED_WAIT_NORMAL_MS", "4000")),
+    "low": float(os.getenv("LOAD_SHED_WAIT_LOW_MS", "1000")),
+}
+# Share of the daily token budget left: below LOW -> low priority, at least HIGH -> high
+LOAD_SHED_LOW_BUDGET_SHARE = float(os.getenv("LOAD_SHED_LOW_BUDGET_SHARE", "0.2"))
+LOAD_SHED_HIGH_BUDGET_SHARE = float(os.getenv("LOAD_SHED_HIGH_BUDGET_SHARE", "0.5"))
+LOAD_SHED_RETRY_AFTER_SECONDS = int(os.getenv("LOAD_SHED_RETRY_AFTER_SECONDS", "5"))
+
+# Highest first
+PRIORITIES = ("high", "normal", "low")
+
+# Metrics
+LOAD_SHED_REQUESTS = Counter(
+    'load_shed_requests_total',
+    'Requests seen by the load shedder',
+    ['priority', 'result'],  # admitted | queue_full | timeout | evicted
+)
+LOAD_SHED_QUEUE_TIME = Histogram(
+    'load_shed_queue_seconds',
+    'Time a request waited for an agent slot',
+    ['priority'],
+    buckets=[0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10],
+)
+LOAD_SHED_QUEUED = Gauge('load_shed_queued', 'Requests waiting for an agent slot', ['priority'])
+LOAD_SHED_IN_FLIGHT = Gauge('load_shed_in_flight', 'Agent runs holding a slot')
+
+
+class LoadShedError(Exception):
+    """The request was shed - the client should retry later"""
+
+    def __init__(self, priority: str, reason: str):
+        super().__init__(f"Request shed ({priority} priority): {reason}")
+        self.priority = priority
+        self.reason = reason
+
+
+def request_priority(is_first_message: bool, tokens_remaining: int, max_tokens: int = MAX_TOKENS_PER_DAY) -> str:
+    """
+    Priority class for a chat request
+
+    Clients close to their daily token budget are low priority, whatever
+    they ask. Otherwise the first message of a conversation, or a client
+    with plenty of budget left, is high priority.
+    """
+    share = tokens_remaining / max_tokens if max_tokens > 0 else 1.0
+    if share < LOAD_SHED_LOW_BUDGET_SHARE:
+        return "low"
+    if is_first_message or share >= LOAD_SHED_HIGH_BUDGET_SHARE:
+        return "high"
+    return "normal"
+
+
+class LoadShedder:
+    """
+    Bounded concurrency for agent runs with a priority queue
+
+    Up to max_concurrent requests run at once. The others wait in a queue
+    of queue_size; a freed slot goes to the oldest waiter of the highest
+    class. When the queue is full, the newest waiter of a lower class than
+    the arrival is evicted to make room, otherwise the arrival is shed.
+    Waiters give up after their class's maximum wait, which is shortest
+    for low priority. Cache and FAQ hits are answered before the agents
+    and never reach the shedder.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = LOAD_SHED_MAX_CONCURRENT,
+        queue_size: int = LOAD_SHED_QUEUE_SIZE,
+        max_wait_ms: Optional[Dict[str, float]] = None,
+    ):
+        self.max_concurrent = max_concurrent
+        self.queue_size = queue_size
+        self.max_wait = {p: ms / 1000 for p, ms in (max_wait_ms or LOAD_SHED_MAX_WAIT_MS).items()}
+        self._active = 0
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {p: deque() for p in PRIORITIES}
+
+    @property
+    def queued(self) -> int:
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    @asynccontextmanager
+    async def slot(self, priority: str):
+        """Hold an agent slot for the duration of the block (raises LoadShedError)"""
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, priority: str):
+        start_time = time.perf_counter()
+        if self._active < self.max_concurrent and not self.queued:
+            self._admit(priority, start_time)
+            return
+
+        if self.queued >= self.queue_size and not self._evict_below(priority):
+            self._shed(priority, "queue_full")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(future)
+        LOAD_SHED_QUEUED.labels(priority=priority).inc()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.max_wait[priority])
+        except asyncio.TimeoutError:
+            self._dequeue(priority, future)
+            if not future.done():
+                future.cancel()
+                self._shed(priority, "timeout")
+            # Granted (or evicted) just as the wait ran out
+            future.result()
+        except LoadShedError:
+            LOAD_SHED_QUEUE_TIME.labels(priority=priority).observe(time.perf_counter() - start_time)
+            raise
+        except BaseException:
+            # Cancelled while waiting - pass on a slot that was handed to us
+            self._dequeue(priority, future)
+            if not future.done():
+                future.cancel()
+            elif future.exception() is None:
+                self.release()
+            raise
+
+        self._admit(priority, start_time, handed_over=True)
+
+    def release(self):
+        self._active -= 1
+        LOAD_SHED_IN_FLIGHT.set(self._active)
+        self._wake()
+
+    def _admit(self, priority: str, start_time: float, handed_over: bool = False):
+        # A handed-over slot was already counted by _wake
+        if not handed_over:
+            self._active += 1
+        LOAD_SHED_IN_FLIGHT.set(self._active)
+        LOAD_SHED_REQUESTS.labels(priority=priority, result="admitted").inc()
+        LOAD_SHED_QUEUE_TIME.labels(priority=priority).observe(time.perf_counter() - start_time)
+
+    def _shed(self, priority: str, reason: str):
+        LOAD_SHED_REQUESTS.labels(priority=priority, result=reason).inc()
+        logger.warning("request_shed", priority=priority, reason=reason, active=self._active, queued=self.queued)
+        raise LoadShedError(priority, reason)
+
+    def _dequeue(self, priority: str, future: asyncio.Future):
+        try:
+            self._waiters[priority].remove(future)
+            LOAD_SHED_QUEUED.labels(priority=priority).dec()
+        except ValueError:
+            pass
+
+    def _wake(self):
+        """Hand free slots to the highest-priority waiters"""
+        for priority in PRIORITIES:
+            waiters = self._waiters[priority]
+            while waiters and self._active < self.max_concurrent:
+                future = waiters.popleft()
+                LOAD_SHED_QUEUED.labels(priority=priority).dec()
+                if not future.done():
+                    self._active += 1
+                    future.set_result(None)
+
+    def _evict_below(self, priority: str) -> bool:
+        """Shed the newest waiter of a lower class than priority; False if there is none"""
+        for lower in reversed(PRIORITIES[PRIORITIES.index(priority) + 1:]):
+            waiters = self._waiters[lower]
+            while waiters:
+                future = waiters.pop()
+                LOAD_SHED_QUEUED.labels(priority=lower).dec()
+                if not future.done():
+                    LOAD_SHED_REQUESTS.labels(priority=lower, result="evicted").inc()
+                    logger.warning("request_shed", priority=lower, reason="evicted", active=self._active, queued=self.queued)
+                    future.set_exception(LoadShedError(lower, "evicted"))
+                    return True
+        return False
+
+
+_shedder: Optional[LoadShedder] = None
+
+
+def get_load_shedder() -> Optional[LoadShedder]:
+    """Get the process-wide load shedder (None when LOAD_SHED_ENABLED is off)"""
+    global _shedder
+    if _shedder is None and LOAD_SHED_ENABLED:
+        _shedder = LoadShedder()
+    return _shedder
@@ -1,42 +1,157 @@
 """Rate limiting for chatbot API"""
 
+import asyncio
 import redis.asyncio as redis
-from datetime import datetime, timedelta
-from typing import Tuple, Dict
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Tuple, Dict, Optional
+import ipaddress
 import structlog
 import os
+import struct
+import time
+from prometheus_client import Counter, Gauge
 
 logger = structlog.get_logger()
 
 # Configuration
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-MAX_TOKENS_PER_DAY = int(os.getenv("MAX_TOKENS_PER_DAY", "50"))
+MAX_TOKENS_PER_DAY = int(os.getenv("MAX_TOKENS_PER_DAY", "20000"))
 MAX_REQUESTS_PER_MINUTE = int(os.getenv("MAX_REQUESTS_PER_MINUTE", "3"))
 MAX_MESSAGES_PER_DAY = int(os.getenv("MAX_MESSAGES_PER_DAY", "10"))
-
-
-def get_client_ip(request) -> str:
-    """Extract client IP from request"""
-    # Check for X-Forwarded-For header (behind proxy/load balancer)
-    forwarded = request.headers.get("X-Forwarded-For")
-    if forwarded:
-        return forwarded.split(",")[0].strip()
-
-    # Check for X-Real-IP header
-    real_ip = request.headers.get("X-Real-IP")
-    if real_ip:
-        return real_ip
-
-    # Fallback to direct client IP
-    return request.client.host
+# Usage snapshots served without Redis for this long (per client, in-process)
+USAGE_CACHE_TTL_MS = float(os.getenv("USAGE_CACHE_TTL_MS", "5000"))
+USAGE_CACHE_SIZE = int(os.getenv("USAGE_CACHE_SIZE", "10000"))
+# How often the background task refreshes the Redis gauges
+RATE_LIMIT_METRICS_INTERVAL_SECONDS = float(os.getenv("RATE_LIMIT_METRICS_INTERVAL_SECONDS", "30"))
+
+# Metrics - Redis memory against the number of real clients
+RATE_LIMIT_CLIENTS = Gauge('rate_limit_clients_today', 'Distinct clients rate limited today (HyperLogLog estimate)')
+REDIS_USED_MEMORY = Gauge('redis_used_memory_bytes', 'Memory used by the rate-limit Redis')
+USAGE_CACHE_LOOKUPS = Counter('rate_limit_usage_cache_total', 'Usage lookups by cache result', ['result'])
+
+# Hash fields of a client-day key; the per-minute request counter is the
+# minute of the day (bounded by MAX_MESSAGES_PER_DAY - only admitted requests count)
+FIELD_TOKENS = "t"
+FIELD_MESSAGES = "n"
+FIELD_LAST_REQUEST = "l"  # epoch seconds
+# Keys outlive the day by this much so late usage recording still lands
+KEY_GRACE_SECONDS = 3600
+
+
+@lru_cache(maxsize=4096)
+def _client_bytes(client: str) -> bytes:
+    """Packed client identity: 4 bytes for IPv4, 8 for an IPv6 /64"""
+    try:
+        if "/" in client:
+            network = ipaddress.ip_network(client)
+            return b"6" + network.network_address.packed[:(network.prefixlen + 7) // 8]
+        address = ipaddress.ip_address(client)
+        return (b"4" if address.version == 4 else b"6") + address.packed
+    except ValueError:
+        return b"s" + client.encode()
+
+
+def usage_key(client: str, day: date) -> bytes:
+    """rl:<packed client><day> - e.g. 10 bytes for an IPv4 client"""
+    return b"rl:" + _client_bytes(client) + struct.pack(">H", day.toordinal() & 0xFFFF)
+
+
+def minute_field(now: datetime) -> str:
+    return str(now.hour * 60 + now.minute)
+
+
+def key_expiry(day: date) -> int:
+    """End of day (local time, like the day in the key) plus grace"""
+    return int(datetime.combine(day + timedelta(days=1), datetime.min.time()).timestamp()) + KEY_GRACE_SECONDS
+
+
+def usage_snapshot(
+    tokens_used: int,
+    messages_today: int,
+    requests_this_minute: int,
+    last_request: Optional[datetime] = None,
+) -> Dict:
+    """Usage dict as returned by RateLimiter.get_usage"""
+    return {
+        "tokens_used": tokens_used,
+        "tokens_remaining": MAX_TOKENS_PER_DAY - tokens_used,
+        "requests_today": messages_today,
+        "requests_this_minute": requests_this_minute,
+        "last_request": last_request,
+        "is_rate_limited": (
+            tokens_used >= MAX_TOKENS_PER_DAY
+            or messages_today >= MAX_MESSAGES_PER_DAY
+            or requests_this_minute >= MAX_REQUESTS_PER_MINUTE
+        ),
+    }
+
+
+class UsageCache:
+    """
+    Short-lived per-client usage snapshots (LRU)
+
+    Filled by the limiter's own reads and writes, so the usage endpoint and
+    the usage attached to chat responses rarely need Redis. Writes from
+    other replicas show up once an entry expires.
+    """
+
+    def __init__(self, ttl_ms: float = USAGE_CACHE_TTL_MS, max_entries: int = USAGE_CACHE_SIZE):
+        self.ttl = ttl_ms / 1000
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+
+    def get(self, client: str) -> Optional[Dict]:
+        entry = self._entries.get(client)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._entries[client]
+            return None
+        self._entries.move_to_end(client)
+        return entry[1]
+
+    def put(self, client: str, usage: Dict):
+        if self.ttl <= 0:
+            return
+        self._entries[client] = (time.monotonic() + self.ttl, usage)
+        self._entries.move_to_end(client)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def add_tokens(self, client: str, tokens: int):
+        """Apply recorded usage to a cached snapshot (keeps its expiry)"""
+        usage = self.get(client)
+        if usage is not None:
+            self._entries[client] = (self._entries[client][0], usage_snapshot(
+                usage["tokens_used"] + tokens,
+                usage["requests_today"],
+                usage["requests_this_minute"],
+                usage["last_request"],
+            ))
+
+    def discard(self, client: str):
+        self._entries.pop(client, None)
 
 
 class RateLimiter:
-    """Redis-based rate limiter for chatbot"""
+    """
+    Redis-based rate limiter for chatbot
+
+    Each client has one small hash per day holding all its counters
+    (tokens, messages, requests per minute), under a short binary key with
+    a single expiry at the end of the day. A check is one HMGET plus one
+    pipelined write; get_usage is one HGETALL, or none when the client's
+    snapshot is in the usage cache. The Redis gauges are refreshed by a
+    background task (start_metrics), never on the request path.
+    """
 
     def __init__(self):
         self.redis_client = None
         self._initialized = False
+        self._metrics_task: Optional[asyncio.Task] = None
+        self.usage_cache = UsageCache()
 
     async def _get_redis(self) -> redis.Redis:
         """Get or create Redis connection"""
@@ -67,38 +182,42 @@ class RateLimiter:
         try:
             redis_client = await self._get_redis()
 
-            # Keys for different rate limits
-            tokens_key = f"tokens:{ip_address}:{datetime.now().date()}"
-            requests_minute_key = f"requests_minute:{ip_address}:{datetime.now().strftime('%Y-%m-%d-%H-%M')}"
-            messages_day_key = f"messages:{ip_address}:{datetime.now().date()}"
+            now = datetime.now()
+            key = usage_key(ip_address, now.date())
+            minute = minute_field(now)
 
-            # Check tokens per day
-            tokens_used = int(await redis_client.get(tokens_key) or 0)
+            tokens_used, messages_today, requests_this_minute = (
+                int(value or 0) for value in await redis_client.hmget(key, FIELD_TOKENS, FIELD_MESSAGES, minute)
+            )
             tokens_remaining = MAX_TOKENS_PER_DAY - tokens_used
 
+            # Check tokens per day
             if tokens_used >= MAX_TOKENS_PER_DAY:
                 return False, 0, "Daily token limit exceeded"
 
             # Check requests per minute
-            requests_this_minute = int(await redis_client.get(requests_minute_key) or 0)
-
             if requests_this_minute >= MAX_REQUESTS_PER_MINUTE:
                 return False, tokens_remaining, "Too many requests per minute"
 
             # Check messages per day
-            messages_today = int(await redis_client.get(messages_day_key) or 0)
-
             if messages_today >= MAX_MESSAGES_PER_DAY:
                 return False, tokens_remaining, "Daily message limit exceeded"
 
-            # Increment request counter
-            await redis_client.incr(requests_minute_key)
-            await redis_client.expire(requests_minute_key, 60)
-
-            # Increment message counter
-            await redis_client.incr(messages_day_key)
-            await redis_client.expire(messages_day_key, 86400)  # 24 hours
-
+            # Count the request - one round trip for all counters
+            clients_key = f"clients:{now.date()}"
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.hincrby(key, FIELD_MESSAGES, 1)
+                pipe.hincrby(key, minute, 1)
+                pipe.hset(key, FIELD_LAST_REQUEST, int(now.timestamp()))
+                pipe.expireat(key, key_expiry(now.date()))
+                # Distinct clients per day, in ~12 KB whatever their number
+                pipe.pfadd(clients_key, ip_address)
+                pipe.expire(clients_key, 2 * 86400)
+                await pipe.execute()
+
+            self.usage_cache.put(ip_address, usage_snapshot(
+                tokens_used, messages_today + 1, requests_this_minute + 1, now.replace(microsecond=0)
+            ))
             return True, tokens_remaining, "OK"
 
         except Exception as e:
@@ -106,16 +225,53 @@ class RateLimiter:
             # Fail open in case of Redis errors
             return True, MAX_TOKENS_PER_DAY, "OK"
 
+    async def refresh_metrics(self):
+        """Update the Redis gauges (each independently - INFO may be disabled on managed Redis)"""
+        redis_client = await self._get_redis()
+        try:
+            RATE_LIMIT_CLIENTS.set(await redis_client.pfcount(f"clients:{datetime.now().date()}"))
+        except Exception as e:
+            logger.warning("rate_limit_metrics_failed", metric="clients", error=str(e))
+
+        try:
+            memory = await redis_client.info("memory")
+            REDIS_USED_MEMORY.set(memory.get("used_memory", 0))
+        except Exception as e:
+            logger.warning("rate_limit_metrics_failed", metric="used_memory", error=str(e))
+
+    async def _metrics_loop(self, interval: float):
+        while True:
+            await self.refresh_metrics()
+            await asyncio.sleep(interval)
+
+    def start_metrics(self, interval: float = RATE_LIMIT_METRICS_INTERVAL_SECONDS):
+        """Start refreshing the Redis gauges on the running event loop"""
+        if self._metrics_task is None:
+            self._metrics_task = asyncio.create_task(self._metrics_loop(interval))
+
+    async def stop_metrics(self):
+        if self._metrics_task is not None:
+            self._metrics_task.cancel()
+            try:
+                await self._metrics_task
+            except asyncio.CancelledError:
+                pass
+            self._metrics_task = None
+
     async def record_usage(self, ip_address: str, tokens_used: int):
         """Record token usage for an IP address"""
         try:
             redis_client = await self._get_redis()
 
-            tokens_key = f"tokens:{ip_address}:{datetime.now().date()}"
+            today = datetime.now().date()
+            key = usage_key(ip_address, today)
 
             # Increment token count
-            await redis_client.incrby(tokens_key, tokens_used)
-            await redis_client.expire(tokens_key, 86400)  # 24 hours
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.hincrby(key, FIELD_TOKENS, tokens_used)
+                pipe.expireat(key, key_expiry(today))
+                await pipe.execute()
+            self.usage_cache.add_tokens(ip_address, tokens_used)
 
             logger.info(
                 "usage_recorded",
@@ -127,52 +283,40 @@ class RateLimiter:
             logger.error("record_usage_failed", error=str(e))
 
     async def get_usage(self, ip_address: str) -> Dict:
-        """Get current usage statistics for an IP"""
+        """Get current usage statistics for an IP (cached for USAGE_CACHE_TTL_MS)"""
+        usage = self.usage_cache.get(ip_address)
+        USAGE_CACHE_LOOKUPS.labels(result="hit" if usage is not None else "miss").inc()
+        if usage is not None:
+            # Callers may update their copy (the WebSocket session does)
+            return dict(usage)
+
         try:
             redis_client = await self._get_redis()
 
-            tokens_key = f"tokens:{ip_address}:{datetime.now().date()}"
-            messages_day_key = f"messages:{ip_address}:{datetime.now().date()}"
-            requests_minute_key = f"requests_minute:{ip_address}:{datetime.now().strftime('%Y-%m-%d-%H-%M')}"
-
-            tokens_used = int(await redis_client.get(tokens_key) or 0)
-            messages_today = int(await redis_client.get(messages_day_key) or 0)
-            requests_this_minute = int(await redis_client.get(requests_minute_key) or 0)
-
-            return {
-                "tokens_used": tokens_used,
-                "tokens_remaining": MAX_TOKENS_PER_DAY - tokens_used,
-                "requests_today": messages_today,
-                "requests_this_minute": requests_this_minute,
-                "is_rate_limited": (
-                    tokens_used >= MAX_TOKENS_PER_DAY
-                    or messages_today >= MAX_MESSAGES_PER_DAY
-                    or requests_this_minute >= MAX_REQUESTS_PER_MINUTE
-                ),
-            }
+            now = datetime.now()
+            fields = await redis_client.hgetall(usage_key(ip_address, now.date()))
+
+            last_request = fields.get(FIELD_LAST_REQUEST)
+            usage = usage_snapshot(
+                int(fields.get(FIELD_TOKENS, 0)),
+                int(fields.get(FIELD_MESSAGES, 0)),
+                int(fields.get(minute_field(now), 0)),
+                datetime.fromtimestamp(int(last_request)) if last_request else None,
+            )
+            self.usage_cache.put(ip_address, usage)
+            return dict(usage)
 
         except Exception as e:
             logger.error("get_usage_failed", error=str(e))
-            return {
-                "tokens_used": 0,
-                "tokens_remaining": MAX_TOKENS_PER_DAY,
-                "requests_today": 0,
-                "requests_this_minute": 0,
-                "is_rate_limited": False,
-            }
+            return usage_snapshot(0, 0, 0)
 
     async def reset_usage(self, ip_address: str):
         """Reset usage for an IP (for testing)"""
         try:
             redis_client = await self._get_redis()
 
-            tokens_key = f"tokens:{ip_address}:{datetime.now().date()}"
-            messages_day_key = f"messages:{ip_address}:{datetime.now().date()}"
-            requests_minute_key = f"requests_minute:{ip_address}:{datetime.now().strftime('%Y-%m-%d-%H-%M')}"
-
-            await redis_client.delete(tokens_key)
-            await redis_client.delete(messages_day_key)
-            await redis_client.delete(requests_minute_key)
+            await redis_client.delete(usage_key(ip_address, datetime.now().date()))
+            self.usage_cache.discard(ip_address)
 
             logger.info("usage_reset", ip=ip_address)
 
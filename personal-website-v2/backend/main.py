@@ -5,26 +5,67 @@ FastAPI application with multi-agent RAG chatbot
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
+import asyncio
+import os
 import structlog
 from prometheus_client import Counter, Histogram, make_asgi_app
 import time
 
-from api import chat, health
-from guardrails.rate_limiter import RateLimiter
-from guardrails.content_filter import ContentFilter
+from utils.logging_config import configure_logging
+
+# Setup logging - before the imports below, which log while initializing
+configure_logging()
+
+from api import admin, chat, chat_ws, health
+from api.cors import CORS_ORIGINS
+from agents.knowledge_base import KB_WATCH_ENABLED, get_knowledge_base
+from agents.query_log import CACHE_WARM_ENABLED, QUERY_LOG_ENABLED, get_query_log, warm_caches
+from utils.analytics import start_analytics, stop_analytics
+from utils.compression import COMPRESSION_ENABLED, CompressionMiddleware
 
-# Setup logging
 logger = structlog.get_logger()
 
+# Configuration - a failed agent build is retried with capped exponential backoff
+AGENT_STARTUP_RETRY_BASE_SECONDS = float(os.getenv("AGENT_STARTUP_RETRY_BASE_SECONDS", "1"))
+AGENT_STARTUP_RETRY_MAX_SECONDS = float(os.getenv("AGENT_STARTUP_RETRY_MAX_SECONDS", "60"))
+
 # Metrics
 REQUEST_COUNT = Counter('api_requests_total', 'Total API requests', ['endpoint', 'method', 'status'])
 REQUEST_DURATION = Histogram('api_request_duration_seconds', 'API request duration', ['endpoint'])
 
-# Initialize guardrails
-rate_limiter = RateLimiter()
-content_filter = ContentFilter()
+
+async def start_agents(query_log):
+    """
+    Build the agents in the background, then warm caches
+
+    Importing LangChain and the provider SDKs and constructing the agents
+    takes seconds; doing it here instead of at import time lets the server
+    bind and answer liveness probes immediately. Readiness reports 503 and
+    chat endpoints reject requests until the agents are built. A failed
+    build (provider endpoint not up yet, bad config) is retried with
+    backoff, so the pod recovers without a restart and stays unready while
+    it cannot.
+    """
+    start_time = time.perf_counter()
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            await asyncio.to_thread(chat.init_agents)
+            break
+        except Exception as e:
+            delay = min(AGENT_STARTUP_RETRY_BASE_SECONDS * 2 ** (attempt - 1), AGENT_STARTUP_RETRY_MAX_SECONDS)
+            logger.error("agent_startup_failed", attempt=attempt, retry_in=delay, error=str(e), exc_info=True)
+            await asyncio.sleep(delay)
+
+    health.mark_ready()
+    logger.info("agents_ready", duration=time.perf_counter() - start_time, attempts=attempt)
+
+    # Replay popular questions so caches are warm for real traffic
+    if CACHE_WARM_ENABLED:
+        await warm_caches(chat.supervisor_agent, query_log)
 
 
 @asynccontextmanager
@@ -32,8 +73,30 @@ async def lifespan(app: FastAPI):
     """Lifecycle management for the application"""
     logger.info("Starting up Edson's Personal Website API")
     # Startup logic here (e.g., initialize DB, load models)
+    knowledge_base = get_knowledge_base()
+    if KB_WATCH_ENABLED:
+        # Pick up knowledge base edits without restarting the process
+        knowledge_base.start_watcher()
+
+    query_log = get_query_log()
+    if QUERY_LOG_ENABLED:
+        query_log.start()
+
+    # Chat events are written to PostgreSQL in batches off the event loop
+    start_analytics()
+
+    # Redis gauges for /metrics, refreshed off the request path
+    chat.rate_limiter.start_metrics()
+
+    startup_task = asyncio.create_task(start_agents(query_log))
+
     yield
     # Shutdown logic here
+    startup_task.cancel()
+    await chat.rate_limiter.stop_metrics()
+    await query_log.stop()
+    await asyncio.to_thread(stop_analytics)
+    await knowledge_base.stop_watcher()
     logger.info("Shutting down Edson's Personal Website API")
 
 
@@ -43,6 +106,7 @@ app = FastAPI(
     description="Backend API for AI-powered personal portfolio with multi-agent RAG chatbot",
     version="2.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Add Prometheus metrics endpoint
@@ -52,16 +116,16 @@ app.mount("/metrics", metrics_app)
 # CORS Configuration
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",  # Local development
-        "https://edsonzandamela.com",  # Production
-        "https://www.edsonzandamela.com",
-    ],
+    allow_origins=CORS_ORIGINS,  # Local development and production by default
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE"],
     allow_headers=["*"],
 )
 
+# Response compression (gzip; brotli when installed)
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
 
 # Request logging middleware
 @app.middleware("http")
@@ -99,6 +163,8 @@ async def log_requests(request: Request, call_next):
 # Include routers
 app.include_router(health.router, prefix="/api", tags=["health"])
 app.include_router(chat.router, prefix="/api", tags=["chat"])
+app.include_router(chat_ws.router, prefix="/api", tags=["chat"])
+app.include_router(admin.router, prefix="/admin", tags=["admin"])
 
 
 @app.get("/")
@@ -126,9 +192,10 @@ async def http_exception_handler(request: Request, exc: HTTPException):
         status_code=exc.status_code,
         detail=exc.detail,
     )
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={"error": exc.detail},
+        headers=exc.headers,
     )
 
 
@@ -141,7 +208,7 @@ async def general_exception_handler(request: Request, exc: Exception):
         exception=str(exc),
         exc_info=True,
     )
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={"error": "Internal server error"},
     )
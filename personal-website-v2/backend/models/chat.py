@@ -5,6 +5,13 @@ from typing import Optional, List
 from datetime import datetime
 
 
+def clean_message(v: str) -> str:
+    """Strip a user message, rejecting one that is only whitespace"""
+    if not v.strip():
+        raise ValueError("Message cannot be empty")
+    return v.strip()
+
+
 class ChatMessage(BaseModel):
     """Single chat message"""
     role: str = Field(..., description="Message role (user/assistant/system)")
@@ -22,9 +29,7 @@ class ChatRequest(BaseModel):
     @classmethod
     def validate_message(cls, v: str) -> str:
         """Validate message content"""
-        if not v.strip():
-            raise ValueError("Message cannot be empty")
-        return v.strip()
+        return clean_message(v)
 
     @field_validator('language')
     @classmethod
@@ -35,6 +40,16 @@ class ChatRequest(BaseModel):
         return v
 
 
+class TokenUsage(BaseModel):
+    """Token usage information"""
+    ip_address: str
+    tokens_used_today: int
+    tokens_remaining: int
+    requests_today: int
+    last_request: Optional[datetime] = None  # None before the first request today
+    is_rate_limited: bool
+
+
 class ChatResponse(BaseModel):
     """Chat API response"""
     message: str = Field(..., description="Assistant response")
@@ -44,16 +59,50 @@ class ChatResponse(BaseModel):
     agent_used: Optional[str] = Field(None, description="Which agent handled the request")
     confidence: Optional[float] = Field(None, description="Confidence score (0-1)")
     is_on_topic: bool = Field(True, description="Whether question was on-topic")
+    usage: Optional[TokenUsage] = Field(None, description="Client's usage after this request")
 
 
-class TokenUsage(BaseModel):
-    """Token usage information"""
-    ip_address: str
-    tokens_used_today: int
-    tokens_remaining: int
-    requests_today: int
-    last_request: datetime
-    is_rate_limited: bool
+class BatchChatQuery(BaseModel):
+    """One query of a batch"""
+    id: Optional[str] = Field(None, description="Caller-supplied ID echoed in the result")
+    message: str = Field(..., min_length=1, max_length=1000, description="User message")
+    language: str = Field("en", description="Language (en/pt)")
+
+    @field_validator('message')
+    @classmethod
+    def validate_message(cls, v: str) -> str:
+        """Validate message content"""
+        return clean_message(v)
+
+    @field_validator('language')
+    @classmethod
+    def validate_language(cls, v: str) -> str:
+        """Validate language"""
+        if v not in ['en', 'pt']:
+            raise ValueError("Language must be 'en' or 'pt'")
+        return v
+
+
+class BatchChatRequest(BaseModel):
+    """Batch chat request (admin only)"""
+    queries: List[BatchChatQuery] = Field(..., min_length=1, max_length=500)
+    concurrency: int = Field(4, ge=1, le=32, description="Queries processed at once")
+    use_faq: bool = Field(True, description="Answer FAQ matches from the precomputed table")
+    use_cache: bool = Field(False, description="Read and fill the response cache shared with interactive chat (cache warming)")
+
+
+class BatchChatResult(BaseModel):
+    """One NDJSON line of a batch response"""
+    index: int = Field(..., description="Position of the query in the request")
+    id: Optional[str] = None
+    route: str
+    message: str
+    agent_used: str
+    tier: Optional[str] = None
+    tokens_used: int
+    confidence: float
+    is_safe: bool = Field(True, description="Whether the answer passed output validation")
+    latency_ms: float
 
 
 class GuardrailViolation(BaseModel):
@@ -0,0 +1,42 @@
+"""Shared test setup - the deterministic mock LLM and an in-memory Redis"""
+
+import os
+
+# Read at import time by the modules under test
+os.environ.setdefault("LLM_PROVIDER", "mock")
+os.environ.setdefault("MOCK_LLM_TTFT_MS", "1")
+os.environ.setdefault("MOCK_LLM_CLASSIFIER_TTFT_MS", "1")
+os.environ.setdefault("MOCK_LLM_TOKENS_PER_SEC", "100000")
+os.environ.setdefault("MOCK_LLM_FAILURE_RATE", "0")
+os.environ.setdefault("REDIS_URL", "redis://127.0.0.1:1/0")
+os.environ.setdefault("ANALYTICS_ENABLED", "false")
+
+import pytest  # noqa: E402
+
+from benchmarks.guardrails_bench import FakeRedis  # noqa: E402
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
+
+
+@pytest.fixture(scope="session")
+def agents():
+    """Build the content filter and agents once (mock provider)"""
+    from api import chat
+
+    if not chat.agents_ready():
+        chat.init_agents()
+    return chat
+
+
+@pytest.fixture
+def app(agents, fake_redis):
+    """The FastAPI app with agents built and a fresh in-memory Redis"""
+    import main
+    from guardrails.rate_limiter import UsageCache
+
+    agents.rate_limiter.redis_client = fake_redis
+    agents.rate_limiter.usage_cache = UsageCache()
+    return main.app
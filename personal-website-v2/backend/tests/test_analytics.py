@@ -0,0 +1,126 @@
+"""Write-behind chat analytics (utils.analytics)"""
+
+import time
+
+import pytest
+from sqlalchemy import MetaData, create_engine, select
+
+from utils import analytics
+from utils.analytics import ANALYTICS_EVENTS_DROPPED, AnalyticsWriter, ChatEvent, chat_events_table, record_chat_event
+from utils.stage_timer import StageTimer
+
+
+def dropped(reason: str) -> float:
+    return ANALYTICS_EVENTS_DROPPED.labels(reason=reason)._value.get()
+
+
+def event(**fields) -> ChatEvent:
+    return ChatEvent(**{"transport": "http", "status": "answered", "language": "en", **fields})
+
+
+class RecordingWriter(AnalyticsWriter):
+    """Keeps each flushed batch instead of writing it"""
+
+    def __init__(self, **kwargs):
+        super().__init__(database_url="unused", **kwargs)
+        self.batches = []
+
+    def _flush(self, batch):
+        self.batches.append(list(batch))
+
+
+def test_events_are_written_in_batches():
+    writer = RecordingWriter(batch_size=3, flush_ms=60_000)
+    writer.start()
+    for index in range(7):
+        writer.submit(event(tokens_used=index))
+    writer.close()
+
+    assert [len(batch) for batch in writer.batches] == [3, 3, 1]
+    assert [e.tokens_used for batch in writer.batches for e in batch] == list(range(7))
+
+
+def test_partial_batch_is_flushed_after_flush_interval():
+    writer = RecordingWriter(batch_size=100, flush_ms=20)
+    writer.start()
+    writer.submit(event())
+    deadline = time.monotonic() + 5
+    while not writer.batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(writer.batches) == 1
+    writer.close()
+
+
+def test_full_queue_drops_events():
+    writer = RecordingWriter(maxsize=1)  # not started - nothing drains the queue
+    before = dropped("queue_full")
+    writer.submit(event())
+    writer.submit(event())
+    assert dropped("queue_full") - before == 1
+
+
+def test_events_reach_the_database(tmp_path):
+    url = f"sqlite:///{tmp_path / 'analytics.db'}"
+    writer = AnalyticsWriter(url, batch_size=2, flush_ms=60_000)
+    writer.start()
+    writer.submit(event(query="Where does Edson work?", agent_used="career_agent", stage_ms={"agent": 12.5}))
+    writer.submit(event(status="off_topic", is_on_topic=False))
+    writer.submit(event(status="failed"))
+    writer.close()
+
+    metadata = MetaData()
+    table = chat_events_table(metadata)
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        rows = conn.execute(select(table).order_by(table.c.id)).mappings().all()
+    engine.dispose()
+
+    assert [row["status"] for row in rows] == ["answered", "off_topic", "failed"]
+    assert rows[0]["query"] == "Where does Edson work?"
+    assert rows[0]["stage_ms"] == {"agent": 12.5}
+
+
+def test_unreachable_database_drops_the_batch(tmp_path):
+    writer = AnalyticsWriter(f"sqlite:///{tmp_path / 'missing' / 'analytics.db'}", flush_ms=60_000)
+    before = dropped("write_failed")
+    writer.start()
+    writer.submit(event())
+    writer.submit(event())
+    writer.close()
+    assert dropped("write_failed") - before == 2
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    """Events record_chat_event queues (writer not started)"""
+    writer = RecordingWriter()
+    monkeypatch.setattr(analytics, "_writer", writer)
+
+    def events():
+        return [writer._queue.get_nowait() for _ in range(writer._queue.qsize())]
+    return events
+
+
+def test_record_chat_event(queued):
+    timer = StageTimer()
+    timer.durations.update({"rate_limit": 0.001, "agent": 0.25})
+    record_chat_event("websocket", "answered", "Where does Edson work?", "en", timer, answer="At Apple.", agent_used="career_agent")
+    record_chat_event("http", "answered", "How can I contact Edson?", "en", timer, agent_used="faq")
+
+    career, faq = queued()
+    assert career.route == "career" and not career.faq_hit
+    assert career.latency_ms == 251.0
+    assert career.stage_ms == {"rate_limit": 1.0, "agent": 250.0}
+    assert faq.route is None and faq.faq_hit
+
+
+def test_transcripts_can_be_left_out(queued, monkeypatch):
+    monkeypatch.setattr(analytics, "ANALYTICS_STORE_TRANSCRIPTS", False)
+    record_chat_event("http", "answered", "Where does Edson work?", "en", StageTimer(), answer="At Apple.")
+    (stored,) = queued()
+    assert stored.query is None and stored.answer is None
+
+
+def test_disabled_analytics_record_nothing(monkeypatch):
+    monkeypatch.setattr(analytics, "_writer", None)
+    record_chat_event("http", "answered", "Where does Edson work?", "en", StageTimer())
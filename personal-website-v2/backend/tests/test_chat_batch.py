@@ -0,0 +1,69 @@
+"""Admin batch chat endpoint (POST /api/chat/batch)"""
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from guardrails import admin_auth
+from models.chat import BatchChatQuery
+
+TOKEN = "test-admin-token"
+
+
+@pytest.fixture
+def client(app, monkeypatch) -> TestClient:
+    monkeypatch.setattr(admin_auth, "ADMIN_TOKEN", TOKEN)
+    return TestClient(app)
+
+
+def batch(client, queries, token=TOKEN, **options):
+    return client.post("/api/chat/batch", json={"queries": queries, **options}, headers={"X-Admin-Token": token})
+
+
+def test_batch_requires_admin_token(app, client):
+    assert batch(client, [{"message": "Where does Edson work?"}], token="wrong").status_code == 401
+    assert batch(TestClient(app), [{"message": "Where does Edson work?"}], token="").status_code == 401
+
+
+def test_batch_is_closed_without_admin_token(app, monkeypatch):
+    monkeypatch.setattr(admin_auth, "ADMIN_TOKEN", "")
+    assert batch(TestClient(app), [{"message": "Where does Edson work?"}]).status_code == 403
+
+
+def test_batch_queries_are_stripped_and_rejected_when_blank():
+    assert BatchChatQuery(message="  Where does Edson work?  ").message == "Where does Edson work?"
+    with pytest.raises(ValidationError, match="Message cannot be empty"):
+        BatchChatQuery(message="   ")
+
+
+def test_blank_query_rejects_the_batch(client):
+    response = batch(client, [{"message": "Where does Edson work?"}, {"message": " \n "}])
+    assert response.status_code == 422
+
+
+def test_results_stream_as_ndjson_grouped_by_route(client):
+    queries = [
+        {"id": "career-1", "message": "Which companies did Edson hold a role at before Apple?"},
+        {"id": "technical-1", "message": "Which Terraform tools does Edson use for batch jobs?"},
+        {"id": "career-2", "message": "What position did Edson hold at Arcaea in batch testing?"},
+        {"id": "faq", "message": "How can I contact Edson?"},
+        {"id": "technical-2", "message": "Which Kubernetes projects did Edson ship for batch evaluation?"},
+        {"id": "career-3", "message": "What job did Edson do at Anagenex for batch review?"},
+    ]
+    response = batch(client, queries, concurrency=2)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    results = [orjson.loads(line) for line in response.text.splitlines()]
+
+    assert sorted(result["index"] for result in results) == list(range(len(queries)))
+    for result in results:
+        assert result["id"] == queries[result["index"]]["id"]
+        assert result["is_safe"]
+        assert result["route"] == result["id"].split("-")[0]
+    assert next(result for result in results if result["id"] == "faq")["tokens_used"] == 0
+
+    # Answered one route group at a time, largest first
+    routes = [result["route"] for result in results]
+    assert routes == ["career"] * 3 + ["technical"] * 2 + ["faq"]
@@ -0,0 +1,85 @@
+"""WebSocket chat sessions (api.chat_ws)"""
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from api import chat_ws
+
+
+def connect(app, **kwargs):
+    return TestClient(app).websocket_connect("/api/chat/ws", **kwargs)
+
+
+def receive_until(ws, *types):
+    frames = []
+    while not frames or frames[-1]["type"] not in types:
+        frames.append(ws.receive_json())
+    return frames
+
+
+def test_session_starts_with_usage(app):
+    with connect(app) as ws:
+        frame = ws.receive_json()
+    assert frame["type"] == "session"
+    assert frame["usage"]["tokens_used_today"] == 0
+    assert not frame["usage"]["is_rate_limited"]
+
+
+def test_ping_and_bad_frames_keep_the_session_open(app):
+    with connect(app) as ws:
+        ws.receive_json()
+        ws.send_text("not json")
+        assert ws.receive_json() == {"type": "error", "code": 400, "detail": "Expected a JSON object"}
+        ws.send_json({"type": "subscribe"})
+        assert ws.receive_json()["detail"] == "Unknown message type: subscribe"
+        ws.send_json({"type": "chat", "message": "   "})
+        assert ws.receive_json()["code"] == 422
+        ws.send_json({"type": "ping"})
+        assert ws.receive_json()["type"] == "pong"
+
+
+def test_answer_is_streamed_then_usage_pushed(app):
+    with connect(app) as ws:
+        ws.receive_json()
+        ws.send_json({"type": "chat", "message": "Which cloud platforms has Edson deployed models to?", "language": "en"})
+        frames = receive_until(ws, "end")
+        usage = ws.receive_json()
+
+    assert frames[0]["type"] == "start"
+    tokens = [frame["text"] for frame in frames if frame["type"] == "token"]
+    end = frames[-1]
+    assert tokens and "".join(tokens) == end["message"]
+    assert end["is_on_topic"] and end["tokens_used"] > 0
+    assert "agent" in end["timing"]
+    # Pushed from the session's own state - no extra round trip
+    assert usage["type"] == "usage"
+    assert usage["tokens_used_today"] == end["tokens_used"]
+
+
+def test_exhausted_limits_are_refused_without_redis(app, agents, monkeypatch):
+    async def no_redis(*args, **kwargs):
+        raise AssertionError("locally limited messages must not reach Redis")
+
+    monkeypatch.setattr(chat_ws, "MAX_REQUESTS_PER_MINUTE", 0)
+    monkeypatch.setattr(agents.rate_limiter, "check_rate_limit", no_redis)
+    with connect(app) as ws:
+        assert ws.receive_json()["usage"]["is_rate_limited"]
+        ws.send_json({"type": "chat", "message": "Where does Edson work?"})
+        error = ws.receive_json()
+        usage = ws.receive_json()
+
+    assert error == {"type": "error", "code": 429, "detail": "Rate limit exceeded: Too many requests per minute"}
+    assert usage["type"] == "usage" and usage["is_rate_limited"]
+
+
+def test_foreign_origin_is_refused(app):
+    with pytest.raises(WebSocketDisconnect) as excinfo:
+        with connect(app, headers={"Origin": "https://evil.example"}) as ws:
+            ws.receive_json()
+    assert excinfo.value.code == chat_ws.CLOSE_POLICY_VIOLATION
+
+
+def test_allowed_origin_is_accepted(app):
+    with connect(app, headers={"Origin": "http://localhost:3000"}) as ws:
+        assert ws.receive_json()["type"] == "session"
@@ -0,0 +1,90 @@
+"""Client identity behind trusted proxies (guardrails.client_identity)"""
+
+import ipaddress
+from types import SimpleNamespace
+
+import pytest
+
+from guardrails.client_identity import ClientResolver, TrustedProxies, _parse, client_key
+
+PROXIES = ["10.0.0.0/8", "127.0.0.1/32", "fc00::/7"]
+
+
+@pytest.fixture
+def resolver() -> ClientResolver:
+    return ClientResolver(PROXIES)
+
+
+def request(peer, forwarded_for=None, real_ip=None):
+    headers = {}
+    if forwarded_for is not None:
+        headers["x-forwarded-for"] = forwarded_for
+    if real_ip is not None:
+        headers["x-real-ip"] = real_ip
+    return SimpleNamespace(client=SimpleNamespace(host=peer) if peer else None, headers=headers)
+
+
+def test_trusted_proxies_membership():
+    trusted = TrustedProxies(PROXIES + ["not-a-cidr", " "])
+    assert ipaddress.ip_address("10.1.2.3") in trusted
+    assert ipaddress.ip_address("127.0.0.1") in trusted
+    assert ipaddress.ip_address("fd00::1") in trusted
+    assert ipaddress.ip_address("127.0.0.2") not in trusted
+    assert ipaddress.ip_address("11.0.0.1") not in trusted
+    assert ipaddress.ip_address("2001:db8::1") not in trusted
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("203.0.113.7", "203.0.113.7"),
+    (" 203.0.113.7:4711 ", "203.0.113.7"),
+    ("[2001:db8::1]:443", "2001:db8::1"),
+    ("2001:db8::1", "2001:db8::1"),
+    ("::ffff:203.0.113.7", "203.0.113.7"),
+    ("unknown", None),
+    ("", None),
+])
+def test_parse(value, expected):
+    address = _parse(value)
+    assert (str(address) if address else None) == expected
+
+
+def test_ipv6_is_bucketed_by_prefix():
+    address = ipaddress.ip_address("2001:db8:1:2:aaaa::1")
+    assert client_key(address) == "2001:db8:1:2::/64"
+    assert client_key(address, 128) == "2001:db8:1:2:aaaa::1"
+    assert client_key(ipaddress.ip_address("203.0.113.7")) == "203.0.113.7"
+
+
+def test_untrusted_peer_ignores_forwarding_headers(resolver):
+    spoofed = request("203.0.113.7", forwarded_for="198.51.100.1", real_ip="198.51.100.2")
+    assert resolver(spoofed) == "203.0.113.7"
+
+
+def test_rightmost_untrusted_hop_is_the_client(resolver):
+    # The client prepended a fake address; the ingress appended the real one
+    chain = request("10.0.0.2", forwarded_for="1.2.3.4, 203.0.113.7, 10.0.0.1")
+    assert resolver(chain) == "203.0.113.7"
+
+
+def test_all_trusted_hops_resolve_to_the_leftmost(resolver):
+    assert resolver(request("10.0.0.2", forwarded_for="10.0.0.9, 10.0.0.1")) == "10.0.0.9"
+
+
+def test_garbage_hop_stops_the_scan(resolver):
+    chain = request("10.0.0.2", forwarded_for="203.0.113.7, junk, 10.0.0.1")
+    assert resolver(chain) == "10.0.0.1"
+
+
+def test_real_ip_is_used_without_forwarded_for(resolver):
+    assert resolver(request("127.0.0.1", real_ip="203.0.113.7")) == "203.0.113.7"
+    assert resolver(request("127.0.0.1", real_ip="junk")) == "127.0.0.1"
+
+
+def test_forwarded_ipv6_client_is_bucketed(resolver):
+    chain = request("10.0.0.2", forwarded_for="[2001:db8::1]:5000, 2001:db8::2")
+    assert resolver(chain) == "2001:db8::/64"
+
+
+def test_peer_without_address(resolver):
+    assert resolver(request("testclient", forwarded_for="203.0.113.7")) == "testclient"
+    assert resolver(request(None)) == "unknown"
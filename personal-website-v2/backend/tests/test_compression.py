@@ -0,0 +1,98 @@
+"""Response compression middleware (utils.compression)"""
+
+import zlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from utils import compression
+from utils.compression import CompressionMiddleware, select_encoding
+
+LARGE = "Edson builds AI infrastructure. " * 40
+
+
+@pytest.fixture
+def client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/json")
+    def json_body(size: int):
+        return JSONResponse({"text": "x" * size})
+
+    @app.get("/png")
+    def png():
+        return Response(b"\x89PNG" + b"\x00" * 2000, media_type="image/png")
+
+    @app.get("/encoded")
+    def encoded():
+        return Response(LARGE.encode(), media_type="text/plain", headers={"Content-Encoding": "identity"})
+
+    @app.get("/stream")
+    def stream():
+        async def chunks():
+            for index in range(3):
+                yield f'{{"chunk": {index}}}\n'
+        return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+    return TestClient(app)
+
+
+def get(client, path, accept="gzip", **params):
+    return client.get(path, params=params, headers={"Accept-Encoding": accept})
+
+
+@pytest.mark.parametrize("accept, expected", [
+    ("gzip, deflate", "gzip"),
+    ("GZIP;q=0.5", "gzip"),
+    ("*", "gzip"),
+    ("gzip;q=0, deflate", None),
+    ("identity", None),
+])
+def test_select_encoding(accept, expected, monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert select_encoding(accept) == expected
+
+
+def test_bodies_below_minimum_size_are_not_compressed(client):
+    response = get(client, "/json", size=100)
+    assert "content-encoding" not in response.headers
+    assert response.json() == {"text": "x" * 100}
+
+
+def test_large_json_is_gzipped(client):
+    response = get(client, "/json", size=5000)
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    # Content-Length is the compressed size
+    assert int(response.headers["content-length"]) < 5000
+    assert response.json() == {"text": "x" * 5000}
+
+
+def test_clients_without_gzip_get_plain_bodies(client):
+    response = get(client, "/json", accept="identity", size=5000)
+    assert "content-encoding" not in response.headers
+    assert int(response.headers["content-length"]) > 5000
+
+
+def test_content_type_outside_allowlist_passes_through(client):
+    response = get(client, "/png")
+    assert "content-encoding" not in response.headers
+    assert response.content.startswith(b"\x89PNG")
+
+
+def test_already_encoded_response_passes_through(client):
+    response = get(client, "/encoded")
+    assert response.headers["content-encoding"] == "identity"
+    assert response.text == LARGE
+
+
+def test_streamed_chunks_are_compressed_whatever_their_size(client):
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        raw = b"".join(response.iter_raw())
+    text = zlib.decompress(raw, 16 + zlib.MAX_WBITS).decode()
+    assert text.splitlines() == ['{"chunk": 0}', '{"chunk": 1}', '{"chunk": 2}']
@@ -0,0 +1,126 @@
+"""Conversation memory - only validated exchanges, follow-ups classified in context"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from agents.memory import ConversationStore
+
+UNSAFE_ANSWER = "Edson's card is 4111 1111 1111 1111."
+
+
+@pytest.fixture
+def memory(agents):
+    """A fresh in-process store (Redis is unreachable in tests, which the store tolerates)"""
+    store = ConversationStore()
+    agents.supervisor_agent.memory = store
+    return store
+
+
+def ask(client, message, conversation_id):
+    return client.post("/api/chat", json={"message": message, "conversation_id": conversation_id, "language": "en"})
+
+
+async def test_rejected_answer_is_not_remembered(app, memory, monkeypatch):
+    from utils.mock_llm import MockChatModel
+
+    monkeypatch.setattr(MockChatModel, "_extractive_answer", lambda self, system, words, max_tokens: UNSAFE_ANSWER)
+    response = ask(TestClient(app), "What did Edson build with Kubernetes?", "conv-unsafe")
+    assert response.status_code == 500
+    assert await memory.get("conv-unsafe") is None
+
+
+async def test_answer_is_remembered_after_validation(app, memory):
+    response = ask(TestClient(app), "What did Edson build with Kubernetes?", "conv-safe")
+    assert response.status_code == 200
+
+    conversation = await memory.get("conv-safe")
+    assert conversation.last_question == "What did Edson build with Kubernetes?"
+    assert conversation.turns[-1].text == response.json()["message"]
+
+
+def test_websocket_rejected_answer_is_not_remembered(app, memory, monkeypatch):
+    from utils.mock_llm import MockChatModel
+
+    # Ends with the card number, so the violation is only found at the final flush
+    monkeypatch.setattr(MockChatModel, "_extractive_answer", lambda self, system, words, max_tokens: UNSAFE_ANSWER.rstrip("."))
+    with TestClient(app).websocket_connect("/api/chat/ws") as ws:
+        assert ws.receive_json()["type"] == "session"
+        ws.send_json({"type": "chat", "message": "What did Edson build?", "conversation_id": "conv-ws", "language": "en"})
+        while (frame := ws.receive_json())["type"] not in ("error", "end"):
+            pass
+
+    assert frame["code"] == 500
+    assert "conv-ws" not in memory._cache
+
+
+async def test_follow_up_is_classified_with_previous_question(app, memory, agents):
+    client = TestClient(app)
+    # Nothing in the follow-up itself says it is about Edson
+    assert not await agents.content_filter.is_on_topic("and before that?")
+
+    assert ask(client, "Where did Edson work?", "conv-follow-up").json()["is_on_topic"]
+    follow_up = ask(client, "and before that?", "conv-follow-up").json()
+    assert follow_up["is_on_topic"]
+    assert follow_up["agent_used"] == "career_agent"
+
+
+def words(n: int, word: str = "word") -> str:
+    return " ".join(f"{word}{i}" for i in range(n))
+
+
+async def test_history_is_compacted_under_the_token_budget():
+    store = ConversationStore(token_budget=120, summary_budget=60)
+    for i in range(8):
+        await store.append("c", f"Question {i}? {words(20)}", f"Answer {i}. {words(20)}")
+
+    conversation = await store.get("c")
+    assert conversation.history_tokens <= 120 or len(conversation.turns) == 2
+    assert conversation.summary_tokens <= 60
+    # The latest exchange is always kept verbatim
+    assert conversation.turns[-2].text.startswith("Question 7?")
+    assert conversation.turns[-1].text.startswith("Answer 7.")
+    # Older exchanges survive as first-sentence summary lines, newest last
+    assert conversation.summary.splitlines()[-1].startswith("- Q: Question")
+    assert "A: Answer" in conversation.summary
+
+
+async def test_latest_exchange_kept_even_over_budget():
+    store = ConversationStore(token_budget=10)
+    await store.append("c", words(50), words(50))
+    conversation = await store.get("c")
+    assert len(conversation.turns) == 2
+    assert conversation.summary == ""
+
+
+async def test_turns_are_whitespace_collapsed_and_capped():
+    store = ConversationStore()
+    await store.append("c", "  what   did\n\nhe build?  ", "x" * 2000)
+    conversation = await store.get("c")
+    assert conversation.turns[0].text == "what did he build?"
+    assert len(conversation.turns[1].text) == 600
+    assert conversation.turns[1].text.endswith("...")
+
+
+async def test_lru_evicts_least_recently_used():
+    store = ConversationStore(max_conversations=2)
+    await store.append("a", "q", "a")
+    await store.append("b", "q", "a")
+    await store.get("a")
+    await store.append("c", "q", "a")
+    assert list(store._cache) == ["a", "c"]
+
+
+async def test_round_trip_and_messages():
+    from agents.memory import Conversation
+
+    store = ConversationStore(token_budget=60, summary_budget=40)
+    for i in range(4):
+        await store.append("c", f"Question {i}? {words(10)}", f"Answer {i}. {words(10)}")
+    conversation = await store.get("c")
+
+    restored = Conversation.loads(conversation.dumps())
+    assert restored == conversation
+
+    messages = conversation.to_messages()
+    assert messages[0].type == "system" and conversation.summary in messages[0].content
+    assert [m.type for m in messages[1:]] == ["human", "ai"] * (len(conversation.turns) // 2)
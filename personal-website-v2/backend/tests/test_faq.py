@@ -0,0 +1,94 @@
+"""Precomputed FAQ answers (agents.faq)"""
+
+import pytest
+
+from agents.faq import FAQEntry, FAQIndex, content_words, normalize
+
+
+def entry(id, triggers, vocabulary=(), answers=None) -> FAQEntry:
+    return FAQEntry(
+        id=id,
+        route="general",
+        triggers=frozenset(triggers),
+        vocabulary=frozenset(vocabulary),
+        answers=answers if answers is not None else {"en": f"{id} answer", "pt": f"resposta {id}"},
+        questions={},
+    )
+
+
+@pytest.fixture
+def index() -> FAQIndex:
+    return FAQIndex([
+        entry("contact", ["email", "contact", "linkedin"], ["address", "how", "can", "his"]),
+        entry("location", ["based", "live", "located"], ["where", "currently"]),
+        entry("english_only", ["resume"], ["download"], answers={"en": "resume answer"}),
+    ], min_confidence=0.8)
+
+
+@pytest.fixture(scope="module")
+def shipped() -> FAQIndex:
+    return FAQIndex.load()
+
+
+def test_normalize_strips_case_and_accents():
+    assert normalize("Qual é o E-MAIL do Edson?") == ["qual", "e", "o", "e-mail", "do", "edson"]
+    assert content_words("What is Edson's email?") == ["email"]
+
+
+def test_match_needs_a_trigger(index):
+    match = index.match("What is his email address?")
+    assert match.entry.id == "contact"
+    assert match.answer == "contact answer"
+    assert match.confidence == 1.0
+    # Vocabulary alone is not enough
+    assert index.match("What is his address?") is None
+
+
+def test_unknown_words_lower_confidence(index):
+    # 1 of 2 content words known - below 0.8
+    assert index.match("email kubernetes") is None
+    assert index.match("Where is Edson currently based?").entry.id == "location"
+
+
+def test_language_falls_back_to_english(index):
+    assert index.match("Qual é o contact do Edson?", "pt").answer == "resposta contact"
+    assert index.match("download resume", "pt").answer == "resume answer"
+
+
+def test_empty_and_stopword_queries(index):
+    assert index.match("") is None
+    assert index.match("Who is Edson?") is None
+
+
+def test_load_failure_gives_an_empty_index(tmp_path):
+    assert FAQIndex.load(str(tmp_path / "missing.yaml")).entries == []
+    broken = tmp_path / "broken.yaml"
+    broken.write_text("entries: [{id: x}]", encoding="utf-8")
+    assert FAQIndex.load(str(broken)).entries == []
+
+
+def test_shipped_questions_match_their_own_entry(shipped):
+    for faq_entry in shipped.entries:
+        for language, question in faq_entry.questions.items():
+            match = shipped.match(question, language)
+            assert match is not None and match.entry.id == faq_entry.id, (faq_entry.id, language)
+
+
+@pytest.mark.parametrize("query", [
+    "Compare Edson's email and LinkedIn strategy with his Kubernetes work",
+    "Why did Edson choose his current role over research?",
+])
+def test_shipped_index_leaves_open_questions_to_the_agents(shipped, query):
+    assert shipped.match(query) is None
+
+
+def test_faq_hit_skips_topic_classification(app, agents, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    async def no_classifier(*args, **kwargs):
+        raise AssertionError("FAQ hits must not reach the topic classifier")
+
+    monkeypatch.setattr(agents.content_filter, "is_on_topic", no_classifier)
+    body = TestClient(app).post("/api/chat", json={"message": "How can I contact Edson?", "language": "en"}).json()
+    assert body["agent_used"] == "faq"
+    assert body["tokens_used"] == 0
@@ -0,0 +1,62 @@
+"""Adaptive generation budgets (GenerationBudgets)"""
+
+from utils.generation_budget import GenerationBudgets, is_truncated, parse_budgets
+
+
+def budgets(**kwargs) -> GenerationBudgets:
+    options = dict(max_tokens=300, min_tokens=64, percentile=0.95, headroom=1.2, window=100, min_samples=50, fixed={})
+    options.update(kwargs)
+    return GenerationBudgets(**options)
+
+
+def test_ceiling_until_enough_samples():
+    b = budgets()
+    for _ in range(49):
+        b.observe("career_agent", "en", 100, limit=300)
+    assert b.limit("career_agent", "en") == 300
+
+
+def test_budget_follows_percentile_with_headroom():
+    b = budgets()
+    for i in range(100):
+        b.observe("career_agent", "en", 50 + i, limit=300)
+    # p95 of 50..149 is 144, x1.2
+    assert b.limit("career_agent", "en") == 173
+    # Per agent and language
+    assert b.limit("career_agent", "pt") == 300
+
+
+def test_budget_is_clamped():
+    b = budgets()
+    for _ in range(50):
+        b.observe("general_agent", "en", 10, limit=300)
+    assert b.limit("general_agent", "en") == 64
+
+
+def test_too_many_truncated_answers_restore_the_ceiling():
+    b = budgets()
+    for _ in range(40):
+        b.observe("career_agent", "en", 80, limit=300)
+    for _ in range(10):
+        # Hitting the limit counts as truncated
+        b.observe("career_agent", "en", 100, limit=100)
+    assert b.limit("career_agent", "en") == 300
+
+
+def test_fixed_budgets_win():
+    b = budgets(fixed=parse_budgets("general_agent=200, career_agent:pt=350"))
+    for _ in range(50):
+        b.observe("general_agent", "en", 10, limit=300)
+    assert b.limit("general_agent", "en") == 200
+    assert b.limit("career_agent", "pt") == 350
+    assert b.limit("career_agent", "en") == 300
+
+
+def test_is_truncated_reads_provider_metadata():
+    class Response:
+        def __init__(self, metadata):
+            self.response_metadata = metadata
+
+    assert is_truncated(Response({"finish_reason": "length"}))
+    assert is_truncated(Response({"done_reason": "length"}))
+    assert not is_truncated(Response({"finish_reason": "stop"}))
@@ -0,0 +1,73 @@
+"""Versioned, hot-reloadable knowledge base (agents.knowledge_base)"""
+
+import os
+
+import pytest
+
+from agents.knowledge_base import EMPTY_SNAPSHOT, KnowledgeBase
+
+
+@pytest.fixture
+def directory(tmp_path):
+    (tmp_path / "career.md").write_text("Worked at Apple.\n", encoding="utf-8")
+    (tmp_path / "technical.yaml").write_text("skills: {python: 10}\n", encoding="utf-8")
+    (tmp_path / "notes.txt").write_text("not knowledge", encoding="utf-8")
+    return tmp_path
+
+
+def test_sections_are_named_after_files(directory):
+    kb = KnowledgeBase(str(directory))
+    assert dict(kb.snapshot.sections) == {"career": "Worked at Apple.", "technical": "skills: {python: 10}"}
+    assert kb.get("missing") == ""
+    # Escaped for ChatPromptTemplate
+    assert kb.prompt_text("technical") == "skills: {{python: 10}}"
+
+
+def test_reload_swaps_snapshot_and_notifies(directory):
+    kb = KnowledgeBase(str(directory))
+    before = kb.snapshot
+    seen = []
+    kb.subscribe(seen.append)
+
+    # Touched but unchanged - same version, no notification
+    os.utime(directory / "career.md")
+    assert not kb.reload()
+    assert kb.version == before.version and not seen
+
+    (directory / "career.md").write_text("Worked at Apple and Arcaea.\n", encoding="utf-8")
+    assert kb.reload()
+    assert kb.version != before.version
+    assert seen == [kb.snapshot]
+    # Readers holding the old snapshot still see a complete old version
+    assert before.sections["career"] == "Worked at Apple."
+
+
+def test_failing_listener_does_not_stop_the_swap(directory):
+    kb = KnowledgeBase(str(directory))
+    seen = []
+    kb.subscribe(lambda snapshot: 1 / 0)
+    kb.subscribe(seen.append)
+
+    (directory / "general.md").write_text("Based in Boston.", encoding="utf-8")
+    assert kb.reload()
+    assert kb.get("general") == "Based in Boston."
+    assert len(seen) == 1
+
+
+def test_missing_directory_starts_empty(tmp_path):
+    kb = KnowledgeBase(str(tmp_path / "missing"))
+    assert kb.snapshot is EMPTY_SNAPSHOT
+    assert kb.get("career") == ""
+
+
+def test_failed_reload_keeps_previous_snapshot(directory):
+    kb = KnowledgeBase(str(directory))
+    before = kb.snapshot
+    (directory / "career.md").write_bytes(b"\xff\xfe not utf-8")
+    assert not kb.reload()
+    assert kb.snapshot is before
+
+
+def test_empty_file(directory):
+    (directory / "general.md").write_bytes(b"")
+    assert KnowledgeBase(str(directory)).get("general") == ""
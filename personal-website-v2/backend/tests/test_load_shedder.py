@@ -0,0 +1,172 @@
+"""Priority admission of agent runs (guardrails.load_shedder)"""
+
+import asyncio
+
+import pytest
+
+from guardrails.load_shedder import LoadShedder, LoadShedError, request_priority
+
+
+def make_shedder(max_concurrent: int = 1, queue_size: int = 2, wait_ms: float = 5000) -> LoadShedder:
+    return LoadShedder(max_concurrent, queue_size, {"high": wait_ms, "normal": wait_ms, "low": wait_ms})
+
+
+async def queue(shedder: LoadShedder, priority: str, admitted: list) -> asyncio.Task:
+    """Start a waiter that records its priority once admitted"""
+    async def waiter():
+        await shedder.acquire(priority)
+        admitted.append(priority)
+
+    task = asyncio.create_task(waiter())
+    await asyncio.sleep(0)
+    return task
+
+
+def assert_idle(shedder: LoadShedder):
+    assert shedder._active == 0
+    assert shedder.queued == 0
+
+
+def test_priority_classes():
+    assert request_priority(True, 20000, 20000) == "high"
+    assert request_priority(False, 15000, 20000) == "high"
+    assert request_priority(False, 6000, 20000) == "normal"
+    # Near the daily budget the first message does not help
+    assert request_priority(True, 1000, 20000) == "low"
+    assert request_priority(False, 0, 0) == "high"
+
+
+async def test_admits_up_to_max_concurrent():
+    shedder = make_shedder(max_concurrent=2)
+    await shedder.acquire("normal")
+    await shedder.acquire("normal")
+    assert shedder._active == 2
+
+    admitted = []
+    task = await queue(shedder, "normal", admitted)
+    assert shedder.queued == 1 and not admitted
+
+    shedder.release()
+    await task
+    assert admitted == ["normal"]
+    shedder.release()
+    shedder.release()
+    assert_idle(shedder)
+
+
+async def test_freed_slot_goes_to_highest_priority():
+    shedder = make_shedder(queue_size=3)
+    await shedder.acquire("high")
+
+    admitted = []
+    tasks = [await queue(shedder, p, admitted) for p in ("low", "normal", "high")]
+    for _ in range(3):
+        shedder.release()
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    assert admitted == ["high", "normal", "low"]
+
+    shedder.release()
+    assert_idle(shedder)
+
+
+async def test_full_queue_evicts_newest_lower_priority():
+    shedder = make_shedder(queue_size=2)
+    await shedder.acquire("normal")
+
+    admitted = []
+    older_low = await queue(shedder, "low", admitted)
+    newer_low = await queue(shedder, "low", admitted)
+    high = await queue(shedder, "high", admitted)
+
+    with pytest.raises(LoadShedError) as excinfo:
+        await newer_low
+    assert excinfo.value.reason == "evicted"
+    assert shedder.queued == 2
+
+    shedder.release()
+    await high
+    shedder.release()
+    await older_low
+    assert admitted == ["high", "low"]
+    shedder.release()
+    assert_idle(shedder)
+
+
+async def test_full_queue_sheds_arrival_without_lower_waiters():
+    shedder = make_shedder(queue_size=1)
+    await shedder.acquire("normal")
+    admitted = []
+    queued = await queue(shedder, "high", admitted)
+
+    with pytest.raises(LoadShedError) as excinfo:
+        await shedder.acquire("normal")
+    assert excinfo.value.reason == "queue_full"
+    assert excinfo.value.priority == "normal"
+
+    shedder.release()
+    await queued
+    shedder.release()
+    assert_idle(shedder)
+
+
+async def test_wait_times_out():
+    shedder = make_shedder(wait_ms=20)
+    await shedder.acquire("normal")
+
+    with pytest.raises(LoadShedError) as excinfo:
+        await shedder.acquire("low")
+    assert excinfo.value.reason == "timeout"
+    assert shedder.queued == 0
+
+    shedder.release()
+    assert_idle(shedder)
+
+
+async def test_cancelled_waiter_leaves_the_queue():
+    shedder = make_shedder()
+    await shedder.acquire("normal")
+
+    admitted = []
+    first = await queue(shedder, "high", admitted)
+    second = await queue(shedder, "normal", admitted)
+
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert shedder.queued == 1
+
+    shedder.release()
+    await second
+    assert admitted == ["normal"]
+    shedder.release()
+    assert_idle(shedder)
+
+
+async def test_cancel_racing_a_handover_keeps_slots_balanced():
+    shedder = make_shedder()
+    await shedder.acquire("normal")
+
+    admitted = []
+    first = await queue(shedder, "high", admitted)
+    second = await queue(shedder, "normal", admitted)
+
+    # The slot is handed to `first` in the same tick it is cancelled: it
+    # either runs or passes the slot on to `second`, never leaks it
+    shedder.release()
+    first.cancel()
+    await asyncio.gather(first, return_exceptions=True)
+    if admitted:
+        shedder.release()
+    await second
+    shedder.release()
+    assert_idle(shedder)
+
+
+async def test_slot_context_releases_on_error():
+    shedder = make_shedder()
+    with pytest.raises(RuntimeError):
+        async with shedder.slot("high"):
+            assert shedder._active == 1
+            raise RuntimeError("agent failed")
+    assert_idle(shedder)
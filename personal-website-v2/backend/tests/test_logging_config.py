@@ -0,0 +1,100 @@
+"""Sampled, queue-backed structured logging (utils.logging_config)"""
+
+import io
+import threading
+
+import orjson
+import pytest
+import structlog
+
+from utils.logging_config import LOG_EVENTS_DROPPED, EventSampler, LogWriter, parse_sample_rates
+
+
+def dropped(reason: str) -> float:
+    return LOG_EVENTS_DROPPED.labels(reason=reason)._value.get()
+
+
+def event(name: str, level: str = "info", **fields):
+    return {"event": name, "level": level, "timestamp": 1767225600.0, **fields}
+
+
+def test_parse_sample_rates():
+    assert parse_sample_rates("") == {}
+    assert parse_sample_rates("request_completed=0.1, usage_recorded=2,bad, =0.5") == {
+        "request_completed": 0.1,
+        "usage_recorded": 1.0,
+    }
+
+
+def test_sampler_keeps_a_share_of_listed_info_events():
+    sampler = EventSampler({"request_completed": 0.25}, seed=7)
+    kept = 0
+    for _ in range(4000):
+        try:
+            kept_event = sampler(None, "info", {"event": "request_completed"})
+            kept += 1
+        except structlog.DropEvent:
+            pass
+    assert 800 < kept < 1200
+    assert kept_event["sample_rate"] == 0.25
+
+
+def test_sampler_never_drops_warnings_or_unlisted_events():
+    sampler = EventSampler({"request_completed": 0.0}, seed=1)
+    assert "sample_rate" not in sampler(None, "warning", {"event": "request_completed"})
+    assert sampler(None, "error", {"event": "request_completed"})
+    assert sampler(None, "info", {"event": "chat_request_completed"}) == {"event": "chat_request_completed"}
+    with pytest.raises(structlog.DropEvent):
+        sampler(None, "info", {"event": "request_completed"})
+
+
+def test_writer_renders_json_lines():
+    stream = io.StringIO()
+    writer = LogWriter(stream, "json")
+    writer.submit(event("first", ip="203.0.113.7"))
+    writer.submit(event("second", level="error", error=ValueError("boom")))
+    writer.close()
+
+    first, second = [orjson.loads(line) for line in stream.getvalue().splitlines()]
+    assert first == {"event": "first", "level": "info", "timestamp": "2026-01-01T00:00:00+00:00", "ip": "203.0.113.7"}
+    # Values orjson cannot encode are rendered with str()
+    assert second["error"] == "boom"
+
+
+def test_writer_console_format():
+    stream = io.StringIO()
+    writer = LogWriter(stream, "console")
+    writer.submit(event("agents_ready", duration=1.5))
+    writer.close()
+    assert "agents_ready" in stream.getvalue()
+    assert "duration=1.5" in stream.getvalue()
+
+
+class BlockingStream(io.StringIO):
+    """A stream whose first write waits until released"""
+
+    def __init__(self):
+        super().__init__()
+        self.writing = threading.Event()
+        self.release = threading.Event()
+
+    def write(self, text):
+        self.writing.set()
+        self.release.wait(5)
+        return super().write(text)
+
+
+def test_full_queue_drops_info_events_instead_of_blocking():
+    stream = BlockingStream()
+    writer = LogWriter(stream, "json", maxsize=1)
+    before = dropped("queue_full")
+
+    writer.submit(event("in_flight"))
+    assert stream.writing.wait(5)  # the writer thread is stuck in write()
+    writer.submit(event("queued"))
+    writer.submit(event("dropped"))
+    assert dropped("queue_full") - before == 1
+
+    stream.release.set()
+    writer.close()
+    assert [orjson.loads(line)["event"] for line in stream.getvalue().splitlines()] == ["in_flight", "queued"]
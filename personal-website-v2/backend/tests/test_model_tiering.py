@@ -0,0 +1,53 @@
+"""Small vs large model selection (utils.model_tiering)"""
+
+import pytest
+
+from utils import model_tiering
+from utils.model_tiering import TIER_LARGE, TIER_SMALL, TieringPolicy, get_tiered_llms
+
+
+@pytest.fixture
+def policy() -> TieringPolicy:
+    return TieringPolicy(max_simple_words=12, complex_keywords=["compare", "why", "how did", "explique"])
+
+
+@pytest.mark.parametrize("query, tier", [
+    ("Where does Edson work?", TIER_SMALL),
+    ("What is his email?", TIER_SMALL),
+    ("Compare his roles at Apple and Arcaea", TIER_LARGE),
+    ("WHY did he move to MLOps?", TIER_LARGE),
+    ("How did he scale the platform?", TIER_LARGE),
+    ("Explique a arquitetura", TIER_LARGE),
+    # Several questions in one message
+    ("Where does he work? What does he use?", TIER_LARGE),
+    ("Tell me about every project Edson has built with Kubernetes and Python at Apple", TIER_LARGE),
+])
+def test_select_tier(policy, query, tier):
+    assert policy.select_tier(query) == tier
+
+
+def test_keywords_match_whole_words(policy):
+    # "whyte" and "compared" contain keywords but are not them
+    assert policy.select_tier("Who is Whyte?") == TIER_SMALL
+    assert policy.select_tier("Edson compared notes") == TIER_SMALL
+
+
+def test_no_keywords(policy):
+    assert TieringPolicy(complex_keywords=[]).select_tier("Why?") == TIER_SMALL
+
+
+def test_disabled_tiering_always_uses_large(policy, monkeypatch):
+    monkeypatch.setattr(model_tiering, "MODEL_TIERING_ENABLED", False)
+    assert policy.select_tier("Where does Edson work?") == TIER_LARGE
+
+
+def test_tiered_llms_use_distinct_models():
+    llms = get_tiered_llms()
+    assert llms[TIER_SMALL].model_name == "mock-small"
+    assert llms[TIER_LARGE] is not llms[TIER_SMALL]
+
+
+def test_tiered_llms_share_the_large_model_when_disabled(monkeypatch):
+    monkeypatch.setattr(model_tiering, "MODEL_TIERING_ENABLED", False)
+    llms = get_tiered_llms()
+    assert llms[TIER_SMALL] is llms[TIER_LARGE]
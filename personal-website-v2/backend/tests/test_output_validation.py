@@ -0,0 +1,89 @@
+"""Streamed output validation (StreamingOutputValidator and the WebSocket path)"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from guardrails.content_filter import StreamingOutputValidator
+
+CLEAN = (
+    "Edson works on AI infrastructure at Apple. Before that he built MLOps "
+    "platforms on Kubernetes and AWS, and he speaks English and Portuguese. İstanbul"
+)
+
+
+def stream(validator, text, chunk_size):
+    """Feed text in chunks; returns everything the validator released"""
+    released = []
+    for i in range(0, len(text), chunk_size):
+        released.append(validator.feed(text[i:i + chunk_size]))
+        if validator.violation is not None:
+            break
+    released.append(validator.finish())
+    return "".join(released)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64])
+def test_clean_text_is_released_unchanged(chunk_size):
+    validator = StreamingOutputValidator()
+    assert stream(validator, CLEAN, chunk_size) == CLEAN
+    assert validator.violation is None
+
+
+def test_text_is_held_back_until_it_leaves_the_window():
+    validator = StreamingOutputValidator(window=16)
+    assert validator.feed("0123456789") == ""
+    assert validator.feed("abcdefghij") == "0123"
+    assert validator.finish() == "456789abcdefghij"
+
+
+@pytest.mark.parametrize("pii, reason", [
+    ("123-45-6789", "Sensitive data detected"),
+    ("4111 1111 1111 1111", "Sensitive data detected"),
+    ("<SCRIPT>alert(1)", "Unsafe content detected"),
+])
+@pytest.mark.parametrize("chunk_size", [1, 2, 5])
+def test_violation_split_across_chunks_is_never_released(pii, reason, chunk_size):
+    validator = StreamingOutputValidator()
+    released = stream(validator, f"{CLEAN} His number is {pii} and more text follows here.", chunk_size)
+
+    assert validator.violation == reason
+    # Not even a fragment of the violation leaves the validator
+    assert pii[:4].lower() not in released.lower()
+
+
+def test_violation_at_the_very_end_is_caught_by_finish():
+    validator = StreamingOutputValidator()
+    released = stream(validator, f"{CLEAN} 123-45-6789", 2)
+    assert validator.violation == "Sensitive data detected"
+    assert "123-" not in released
+
+
+def test_word_boundary_across_chunks():
+    # A longer digit run is not an SSN - the match must wait for the next chunk
+    validator = StreamingOutputValidator()
+    assert stream(validator, "id 123-45-67890 ok", 1) == "id 123-45-67890 ok"
+    assert validator.violation is None
+
+
+def test_websocket_never_sends_pii(app, monkeypatch):
+    from utils.mock_llm import MockChatModel
+
+    words = [f"word{i}" for i in range(40)]
+    # The mock streams word by word, so the card number spans four chunks
+    answer = " ".join(words[:10] + ["4111", "1111", "1111", "1111"] + words[10:])
+    monkeypatch.setattr(MockChatModel, "_extractive_answer", lambda self, system, w, max_tokens: answer)
+
+    frames = []
+    with TestClient(app).websocket_connect("/api/chat/ws") as ws:
+        assert ws.receive_json()["type"] == "session"
+        ws.send_json({"type": "chat", "message": "What did Edson build with Kubernetes at Apple?", "language": "en"})
+        while True:
+            frame = ws.receive_json()
+            frames.append(frame)
+            if frame["type"] in ("error", "end"):
+                break
+
+    sent = "".join(frame.get("text", "") for frame in frames if frame["type"] == "token")
+    assert "4111" not in sent
+    assert sent and answer.startswith(sent)
+    assert frames[-1] == {"type": "error", "code": 500, "detail": "Unable to process request safely", "retract": True}
@@ -0,0 +1,141 @@
+"""Anonymized query log and startup cache warming (agents.query_log)"""
+
+import pytest
+
+from agents import query_log
+from agents.query_log import QueryLog, anonymize, warm_caches
+
+
+class SortedSetRedis:
+    """The sorted-set commands QueryLog uses, in memory"""
+
+    def __init__(self):
+        self.scores = {}
+
+    def pipeline(self, transaction: bool = True):
+        return self
+
+    def zincrby(self, key, amount, member):
+        self.scores[member] = self.scores.get(member, 0) + amount
+
+    def zremrangebyrank(self, key, start, stop):
+        ranked = sorted(self.scores, key=self.scores.get)
+        stop = stop if stop >= 0 else len(ranked) + stop
+        for member in ranked[start:stop + 1]:
+            del self.scores[member]
+
+    async def execute(self):
+        return []
+
+    async def zrevrange(self, key, start, stop, withscores=False):
+        ranked = sorted(self.scores.items(), key=lambda item: -item[1])
+        return ranked[start:stop + 1]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Where does Edson work?", "where does edson work"),
+    ("  Qual é o trabalho do EDSON?  ", "qual e o trabalho do edson"),
+    ("Email edson@example.com about Kubernetes", None),
+    ("See https://example.com/profile", None),
+    ("see www.example.com", None),
+    ("Call me at +1 (555) 010-2030", None),
+    ("My order 123456 is late", None),
+    ("?!", None),
+])
+def test_anonymize(query, expected):
+    assert anonymize(query) == expected
+
+
+def test_anonymize_keeps_short_numbers():
+    assert anonymize("What did Edson do in 2023?") == "what did edson do in 2023"
+
+
+def test_long_queries_are_not_logged(monkeypatch):
+    monkeypatch.setattr(query_log, "QUERY_LOG_MAX_WORDS", 4)
+    assert anonymize("Where does Edson work?") == "where does edson work"
+    assert anonymize("Where does Edson work now?") is None
+
+
+async def test_counts_are_buffered_then_flushed():
+    log = QueryLog()
+    log.redis_client = SortedSetRedis()
+    log.record("Where does Edson work?", "en", "career")
+    log.record("where does edson WORK", "en", "career")
+    log.record("What are his skills?", "en", "technical")
+    log.record("Email me at visitor@example.com", "en", "general")
+    assert log.redis_client.scores == {}
+
+    await log.flush()
+    assert await log.top(5) == [
+        ("en", "career", "where does edson work", 2),
+        ("en", "technical", "what are his skills", 1),
+    ]
+
+
+async def test_flush_trims_to_max_entries():
+    log = QueryLog(max_entries=1)
+    log.redis_client = SortedSetRedis()
+    log.record("Where does Edson work?", "en", "career")
+    log.record("Where does Edson work?", "en", "career")
+    log.record("What are his skills?", "en", "technical")
+    await log.flush()
+    assert log.redis_client.scores == {"en|career|where does edson work": 2}
+
+
+async def test_failed_flush_drops_the_buffer():
+    log = QueryLog()
+
+    class Unreachable:
+        def pipeline(self, transaction: bool = True):
+            raise ConnectionError("down")
+
+    log.redis_client = Unreachable()
+    log.record("Where does Edson work?", "en", "career")
+    await log.flush()
+    assert not log._pending
+
+
+class FakeCache:
+    def __init__(self, cached=()):
+        self.entries = set(cached)
+
+    def get(self, query, language):
+        return "answer" if (query, language) in self.entries else None
+
+
+class FakeSupervisor:
+    def __init__(self, cached=(), failing=()):
+        self.response_cache = FakeCache(cached)
+        self.failing = set(failing)
+        self.calls = []
+
+    async def process_query(self, query, language, route, priority):
+        self.calls.append((query, language, route, priority))
+        if query in self.failing:
+            raise RuntimeError("provider down")
+        self.response_cache.entries.add((query, language))
+
+
+async def test_warm_caches_replays_uncached_top_questions():
+    log = QueryLog()
+    log.redis_client = SortedSetRedis()
+    for query, count in (("where does edson work", 3), ("what are his skills", 2), ("is he hiring", 1)):
+        log.redis_client.scores[f"en|general|{query}"] = count
+
+    supervisor = FakeSupervisor(cached=[("where does edson work", "en")], failing=["is he hiring"])
+    warmed = await warm_caches(supervisor, log, top_k=10, interval_ms=0)
+
+    assert warmed == 1
+    assert supervisor.calls == [
+        ("what are his skills", "en", "general", "low"),
+        ("is he hiring", "en", "general", "low"),
+    ]
+
+
+async def test_warm_caches_stops_at_time_budget():
+    log = QueryLog()
+    log.redis_client = SortedSetRedis()
+    log.redis_client.scores["en|general|where does edson work"] = 1
+    supervisor = FakeSupervisor()
+    assert await warm_caches(supervisor, log, max_seconds=-1) == 0
+    assert supervisor.calls == []
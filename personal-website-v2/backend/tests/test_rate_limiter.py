@@ -0,0 +1,161 @@
+"""Compact per-client rate-limit hashes (guardrails.rate_limiter)"""
+
+import asyncio
+from datetime import date, datetime
+
+import pytest
+
+from benchmarks.guardrails_bench import FakeRedis
+from guardrails import rate_limiter as rl
+from guardrails.rate_limiter import RateLimiter, UsageCache, key_expiry, minute_field, usage_key
+
+NOW = datetime(2026, 3, 14, 9, 26, 53)
+CLIENT = "203.0.113.7"
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return NOW
+
+
+@pytest.fixture
+def limiter(fake_redis, monkeypatch):
+    monkeypatch.setattr(rl, "datetime", FrozenDatetime)
+    monkeypatch.setattr(rl, "MAX_REQUESTS_PER_MINUTE", 3)
+    monkeypatch.setattr(rl, "MAX_MESSAGES_PER_DAY", 5)
+    limiter = RateLimiter()
+    limiter.redis_client = fake_redis
+    return limiter
+
+
+def test_ipv4_key_layout():
+    key = usage_key(CLIENT, NOW.date())
+    assert len(key) == 10
+    assert key[:4] == b"rl:4"
+    assert key[4:8] == bytes([203, 0, 113, 7])
+    assert key[8:] == (NOW.date().toordinal() & 0xFFFF).to_bytes(2, "big")
+
+
+def test_ipv6_prefix_key_layout():
+    key = usage_key("2001:db8:1:2::/64", NOW.date())
+    assert key[:4] == b"rl:6"
+    assert key[4:12] == bytes.fromhex("20010db800010002")
+    assert len(key) == 14
+    # A full IPv6 address keeps all 16 bytes
+    assert len(usage_key("2001:db8::1", NOW.date())) == 22
+
+
+def test_keys_differ_by_client_and_day():
+    today, tomorrow = date(2026, 3, 14), date(2026, 3, 15)
+    assert usage_key(CLIENT, today) != usage_key(CLIENT, tomorrow)
+    assert usage_key(CLIENT, today) != usage_key("203.0.113.8", today)
+    assert usage_key("testclient", today) == b"rl:stestclient" + usage_key(CLIENT, today)[-2:]
+
+
+def test_minute_field_and_expiry():
+    assert minute_field(NOW) == str(9 * 60 + 26)
+    assert minute_field(datetime(2026, 3, 14, 23, 59)) == "1439"
+    midnight = datetime(2026, 3, 15).timestamp()
+    assert key_expiry(NOW.date()) == int(midnight) + rl.KEY_GRACE_SECONDS
+
+
+async def test_one_hash_per_client_day(limiter, fake_redis):
+    allowed, remaining, reason = await limiter.check_rate_limit(CLIENT)
+    assert (allowed, remaining, reason) == (True, rl.MAX_TOKENS_PER_DAY, "OK")
+    await limiter.record_usage(CLIENT, 120)
+
+    key = usage_key(CLIENT, NOW.date())
+    assert [k for k in fake_redis.data if isinstance(k, bytes)] == [key]
+    fields = fake_redis.data[key]
+    assert fields[rl.FIELD_TOKENS] == 120
+    assert fields[rl.FIELD_MESSAGES] == 1
+    assert fields[minute_field(NOW)] == 1
+    assert fields[rl.FIELD_LAST_REQUEST] == int(NOW.timestamp())
+
+
+async def test_requests_per_minute_limit(limiter):
+    for _ in range(3):
+        assert (await limiter.check_rate_limit(CLIENT))[0]
+    allowed, _, reason = await limiter.check_rate_limit(CLIENT)
+    assert not allowed
+    assert reason == "Too many requests per minute"
+
+
+async def test_messages_per_day_limit(limiter, fake_redis, monkeypatch):
+    monkeypatch.setattr(rl, "MAX_REQUESTS_PER_MINUTE", 100)
+    for _ in range(5):
+        assert (await limiter.check_rate_limit(CLIENT))[0]
+    allowed, _, reason = await limiter.check_rate_limit(CLIENT)
+    assert not allowed
+    assert reason == "Daily message limit exceeded"
+    # Rejected requests are not counted
+    assert fake_redis.data[usage_key(CLIENT, NOW.date())][rl.FIELD_MESSAGES] == 5
+
+
+async def test_token_limit(limiter):
+    await limiter.record_usage(CLIENT, rl.MAX_TOKENS_PER_DAY)
+    assert await limiter.check_rate_limit(CLIENT) == (False, 0, "Daily token limit exceeded")
+
+
+async def test_usage_from_redis_and_reset(limiter):
+    await limiter.check_rate_limit(CLIENT)
+    await limiter.record_usage(CLIENT, 300)
+
+    limiter.usage_cache = UsageCache()  # force a Redis read
+    usage = await limiter.get_usage(CLIENT)
+    assert usage["tokens_used"] == 300
+    assert usage["tokens_remaining"] == rl.MAX_TOKENS_PER_DAY - 300
+    assert usage["requests_today"] == 1
+    assert usage["requests_this_minute"] == 1
+    assert usage["last_request"] == NOW
+    assert not usage["is_rate_limited"]
+
+    await limiter.reset_usage(CLIENT)
+    usage = await limiter.get_usage(CLIENT)
+    assert usage["tokens_used"] == 0
+    assert usage["requests_today"] == 0
+
+
+async def test_cached_usage_matches_redis(limiter):
+    await limiter.check_rate_limit(CLIENT)
+    await limiter.record_usage(CLIENT, 50)
+    cached = await limiter.get_usage(CLIENT)
+
+    limiter.usage_cache = UsageCache()
+    assert await limiter.get_usage(CLIENT) == cached
+
+
+class NoInfoRedis(FakeRedis):
+    """Managed Redis with INFO disabled"""
+
+    async def info(self, section=None):
+        raise RuntimeError("unknown command 'INFO'")
+
+
+async def test_metrics_failures_stay_off_the_request_path(limiter):
+    limiter.redis_client = NoInfoRedis()
+    await limiter.record_usage(CLIENT, 500)
+
+    allowed, remaining, _ = await limiter.check_rate_limit(CLIENT)
+    assert allowed
+    # Not the fail-open MAX_TOKENS_PER_DAY
+    assert remaining == rl.MAX_TOKENS_PER_DAY - 500
+    assert limiter.usage_cache.get(CLIENT)["requests_today"] == 1
+
+
+async def test_refresh_metrics_sets_each_gauge_independently(limiter):
+    limiter.redis_client = NoInfoRedis()
+    await limiter.check_rate_limit(CLIENT)
+    await limiter.check_rate_limit("203.0.113.8")
+
+    await limiter.refresh_metrics()
+    assert rl.RATE_LIMIT_CLIENTS._value.get() == 2
+
+
+async def test_metrics_task_starts_and_stops(limiter):
+    limiter.start_metrics(interval=60)
+    task = limiter._metrics_task
+    await asyncio.sleep(0)
+    await limiter.stop_metrics()
+    assert task.cancelled() and limiter._metrics_task is None
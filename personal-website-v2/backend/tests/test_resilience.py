@@ -0,0 +1,232 @@
+"""Retry budget, jittered retries and hedging (utils.resilience)"""
+
+import asyncio
+
+import pytest
+
+from utils import resilience
+from utils.resilience import LatencyTracker, RetryBudget, is_transient, resilient_call, resilient_stream
+
+
+class MockLLMError(RuntimeError):
+    """Named like the mock provider's error, which is transient"""
+
+
+class Rejected(Exception):
+    status_code = 400
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    """A fresh budget with 10 tokens and no refill"""
+    fresh = RetryBudget(ratio=0.0, min_per_sec=0.0, capacity=10)
+    monkeypatch.setattr(resilience, "retry_budget", fresh)
+    monkeypatch.setattr(resilience, "LLM_RETRY_BASE_MS", 0.1)
+    monkeypatch.setattr(resilience, "LLM_RETRY_MAX_MS", 1)
+    return fresh
+
+
+def retries(stage: str, result: str) -> float:
+    return resilience.LLM_RETRIES.labels(stage=stage, result=result)._value.get()
+
+
+def failing(failures: int, error=MockLLMError):
+    """A call that fails `failures` times, then returns "ok" """
+    state = {"calls": 0}
+
+    async def call():
+        state["calls"] += 1
+        if state["calls"] <= failures:
+            raise error("boom")
+        return "ok"
+
+    return call, state
+
+
+def test_transient_errors():
+    assert is_transient(MockLLMError())
+    assert is_transient(asyncio.TimeoutError())
+    assert is_transient(type("E", (Exception,), {"status_code": 503})())
+    assert is_transient(type("E", (Exception,), {"status_code": 429})())
+    assert not is_transient(Rejected())
+    assert not is_transient(ValueError())
+
+
+def test_budget_spends_deposits_and_runs_out():
+    b = RetryBudget(ratio=0.5, min_per_sec=0.0, capacity=2)
+    assert b.try_spend() and b.try_spend()
+    assert not b.try_spend()
+    b.deposit()
+    b.deposit()
+    assert b.try_spend()
+    assert not b.try_spend()
+
+
+async def test_transient_failure_is_retried(budget):
+    call, state = failing(1)
+    assert await resilient_call(call, "t_retry") == "ok"
+    assert state["calls"] == 2
+    assert budget._balance == 9
+
+
+async def test_exhausted_call_only_charges_real_retries(budget):
+    call, state = failing(10)
+    before = retries("t_exhausted", "retried")
+    with pytest.raises(MockLLMError):
+        await resilient_call(call, "t_exhausted")
+
+    attempts = resilience.LLM_RETRY_ATTEMPTS
+    assert state["calls"] == attempts
+    # The last failure is not a retry - no token, no "retried"
+    assert budget._balance == 10 - (attempts - 1)
+    assert retries("t_exhausted", "retried") - before == attempts - 1
+    assert retries("t_exhausted", "attempts_exhausted") == 1
+
+
+async def test_permanent_errors_are_not_retried(budget):
+    call, state = failing(1, error=Rejected)
+    with pytest.raises(Rejected):
+        await resilient_call(call, "t_permanent")
+    assert state["calls"] == 1
+    assert budget._balance == 10
+
+
+async def test_empty_budget_fails_fast(budget):
+    budget._balance = 0
+    call, state = failing(1)
+    with pytest.raises(MockLLMError):
+        await resilient_call(call, "t_budget")
+    assert state["calls"] == 1
+    assert retries("t_budget", "budget_exhausted") == 1
+
+
+async def test_stream_retries_only_before_the_first_chunk(budget):
+    opened = {"count": 0}
+
+    def open_stream():
+        opened["count"] += 1
+        attempt = opened["count"]
+
+        async def chunks():
+            if attempt == 1:
+                raise MockLLMError("connect failed")
+            yield "a"
+            raise MockLLMError("mid-stream")
+
+        return chunks()
+
+    received = []
+    with pytest.raises(MockLLMError, match="mid-stream"):
+        async for chunk in resilient_stream(open_stream, "t_stream"):
+            received.append(chunk)
+    assert received == ["a"]
+    assert opened["count"] == 2
+
+
+async def test_slow_call_is_hedged(budget, monkeypatch):
+    tracker = LatencyTracker(min_samples=10)
+    for _ in range(10):
+        tracker.observe("t_hedge", 0.01)
+    monkeypatch.setattr(resilience, "latencies", tracker)
+    monkeypatch.setattr(resilience, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(resilience, "LLM_HEDGE_MIN_DELAY_MS", 0)
+
+    started = []
+
+    async def call():
+        started.append(len(started))
+        # The first copy hangs, the hedge answers
+        await asyncio.sleep(10 if len(started) == 1 else 0)
+        return f"copy {len(started)}"
+
+    assert await asyncio.wait_for(resilient_call(call, "t_hedge"), 2) == "copy 2"
+    assert len(started) == 2
+    assert budget._balance == 9
+    assert resilience.LLM_HEDGES.labels(stage="t_hedge", result="won")._value.get() == 1
+
+
+@pytest.fixture
+def hedging(monkeypatch):
+    """Hedge every call right away"""
+    tracker = LatencyTracker(min_samples=10)
+    monkeypatch.setattr(resilience, "latencies", tracker)
+    monkeypatch.setattr(resilience, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(resilience, "LLM_HEDGE_MIN_DELAY_MS", 0)
+
+    def arm(stage: str):
+        for _ in range(10):
+            tracker.observe(stage, 0.001)
+    return arm
+
+
+def racing(first, second):
+    """Two copies released together, so both finish before the caller wakes"""
+    gate = asyncio.Event()
+    started = []
+
+    async def call():
+        started.append(len(started))
+        copy = len(started)
+        if copy == 2:
+            gate.set()
+        await gate.wait()
+        outcome = first if copy == 1 else second
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return call, started
+
+
+async def test_successful_copy_wins_when_both_finish_together(budget, hedging):
+    hedging("t_hedge_together")
+    # Task sets iterate in arbitrary order - repeat so a failed copy is seen first
+    for _ in range(20):
+        discarded = []
+        call, _ = racing(Rejected("first copy failed"), "copy 2")
+        assert await resilient_call(call, "t_hedge_together", on_discarded=discarded.append) == "copy 2"
+        # A failed copy has no usage to charge
+        assert discarded == []
+        budget._balance = 10
+
+
+async def test_call_fails_only_when_both_copies_fail(budget, hedging):
+    hedging("t_hedge_failed")
+    call, started = racing(Rejected("first"), Rejected("second"))
+    with pytest.raises(Rejected):
+        await resilient_call(call, "t_hedge_failed")
+    assert len(started) == 2
+    assert resilience.LLM_HEDGES.labels(stage="t_hedge_failed", result="failed")._value.get() == 1
+
+
+async def test_losing_copy_is_passed_to_on_discarded(budget, hedging):
+    hedging("t_hedge_discard")
+    discarded = []
+    call, _ = racing("copy 1", "copy 2")
+    result = await resilient_call(call, "t_hedge_discard", on_discarded=discarded.append)
+    assert sorted([result] + discarded) == ["copy 1", "copy 2"]
+
+
+async def test_cancelled_copy_is_charged_for_its_prompt(budget, hedging):
+    from langchain_core.messages import AIMessage
+
+    from utils.llm_provider import invoke_llm
+    from utils.token_counter import count_message_tokens, start_ledger
+
+    class SlowThenFast:
+        model_name = "hedge-model"
+        calls = 0
+
+        async def ainvoke(self, messages, **kwargs):
+            self.calls += 1
+            await asyncio.sleep(10 if self.calls == 1 else 0)
+            return AIMessage(content="answer", usage_metadata={"input_tokens": 30, "output_tokens": 5, "total_tokens": 35})
+
+    hedging("t_hedge_usage")
+    ledger = start_ledger()
+    messages = ["What does Edson do?"]
+    response = await asyncio.wait_for(invoke_llm(SlowThenFast(), messages, "t_hedge_usage"), 2)
+
+    assert response.content == "answer"
+    # The winner's reported usage plus the abandoned copy's prompt
+    assert ledger.by_stage == {"t_hedge_usage": 35 + count_message_tokens(messages)}
@@ -0,0 +1,22 @@
+"""Background agent startup (main.start_agents)"""
+
+import main
+from api import health
+
+
+async def test_failed_agent_build_is_retried(monkeypatch):
+    attempts = []
+
+    def init_agents():
+        attempts.append(len(attempts))
+        if len(attempts) < 3:
+            raise ConnectionError("provider not reachable yet")
+
+    monkeypatch.setattr(main.chat, "init_agents", init_agents)
+    monkeypatch.setattr(main, "AGENT_STARTUP_RETRY_BASE_SECONDS", 0.001)
+    monkeypatch.setattr(main, "CACHE_WARM_ENABLED", False)
+    monkeypatch.setattr(health, "_ready", False)
+
+    await main.start_agents(query_log=None)
+    assert len(attempts) == 3
+    assert health._ready
@@ -0,0 +1,92 @@
+"""Per-request token accounting (utils.token_counter)"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage
+
+from utils.token_counter import (
+    TokenLedger,
+    count_message_tokens,
+    count_tokens,
+    extract_usage,
+    get_ledger,
+    get_model_name,
+    record_llm_usage,
+    start_ledger,
+)
+
+
+@pytest.mark.parametrize("response, expected", [
+    (AIMessage(content="hi", usage_metadata={"input_tokens": 12, "output_tokens": 3, "total_tokens": 15}), (12, 3)),
+    (AIMessage(content="hi", response_metadata={"token_usage": {"prompt_tokens": 20, "completion_tokens": 5}}), (20, 5)),
+    (AIMessage(content="hi", response_metadata={"prompt_eval_count": 30, "eval_count": 7}), (30, 7)),
+    # Ollama omits prompt_eval_count when the prompt was fully cached
+    (AIMessage(content="hi", response_metadata={"eval_count": 7}), (0, 7)),
+    (AIMessage(content="hi"), None),
+    (SimpleNamespace(content="hi"), None),
+])
+def test_extract_usage(response, expected):
+    assert extract_usage(response) == expected
+
+
+def test_count_tokens():
+    assert count_tokens("") == 0
+    assert count_tokens("Edson works on AI infrastructure.") > 0
+    # Each message pays a fixed overhead on top of its content
+    text = "What does Edson do?"
+    assert count_message_tokens([AIMessage(content=text)]) == count_tokens(text) + 4
+
+
+def test_model_name():
+    assert get_model_name(SimpleNamespace(model_name="gpt-4o-mini")) == "gpt-4o-mini"
+    assert get_model_name(SimpleNamespace(model="llama3.1:8b")) == "llama3.1:8b"
+    assert get_model_name(object()) == "unknown"
+
+
+def test_ledger_totals_by_stage_and_model():
+    ledger = TokenLedger()
+    ledger.add("routing", "small", 40, 1)
+    ledger.add("career_agent", "large", 600, 150)
+    ledger.add("routing", "small", 10, 1)
+    assert ledger.total_tokens == 802
+    assert ledger.by_stage == {"routing": 52, "career_agent": 750}
+    assert ledger.by_model == {"small": 52, "large": 750}
+
+
+def test_record_llm_usage_prefers_provider_counts():
+    ledger = start_ledger()
+    llm = SimpleNamespace(model_name="m")
+    reported = AIMessage(content="answer", usage_metadata={"input_tokens": 50, "output_tokens": 9, "total_tokens": 59})
+    assert record_llm_usage("agent", llm, ["prompt"], reported) == (50, 9)
+
+    # No usage metadata - counted locally
+    prompt_tokens, completion_tokens = record_llm_usage("agent", llm, ["prompt"], AIMessage(content="answer"))
+    assert prompt_tokens == count_message_tokens(["prompt"])
+    assert completion_tokens == count_tokens("answer")
+    assert ledger.total_tokens == 59 + prompt_tokens + completion_tokens
+
+
+async def test_ledgers_are_per_request_context():
+    async def request(stage):
+        ledger = start_ledger()
+        await asyncio.sleep(0)
+        get_ledger().add(stage, "m", 1, 1)
+        return ledger
+
+    first, second = await asyncio.gather(request("a"), request("b"))
+    assert first.by_stage == {"a": 2}
+    assert second.by_stage == {"b": 2}
+
+
+def test_chat_charges_every_llm_call(app):
+    # A question no other test asks, so it is not a response cache hit
+    response = TestClient(app).post("/api/chat", json={"message": "Which MLOps tooling did Edson run on AWS?", "language": "en"})
+    body = response.json()
+
+    assert response.status_code == 200
+    # Routing plus generation at least - more than the old flat estimate of a message
+    assert body["tokens_used"] > count_tokens(body["message"])
+    assert body["usage"]["tokens_used_today"] == body["tokens_used"]
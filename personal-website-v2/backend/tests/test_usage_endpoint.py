@@ -0,0 +1,95 @@
+"""Conditional GET of /api/chat/usage and the usage cache"""
+
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.chat import etag_matches, usage_etag
+from guardrails import rate_limiter as rl
+from guardrails.rate_limiter import UsageCache, usage_snapshot
+
+ETAG = 'W/"0123456789abcdef"'
+
+
+@pytest.fixture
+def client(app):
+    return TestClient(app)
+
+
+def test_usage_has_etag_and_revalidates(client):
+    first = client.get("/api/chat/usage")
+    assert first.status_code == 200
+    assert first.headers["etag"].startswith('W/"')
+    assert first.headers["cache-control"] == "private, no-cache"
+    assert first.json()["tokens_used_today"] == 0
+
+    again = client.get("/api/chat/usage", headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == first.headers["etag"]
+
+
+async def test_etag_changes_with_usage(client, agents):
+    first = client.get("/api/chat/usage")
+    before = first.headers["etag"]
+
+    await agents.rate_limiter.record_usage(first.json()["ip_address"], 42)
+    after = client.get("/api/chat/usage", headers={"If-None-Match": before})
+    assert after.status_code == 200
+    assert after.headers["etag"] != before
+    assert after.json()["tokens_used_today"] == 42
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ("", False),
+    ("*", True),
+    (ETAG, True),
+    ('"0123456789abcdef"', True),  # weak comparison ignores W/
+    (f'"other", {ETAG}', True),
+    ('"other", W/"another"', False),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(header, ETAG) is expected
+
+
+def test_etag_covers_client_and_counters():
+    usage = usage_snapshot(10, 1, 1)
+    assert usage_etag("a", usage) == usage_etag("a", dict(usage))
+    assert usage_etag("a", usage) != usage_etag("b", usage)
+    assert usage_etag("a", usage) != usage_etag("a", usage_snapshot(11, 1, 1))
+
+
+def test_usage_cache_expires(monkeypatch):
+    cache = UsageCache(ttl_ms=1000)
+    cache.put("c", usage_snapshot(5, 1, 1))
+    assert cache.get("c")["tokens_used"] == 5
+
+    later = time.monotonic() + 2
+    monkeypatch.setattr(rl.time, "monotonic", lambda: later)
+    assert cache.get("c") is None
+
+
+def test_usage_cache_add_tokens_and_lru():
+    cache = UsageCache(ttl_ms=1000, max_entries=2)
+    cache.put("a", usage_snapshot(5, 1, 1))
+    cache.add_tokens("a", 10)
+    assert cache.get("a")["tokens_used"] == 15
+    assert cache.get("a")["tokens_remaining"] == rl.MAX_TOKENS_PER_DAY - 15
+
+    # Nothing cached - nothing to update
+    cache.add_tokens("missing", 10)
+    assert cache.get("missing") is None
+
+    cache.put("b", usage_snapshot(0, 0, 0))
+    cache.get("a")
+    cache.put("c", usage_snapshot(0, 0, 0))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+
+def test_disabled_usage_cache():
+    cache = UsageCache(ttl_ms=0)
+    cache.put("a", usage_snapshot(5, 1, 1))
+    assert cache.get("a") is None
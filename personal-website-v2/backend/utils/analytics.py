@@ -0,0 +1,241 @@
+"""Chat analytics - write-behind persistence of chat events to PostgreSQL"""
+
+import os
+import queue
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import structlog
+from prometheus_client import Counter, Histogram
+
+logger = structlog.get_logger()
+
+# Configuration
+DATABASE_URL = os.getenv("DATABASE_URL", "")
+ANALYTICS_ENABLED = os.getenv("ANALYTICS_ENABLED", "true").lower() == "true" and bool(DATABASE_URL)
+# Store the question and answer text; when off only the metadata is kept
+ANALYTICS_STORE_TRANSCRIPTS = os.getenv("ANALYTICS_STORE_TRANSCRIPTS", "true").lower() == "true"
+ANALYTICS_QUEUE_SIZE = int(os.getenv("ANALYTICS_QUEUE_SIZE", "5000"))
+ANALYTICS_BATCH_SIZE = int(os.getenv("ANALYTICS_BATCH_SIZE", "200"))
+ANALYTICS_FLUSH_MS = float(os.getenv("ANALYTICS_FLUSH_MS", "1000"))
+ANALYTICS_TABLE = os.getenv("ANALYTICS_TABLE", "chat_events")
+
+# Metrics
+ANALYTICS_EVENTS_WRITTEN = Counter('analytics_events_written_total', 'Chat events written to the database')
+ANALYTICS_EVENTS_DROPPED = Counter('analytics_events_dropped_total', 'Chat events not written', ['reason'])
+ANALYTICS_FLUSH_DURATION = Histogram(
+    'analytics_flush_duration_seconds',
+    'Duration of one bulk INSERT of chat events',
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5],
+)
+
+
+@dataclass
+class ChatEvent:
+    """One answered (or rejected) chat message"""
+    transport: str  # http | websocket
+    status: str  # answered | off_topic | unsafe | shed | failed
+    language: str
+    query: Optional[str] = None
+    answer: Optional[str] = None
+    conversation_id: Optional[str] = None
+    route: Optional[str] = None
+    agent_used: Optional[str] = None
+    tier: Optional[str] = None
+    is_on_topic: bool = True
+    cache_hit: bool = False
+    faq_hit: bool = False
+    tokens_used: int = 0
+    latency_ms: float = 0.0
+    stage_ms: Dict[str, float] = field(default_factory=dict)
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+def chat_events_table(metadata, name: str = ANALYTICS_TABLE):
+    """SQLAlchemy table for ChatEvent rows (sqlalchemy is imported on the writer thread)"""
+    from sqlalchemy import JSON, BigInteger, Boolean, Column, DateTime, Float, Integer, String, Table, Text
+
+    return Table(
+        name,
+        metadata,
+        Column("id", BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True),
+        Column("created_at", DateTime(timezone=True), nullable=False, index=True),
+        Column("transport", String(16), nullable=False),
+        Column("status", String(16), nullable=False),
+        Column("language", String(8), nullable=False),
+        Column("query", Text),
+        Column("answer", Text),
+        Column("conversation_id", String(64), index=True),
+        Column("route", String(32)),
+        Column("agent_used", String(32)),
+        Column("tier", String(16)),
+        Column("is_on_topic", Boolean, nullable=False),
+        Column("cache_hit", Boolean, nullable=False),
+        Column("faq_hit", Boolean, nullable=False),
+        Column("tokens_used", Integer, nullable=False),
+        Column("latency_ms", Float, nullable=False),
+        Column("stage_ms", JSON, nullable=False),
+    )
+
+
+class AnalyticsWriter:
+    """
+    Background thread that bulk-inserts queued chat events
+
+    The request path only does a non-blocking put. The thread writes a batch
+    with one multi-row INSERT every batch_size events or flush_ms after the
+    first event of the batch, whichever comes first. When the queue is full,
+    or the database is unreachable, events are dropped and counted - analytics
+    never slow down or fail a chat request. The table is created on first
+    connect.
+    """
+
+    def __init__(
+        self,
+        database_url: str = DATABASE_URL,
+        maxsize: int = ANALYTICS_QUEUE_SIZE,
+        batch_size: int = ANALYTICS_BATCH_SIZE,
+        flush_ms: float = ANALYTICS_FLUSH_MS,
+    ):
+        self.database_url = database_url
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000
+        self._queue: "queue.Queue" = queue.Queue(maxsize=maxsize)
+        self._engine = None
+        self._table = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start the writer thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="analytics-writer", daemon=True)
+            self._thread.start()
+
+    def submit(self, event: ChatEvent):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            ANALYTICS_EVENTS_DROPPED.labels(reason="queue_full").inc()
+
+    def _connect(self):
+        from sqlalchemy import MetaData, create_engine
+
+        engine = create_engine(self.database_url, pool_size=1, max_overflow=0, pool_pre_ping=True)
+        metadata = MetaData()
+        table = chat_events_table(metadata)
+        metadata.create_all(engine, checkfirst=True)
+        self._engine, self._table = engine, table
+
+    def _flush(self, batch: List[ChatEvent]):
+        start_time = time.perf_counter()
+        try:
+            if self._engine is None:
+                self._connect()
+            with self._engine.begin() as conn:
+                conn.execute(self._table.insert(), [asdict(event) for event in batch])
+        except Exception as e:
+            ANALYTICS_EVENTS_DROPPED.labels(reason="write_failed").inc(len(batch))
+            logger.error("analytics_write_failed", error=str(e), dropped=len(batch))
+            if self._engine is not None:
+                self._engine.dispose()
+            self._engine = None
+            return
+
+        ANALYTICS_FLUSH_DURATION.observe(time.perf_counter() - start_time)
+        ANALYTICS_EVENTS_WRITTEN.inc(len(batch))
+
+    def _run(self):
+        batch: List[ChatEvent] = []
+        deadline = 0.0
+        while True:
+            stop = False
+            timeout = max(0.0, deadline - time.monotonic()) if batch else None
+            try:
+                event = self._queue.get(timeout=timeout)
+                if event is None:
+                    stop = True
+                else:
+                    if not batch:
+                        deadline = time.monotonic() + self.flush_interval
+                    batch.append(event)
+            except queue.Empty:
+                pass
+
+            if batch and (stop or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._flush(batch)
+                batch = []
+            if stop:
+                return
+
+    def close(self, timeout: float = 5.0):
+        """Flush queued events and stop the thread"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+        self._thread = None
+        if self._engine is not None:
+            self._engine.dispose()
+            self._engine = None
+
+
+def record_chat_event(
+    transport: str,
+    status: str,
+    query: str,
+    language: str,
+    timer,
+    conversation_id: Optional[str] = None,
+    answer: Optional[str] = None,
+    agent_used: Optional[str] = None,
+    tier: Optional[str] = None,
+    tokens_used: int = 0,
+    cache_hit: bool = False,
+    is_on_topic: bool = True,
+):
+    """Queue a chat event for the database (no-op when analytics are disabled)"""
+    if _writer is None:
+        return
+    route = None
+    if agent_used and agent_used.endswith("_agent"):
+        route = agent_used.removesuffix("_agent")
+
+    _writer.submit(ChatEvent(
+        transport=transport,
+        status=status,
+        language=language,
+        query=query if ANALYTICS_STORE_TRANSCRIPTS else None,
+        answer=answer if ANALYTICS_STORE_TRANSCRIPTS else None,
+        conversation_id=conversation_id,
+        route=route,
+        agent_used=agent_used,
+        tier=tier,
+        is_on_topic=is_on_topic,
+        cache_hit=cache_hit,
+        faq_hit=agent_used == "faq",
+        tokens_used=tokens_used,
+        latency_ms=round(sum(timer.durations.values()) * 1000, 2),
+        stage_ms={name: round(duration * 1000, 2) for name, duration in timer.durations.items()},
+    ))
+
+
+_writer: Optional[AnalyticsWriter] = None
+
+
+def start_analytics(database_url: str = DATABASE_URL) -> Optional[AnalyticsWriter]:
+    """Start the process-wide writer (only when ANALYTICS_ENABLED)"""
+    global _writer
+    if ANALYTICS_ENABLED and _writer is None:
+        _writer = AnalyticsWriter(database_url)
+        _writer.start()
+    return _writer
+
+
+def stop_analytics():
+    """Flush queued events and stop the writer"""
+    global _writer
+    if _writer is not None:
+        _writer.close()
+        _writer = None
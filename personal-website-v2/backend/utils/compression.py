@@ -0,0 +1,198 @@
+"""Response compression (gzip, brotli when installed) as pure ASGI middleware"""
+
+import os
+import zlib
+from typing import List, Optional, Tuple
+
+from prometheus_client import Counter, Histogram
+
+try:
+    import brotli
+except ImportError:  # optional - gzip only
+    brotli = None
+
+# Configuration
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "500"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/problem+json",
+    "image/svg+xml",
+    "text/",
+)
+
+# Metrics
+COMPRESSION_RATIO = Histogram(
+    'http_compression_ratio',
+    'Compressed size / original size per response',
+    ['encoding'],
+    buckets=[0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.5],
+)
+COMPRESSION_BYTES = Counter('http_compression_bytes_total', 'Response body bytes', ['encoding', 'stage'])
+
+
+def select_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick "br" or "gzip" from an Accept-Encoding header (q=0 means refused)"""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip())
+
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+class _Encoder:
+    """Incremental encoder; every chunk is flushed so streamed output is never held back"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits 16+ -> gzip container
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        self.original = 0
+        self.compressed = 0
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        self.original += len(data)
+        if self.encoding == "br":
+            out = self._brotli.process(data) + (self._brotli.finish() if final else self._brotli.flush())
+        else:
+            out = self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+        self.compressed += len(out)
+        return out
+
+    def record(self):
+        COMPRESSION_BYTES.labels(encoding=self.encoding, stage="original").inc(self.original)
+        COMPRESSION_BYTES.labels(encoding=self.encoding, stage="compressed").inc(self.compressed)
+        if self.original:
+            COMPRESSION_RATIO.labels(encoding=self.encoding).observe(self.compressed / self.original)
+
+
+class CompressionMiddleware:
+    """
+    Compress HTTP responses for clients that accept gzip or brotli
+
+    Single-body responses are compressed only when at least minimum_size
+    bytes. Streamed responses (more_body) are compressed chunk by chunk with
+    a sync flush, so every chunk reaches the client as soon as it is
+    produced - nothing is buffered. Responses that already have a
+    Content-Encoding or a content type outside the allowlist pass through.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        content_types: Tuple[str, ...] = COMPRESSIBLE_TYPES,
+        gzip_level: int = COMPRESSION_GZIP_LEVEL,
+        brotli_quality: int = COMPRESSION_BROTLI_QUALITY,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = content_types
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = ""
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+
+        encoding = select_encoding(accept) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        await self.app(scope, receive, _CompressingSender(self, encoding, send))
+
+    def compressible(self, headers: List[Tuple[bytes, bytes]]) -> bool:
+        content_type = ""
+        for key, value in headers:
+            key = key.lower()
+            if key == b"content-encoding":
+                return False
+            if key == b"content-type":
+                content_type = value.decode("latin-1").lower()
+        return content_type.startswith(self.content_types)
+
+
+class _CompressingSender:
+    """send() wrapper for one response"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start_message = None
+        self.encoder: Optional[_Encoder] = None
+        self.passthrough = False
+
+    async def __call__(self, message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            self.start_message = message
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            headers = list(start.get("headers", []))
+
+            if (
+                start["status"] in (204, 304)
+                or not self.middleware.compressible(headers)
+                or (not more_body and len(body) < self.middleware.minimum_size)
+            ):
+                self.passthrough = True
+                await self.send(start)
+                await self.send(message)
+                return
+
+            self.encoder = _Encoder(self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
+            vary = [v for k, v in headers if k.lower() == b"vary"]
+            headers = [(k, v) for k, v in headers if k.lower() not in (b"content-length", b"vary")]
+            headers.append((b"content-encoding", self.encoding.encode("latin-1")))
+            headers.append((b"vary", b", ".join(vary + [b"Accept-Encoding"])))
+            if not more_body:
+                data = self.encoder.compress(body, final=True)
+                headers.append((b"content-length", str(len(data)).encode("latin-1")))
+                await self.send({**start, "headers": headers})
+                await self.send({"type": "http.response.body", "body": data})
+                self.encoder.record()
+                return
+
+            await self.send({**start, "headers": headers})
+
+        await self.send({
+            "type": "http.response.body",
+            "body": self.encoder.compress(body, final=not more_body),
+            "more_body": more_body,
+        })
+        if not more_body:
+            self.encoder.record()
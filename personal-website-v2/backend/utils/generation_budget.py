@@ -0,0 +1,144 @@
+"""Generation budgets - per-agent, per-language max_tokens from observed answer lengths"""
+
+import math
+import os
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+import structlog
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = structlog.get_logger()
+
+# Configuration
+GEN_BUDGET_ADAPTIVE = os.getenv("GEN_BUDGET_ADAPTIVE", "true").lower() == "true"
+# Ceiling for every answer - what the agents' models are created with
+GEN_BUDGET_MAX_TOKENS = int(os.getenv("GEN_BUDGET_MAX_TOKENS", "300"))
+GEN_BUDGET_MIN_TOKENS = int(os.getenv("GEN_BUDGET_MIN_TOKENS", "64"))
+# Budget = this percentile of recent answer lengths x headroom
+GEN_BUDGET_PERCENTILE = float(os.getenv("GEN_BUDGET_PERCENTILE", "0.95"))
+GEN_BUDGET_HEADROOM = float(os.getenv("GEN_BUDGET_HEADROOM", "1.2"))
+GEN_BUDGET_WINDOW = int(os.getenv("GEN_BUDGET_WINDOW", "500"))
+GEN_BUDGET_MIN_SAMPLES = int(os.getenv("GEN_BUDGET_MIN_SAMPLES", "50"))
+# Fixed budgets, "stage=tokens" or "stage:language=tokens", e.g. "general_agent=200,career_agent:pt=350"
+GEN_BUDGET_TOKENS = os.getenv("GEN_BUDGET_TOKENS", "")
+
+# Metrics
+ANSWER_TOKENS = Histogram(
+    'llm_answer_tokens',
+    'Completion tokens per agent answer',
+    ['stage', 'language'],
+    buckets=[16, 32, 48, 64, 96, 128, 160, 192, 224, 256, 300, 384, 512],
+)
+ANSWERS_TRUNCATED = Counter(
+    'llm_answers_truncated_total',
+    'Agent answers that hit their generation budget',
+    ['stage', 'language'],
+)
+BUDGET_TOKENS = Gauge('llm_generation_budget_tokens', 'Current max_tokens per agent and language', ['stage', 'language'])
+
+
+def parse_budgets(spec: str) -> Dict[Tuple[str, Optional[str]], int]:
+    """Parse "stage=tokens,stage:language=tokens" into {(stage, language or None): tokens}"""
+    budgets = {}
+    for part in spec.split(","):
+        key, _, tokens = part.strip().partition("=")
+        if key and tokens:
+            stage, _, language = key.strip().partition(":")
+            budgets[(stage, language or None)] = int(tokens)
+    return budgets
+
+
+class GenerationBudgets:
+    """
+    max_tokens for each (agent stage, language)
+
+    Generation time is linear in tokens produced, so the limit follows what
+    answers actually need: a high percentile of the last GEN_BUDGET_WINDOW
+    answer lengths plus headroom, between GEN_BUDGET_MIN_TOKENS and
+    GEN_BUDGET_MAX_TOKENS. Until enough answers are seen, and whenever more
+    answers hit the limit than the percentile allows for, the ceiling is
+    used. Fixed budgets from GEN_BUDGET_TOKENS take precedence.
+    """
+
+    def __init__(
+        self,
+        adaptive: bool = GEN_BUDGET_ADAPTIVE,
+        max_tokens: int = GEN_BUDGET_MAX_TOKENS,
+        min_tokens: int = GEN_BUDGET_MIN_TOKENS,
+        percentile: float = GEN_BUDGET_PERCENTILE,
+        headroom: float = GEN_BUDGET_HEADROOM,
+        window: int = GEN_BUDGET_WINDOW,
+        min_samples: int = GEN_BUDGET_MIN_SAMPLES,
+        fixed: Optional[Dict[Tuple[str, Optional[str]], int]] = None,
+    ):
+        self.adaptive = adaptive
+        self.max_tokens = max_tokens
+        self.min_tokens = min_tokens
+        self.percentile = percentile
+        self.headroom = headroom
+        self.window = window
+        self.min_samples = min_samples
+        self.fixed = parse_budgets(GEN_BUDGET_TOKENS) if fixed is None else fixed
+        # (length, truncated) per key, and the budget derived from them
+        self._samples: Dict[Tuple[str, str], Deque[Tuple[int, bool]]] = {}
+        self._budgets: Dict[Tuple[str, str], int] = {}
+
+    def limit(self, stage: str, language: str) -> int:
+        """max_tokens for the next answer"""
+        fixed = self.fixed.get((stage, language)) or self.fixed.get((stage, None))
+        if fixed:
+            return fixed
+        return self._budgets.get((stage, language), self.max_tokens)
+
+    def observe(self, stage: str, language: str, completion_tokens: int, limit: int, truncated: bool = False):
+        """Record an answer's length; truncated means it stopped at the limit"""
+        truncated = truncated or completion_tokens >= limit
+        ANSWER_TOKENS.labels(stage=stage, language=language).observe(completion_tokens)
+        if truncated:
+            ANSWERS_TRUNCATED.labels(stage=stage, language=language).inc()
+        if not self.adaptive:
+            return
+
+        key = (stage, language)
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = deque(maxlen=self.window)
+        samples.append((completion_tokens, truncated))
+        # Recomputing every few answers is plenty and keeps the sort off most requests
+        if len(samples) >= self.min_samples and len(samples) % 10 == 0:
+            self._update(key, samples)
+
+    def _update(self, key: Tuple[str, str], samples: Deque[Tuple[int, bool]]):
+        truncated = sum(1 for _, was_truncated in samples if was_truncated)
+        if truncated / len(samples) > 1 - self.percentile:
+            # Too many answers are cut off - their real length is unknown
+            budget = self.max_tokens
+        else:
+            lengths = sorted(length for length, _ in samples)
+            index = min(len(lengths) - 1, math.ceil(self.percentile * len(lengths)) - 1)
+            budget = math.ceil(lengths[index] * self.headroom)
+        budget = max(self.min_tokens, min(self.max_tokens, budget))
+
+        if self._budgets.get(key) != budget:
+            logger.info("generation_budget_updated", stage=key[0], language=key[1], budget=budget, truncated=truncated)
+        self._budgets[key] = budget
+        BUDGET_TOKENS.labels(stage=key[0], language=key[1]).set(budget)
+
+
+def is_truncated(response) -> bool:
+    """Whether the provider reports that generation stopped at the token limit"""
+    metadata = getattr(response, "response_metadata", None) or {}
+    # OpenAI: finish_reason, Ollama: done_reason
+    return metadata.get("finish_reason") == "length" or metadata.get("done_reason") == "length"
+
+
+_budgets: Optional[GenerationBudgets] = None
+
+
+def get_generation_budgets() -> GenerationBudgets:
+    """Get the process-wide generation budgets"""
+    global _budgets
+    if _budgets is None:
+        _budgets = GenerationBudgets()
+    return _budgets
@@ -2,13 +2,25 @@
 
 import os
 import structlog
-from typing import Optional
-from langchain_community.llms import Ollama
-from langchain_community.chat_models import ChatOllama
-from langchain_openai import ChatOpenAI
+from contextlib import aclosing
+from typing import AsyncIterator, List, Optional
+
+from utils.generation_budget import get_generation_budgets, is_truncated
+from utils.resilience import resilient_call, resilient_stream
+from utils.token_counter import record_llm_usage
 
 logger = structlog.get_logger()
 
+# Explicit provider override; "mock" selects the deterministic mock model.
+# Unset means auto-detect from OLLAMA_BASE_URL / OPENAI_API_KEY.
+# Provider SDKs are imported on first use - only the configured one is loaded.
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "").lower()
+
+# Classifier answers are a single word ("yes", "career", ...) - stop right after it
+CLASSIFIER_MAX_TOKENS = int(os.getenv("CLASSIFIER_MAX_TOKENS", "3"))
+CLASSIFIER_STOP = [".", ",", "\n\n"]
+
+
 def get_llm(
     temperature: float = 0.3,
     max_tokens: int = 300,
@@ -18,18 +30,31 @@ def get_llm(
     Get LLM instance based on environment configuration
 
     Supports:
+    - Mock provider (LLM_PROVIDER=mock) for load testing and CI benchmarks
     - Ollama (self-hosted via OLLAMA_BASE_URL)
     - OpenAI-compatible APIs (via OPENAI_BASE_URL, e.g., Open-World API)
     - OpenAI (standard API)
     - Anthropic (API)
     """
 
+    if LLM_PROVIDER == "mock":
+        from utils.mock_llm import MockChatModel
+
+        logger.info("initializing_mock_llm", model=model_name or "mock-large")
+        return MockChatModel(
+            model=model_name or "mock-large",
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+
     # Check for Ollama configuration first (preferred for self-hosted)
     ollama_base_url = os.getenv("OLLAMA_BASE_URL")
     ollama_model = os.getenv("OLLAMA_MODEL", "llama3.2:3b")
 
     if ollama_base_url:
         try:
+            from langchain_community.chat_models import ChatOllama
+
             logger.info(
                 "initializing_ollama_llm",
                 base_url=ollama_base_url,
@@ -50,6 +75,8 @@ def get_llm(
     openai_api_key = os.getenv("OPENAI_API_KEY")
     if openai_api_key:
         try:
+            from langchain_openai import ChatOpenAI
+
             # Support custom base URL for OpenAI-compatible APIs
             openai_base_url = os.getenv("OPENAI_BASE_URL")
             openai_model = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
@@ -85,11 +112,19 @@ def get_classifier_llm():
     Get a small, fast LLM for classification tasks
     Uses phi3:mini for Ollama, tinyllama for Open-World, or gpt-3.5-turbo for OpenAI
     """
+    if LLM_PROVIDER == "mock":
+        from utils.mock_llm import MockChatModel
+
+        logger.info("initializing_classifier_llm", provider="mock", model="mock-classifier")
+        return MockChatModel(model="mock-classifier", temperature=0.0, max_tokens=CLASSIFIER_MAX_TOKENS)
+
     ollama_base_url = os.getenv("OLLAMA_BASE_URL")
     classifier_model = os.getenv("OLLAMA_CLASSIFIER_MODEL", "phi3:mini")
 
     if ollama_base_url:
         try:
+            from langchain_community.chat_models import ChatOllama
+
             logger.info(
                 "initializing_classifier_llm",
                 provider="ollama",
@@ -99,7 +134,7 @@ def get_classifier_llm():
                 base_url=ollama_base_url,
                 model=classifier_model,
                 temperature=0.0,
-                num_predict=10,  # Very short responses for yes/no
+                num_predict=CLASSIFIER_MAX_TOKENS,  # One-word answers
             )
         except Exception as e:
             logger.error("classifier_ollama_init_failed", error=str(e))
@@ -107,13 +142,15 @@ def get_classifier_llm():
     # Fallback to OpenAI or OpenAI-compatible API
     openai_api_key = os.getenv("OPENAI_API_KEY")
     if openai_api_key:
+        from langchain_openai import ChatOpenAI
+
         openai_base_url = os.getenv("OPENAI_BASE_URL")
         classifier_model = os.getenv("OPENAI_CLASSIFIER_MODEL", "gpt-3.5-turbo")
 
         kwargs = {
             "model": classifier_model,
             "temperature": 0.0,
-            "max_tokens": 10,
+            "max_tokens": CLASSIFIER_MAX_TOKENS,
         }
 
         if openai_base_url:
@@ -130,3 +167,90 @@ def get_classifier_llm():
         return ChatOpenAI(**kwargs)
 
     return None
+
+
+def _call_kwargs(llm, max_tokens: Optional[int], stop: Optional[List[str]]) -> dict:
+    """Per-call generation limits in the provider's parameter names"""
+    kwargs = {}
+    if max_tokens is not None:
+        # Ollama calls it num_predict; OpenAI and the mock take max_tokens
+        kwargs["num_predict" if hasattr(llm, "num_predict") else "max_tokens"] = max_tokens
+    if stop:
+        kwargs["stop"] = stop
+    return kwargs
+
+
+async def invoke_llm(
+    llm,
+    messages,
+    stage: str,
+    language: Optional[str] = None,
+    stop: Optional[List[str]] = None,
+    max_tokens: Optional[int] = None,
+):
+    """
+    Invoke a chat model and record its token usage
+
+    Transient provider errors are retried with jittered backoff, and slow
+    calls can be hedged (see utils/resilience.py).
+
+    Args:
+        llm: Chat model instance from get_llm/get_classifier_llm
+        messages: Formatted prompt messages
+        stage: Pipeline stage for usage accounting (e.g. "routing", "career_agent")
+        language: Answer language - when given, max_tokens comes from the
+            stage's generation budget and the answer length is recorded
+        stop: Stop sequences
+        max_tokens: Explicit output limit for this call (when no language is given)
+    """
+    limit = get_generation_budgets().limit(stage, language) if language else max_tokens
+    kwargs = _call_kwargs(llm, limit, stop)
+    response = await resilient_call(
+        lambda: llm.ainvoke(messages, **kwargs),
+        stage,
+        # A losing hedge copy is billed too
+        on_discarded=lambda discarded: record_llm_usage(stage, llm, messages, discarded),
+    )
+    _, completion_tokens = record_llm_usage(stage, llm, messages, response)
+    if language:
+        get_generation_budgets().observe(stage, language, completion_tokens, limit, is_truncated(response))
+    return response
+
+
+async def stream_llm(
+    llm,
+    messages,
+    stage: str,
+    language: Optional[str] = None,
+    stop: Optional[List[str]] = None,
+) -> AsyncIterator[str]:
+    """
+    Stream a chat model's answer as text chunks and record its token usage
+
+    Usage is recorded once the stream ends, from the provider's usage
+    chunk when it sends one (tiktoken otherwise) - also when the caller
+    closes it early, so an aborted answer is still charged for what was
+    generated. Retries and hedging apply until the first chunk arrives.
+    language and stop work as in invoke_llm.
+    """
+    limit = get_generation_budgets().limit(stage, language) if language else None
+    aggregate = None
+    completed = False
+    kwargs = _call_kwargs(llm, limit, stop)
+    try:
+        async with aclosing(resilient_stream(
+            lambda: llm.astream(messages, **kwargs),
+            stage,
+            on_discarded=lambda discarded: record_llm_usage(stage, llm, messages, discarded),
+        )) as chunks:
+            async for chunk in chunks:
+                aggregate = chunk if aggregate is None else aggregate + chunk
+                if chunk.content:
+                    yield chunk.content
+        completed = True
+    finally:
+        if aggregate is not None:
+            _, completion_tokens = record_llm_usage(stage, llm, messages, aggregate)
+            # Cut-off answers would skew the observed lengths
+            if limit is not None and completed:
+                get_generation_budgets().observe(stage, language, completion_tokens, limit, is_truncated(aggregate))
@@ -0,0 +1,215 @@
+"""Structured logging setup - sampled events, rendered and written off the event loop"""
+
+import atexit
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import IO, Dict, Optional
+
+import orjson
+import structlog
+from prometheus_client import Counter
+
+# Configuration
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()  # json | console
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# "event=rate,..." - share of info/debug events kept, e.g. "request_completed=0.1"
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+
+# Levels that are never sampled out
+ALWAYS_KEEP = frozenset({"warning", "warn", "error", "critical", "exception", "fatal"})
+
+# Metrics
+LOG_EVENTS_DROPPED = Counter('log_events_dropped_total', 'Log events not written', ['reason'])
+_SAMPLED_OUT = LOG_EVENTS_DROPPED.labels(reason="sampled")
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse "event=rate,event=rate" into {event: rate}"""
+    rates = {}
+    for part in spec.split(","):
+        name, _, rate = part.strip().partition("=")
+        if name and rate:
+            rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+class EventSampler:
+    """
+    structlog processor that keeps a fixed share of high-volume events
+
+    Runs first in the chain, so dropped events cost a dict lookup and a
+    random draw - nothing is rendered. Warnings and errors are always kept.
+    """
+
+    def __init__(self, rates: Dict[str, float], seed: Optional[int] = None):
+        self.rates = rates
+        self._random = random.Random(seed).random
+
+    def __call__(self, logger, method_name: str, event_dict):
+        if method_name in ALWAYS_KEEP:
+            return event_dict
+        rate = self.rates.get(event_dict.get("event"))
+        if rate is not None and self._random() >= rate:
+            _SAMPLED_OUT.inc()
+            raise structlog.DropEvent
+        if rate is not None:
+            event_dict["sample_rate"] = rate
+        return event_dict
+
+
+def _add_level_and_time(logger, method_name: str, event_dict):
+    """Capture level and wall-clock time; formatting happens on the writer thread"""
+    event_dict["level"] = "warning" if method_name == "warn" else method_name
+    event_dict["timestamp"] = time.time()
+    return event_dict
+
+
+def _enqueue(logger, method_name: str, event_dict):
+    """Last processor: hand the raw event dict to the queue logger"""
+    return (event_dict,), {}
+
+
+class QueueLogger:
+    """structlog logger that enqueues event dicts for the current writer"""
+
+    def msg(self, event_dict):
+        if _writer is not None:
+            _writer.submit(event_dict)
+
+    log = debug = info = warn = warning = error = critical = exception = fatal = msg
+
+
+class LogWriter:
+    """
+    Background thread that renders and writes queued log events
+
+    The event loop only pays for building the event dict and a non-blocking
+    put. When the queue is full the event is dropped and counted instead of
+    stalling request handling; warnings and errors wait for space.
+    """
+
+    def __init__(self, stream: IO, fmt: str = LOG_FORMAT, maxsize: int = LOG_QUEUE_SIZE):
+        self.stream = stream
+        self.render = self._render_console if fmt == "console" else self._render_json
+        self._console = structlog.dev.ConsoleRenderer(colors=False) if fmt == "console" else None
+        self._queue: "queue.Queue" = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, event_dict):
+        try:
+            self._queue.put_nowait(event_dict)
+        except queue.Full:
+            if event_dict.get("level") in ALWAYS_KEEP:
+                self._queue.put(event_dict)
+            else:
+                LOG_EVENTS_DROPPED.labels(reason="queue_full").inc()
+
+    @staticmethod
+    def _iso(event_dict):
+        event_dict["timestamp"] = datetime.fromtimestamp(event_dict["timestamp"], timezone.utc).isoformat()
+        return event_dict
+
+    def _render_json(self, event_dict) -> bytes:
+        return orjson.dumps(self._iso(event_dict), default=str, option=orjson.OPT_APPEND_NEWLINE)
+
+    def _render_console(self, event_dict) -> bytes:
+        level = event_dict.get("level")
+        return (self._console(None, level, self._iso(event_dict)) + "\n").encode("utf-8")
+
+    def _write(self, event_dict, out: bytearray):
+        if event_dict is None:
+            return
+        try:
+            out += self.render(event_dict)
+        except Exception as e:
+            out += f'{{"event":"log_render_failed","error":{orjson.dumps(str(e)).decode()}}}\n'.encode()
+
+    def _run(self):
+        buffer = getattr(self.stream, "buffer", None)
+        while True:
+            event_dict = self._queue.get()
+            out = bytearray()
+            self._write(event_dict, out)
+            stop = event_dict is None
+
+            # Drain whatever else is queued into one write
+            while not stop and len(out) < 65536:
+                try:
+                    event_dict = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                stop = event_dict is None
+                self._write(event_dict, out)
+
+            if out:
+                try:
+                    if buffer is not None:
+                        buffer.write(out)
+                    else:
+                        self.stream.write(out.decode("utf-8"))
+                    self.stream.flush()
+                except Exception:
+                    LOG_EVENTS_DROPPED.labels(reason="write_failed").inc()
+
+            if stop:
+                return
+
+    def close(self, timeout: float = 5.0):
+        """Flush queued events and stop the thread"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+
+_writer: Optional[LogWriter] = None
+
+
+def configure_logging(
+    level: str = LOG_LEVEL,
+    fmt: str = LOG_FORMAT,
+    sample_rates: Optional[Dict[str, float]] = None,
+    stream: Optional[IO] = None,
+) -> LogWriter:
+    """
+    Configure structlog for the process
+
+    Call before the first log event - loggers are cached on first use.
+    """
+    global _writer
+    if _writer is not None:
+        _writer.close()
+
+    _writer = LogWriter(stream or sys.stdout, fmt)
+    rates = parse_sample_rates(LOG_SAMPLE_RATES) if sample_rates is None else sample_rates
+
+    structlog.configure(
+        processors=[
+            EventSampler(rates),
+            structlog.contextvars.merge_contextvars,
+            _add_level_and_time,
+            structlog.processors.format_exc_info,
+            _enqueue,
+        ],
+        wrapper_class=structlog.make_filtering_bound_logger(getattr(logging, level, logging.INFO)),
+        logger_factory=lambda *args: QueueLogger(),
+        cache_logger_on_first_use=True,
+    )
+
+    return _writer
+
+
+def shutdown_logging():
+    """Flush and stop the background writer"""
+    if _writer is not None:
+        _writer.close()
+
+
+atexit.register(shutdown_logging)
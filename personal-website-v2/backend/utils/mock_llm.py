@@ -0,0 +1,233 @@
+"""Deterministic mock chat model for load testing and CI benchmarks (LLM_PROVIDER=mock)"""
+
+import asyncio
+import hashlib
+import os
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from utils.token_counter import count_message_tokens
+
+# Configuration
+MOCK_LLM_TTFT_MS = float(os.getenv("MOCK_LLM_TTFT_MS", "150"))
+MOCK_LLM_CLASSIFIER_TTFT_MS = float(os.getenv("MOCK_LLM_CLASSIFIER_TTFT_MS", "40"))
+MOCK_LLM_TOKENS_PER_SEC = float(os.getenv("MOCK_LLM_TOKENS_PER_SEC", "40"))
+MOCK_LLM_FAILURE_RATE = float(os.getenv("MOCK_LLM_FAILURE_RATE", "0"))
+MOCK_LLM_SEED = int(os.getenv("MOCK_LLM_SEED", "42"))
+
+# Keywords for deterministic routing / topic answers
+ROUTE_KEYWORDS = {
+    "career": (
+        "experience", "job", "role", "work", "company", "companies", "position", "career",
+        "apple", "arcaea", "anagenex", "zebiai", "trinity", "cargo", "trabalho", "empresa",
+    ),
+    "technical": (
+        "skill", "skills", "technology", "technologies", "kubernetes", "python", "aws", "terraform",
+        "langchain", "rag", "llm", "project", "projects", "certification", "certifications",
+        "tools", "stack", "habilidades", "tecnologias", "projetos",
+    ),
+}
+TOPIC_KEYWORDS = (
+    "edson", "zandamela", "his", "he", "him", "career", "skills", "experience", "resume",
+    "projects", "education", "contact", "dele", "ele",
+)
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_BATCH_QUESTION_RE = re.compile(r'<question id="(\d+)">(.*?)</question>')
+
+# Shared so injected failures follow one reproducible sequence per process
+_failure_rng = random.Random(MOCK_LLM_SEED)
+
+
+class MockLLMError(RuntimeError):
+    """Injected mock provider failure"""
+
+
+def _stable_seed(*parts: str) -> int:
+    """Process-independent seed (str hash() is randomized per process)"""
+    return int.from_bytes(hashlib.sha256("\0".join(parts).encode("utf-8")).digest()[:8], "big")
+
+
+class MockChatModel(BaseChatModel):
+    """
+    Chat model with realistic latency shape and deterministic output
+
+    - Routing prompts get "career" | "technical" | "general" by keyword
+    - Topic classifier prompts get "yes" | "no" by keyword
+    - Micro-batched classifier prompts get one "<n>: <label>" line per question
+    - Agent prompts get an extractive answer built from the system prompt's
+      knowledge lines, capped at max_tokens words
+
+    Latency is time-to-first-token plus one token per 1/tokens_per_sec;
+    failure_rate injects MockLLMError. Responses carry usage_metadata like
+    a real OpenAI-compatible provider.
+    """
+
+    model: str = "mock"
+    temperature: float = 0.0
+    max_tokens: int = 300
+    ttft_ms: float = MOCK_LLM_TTFT_MS
+    tokens_per_sec: float = MOCK_LLM_TOKENS_PER_SEC
+    failure_rate: float = MOCK_LLM_FAILURE_RATE
+    seed: int = MOCK_LLM_SEED
+
+    @property
+    def _llm_type(self) -> str:
+        return "mock-chat"
+
+    @property
+    def model_name(self) -> str:
+        return self.model
+
+    # ---- Deterministic output ----
+
+    def _respond(self, messages: List[BaseMessage], stop: Optional[List[str]], max_tokens: int) -> str:
+        system = " ".join(str(m.content) for m in messages if m.type == "system")
+        query = str(messages[-1].content) if messages else ""
+        words = [w.lower() for w in _WORD_RE.findall(query)]
+
+        if "numbered question" in system:
+            # Micro-batched classifier prompt: '<question id="1">...</question>' per line
+            answers = []
+            for number, question in _BATCH_QUESTION_RE.findall(query):
+                label = self._classify(system, [w.lower() for w in _WORD_RE.findall(question)])
+                answers.append(f"{number}: {label}")
+            text = "\n".join(answers)
+        else:
+            text = self._classify(system, words) or self._extractive_answer(system, words, max_tokens)
+
+        for token in stop or []:
+            if token and token in text:
+                text = text[: text.index(token)]
+
+        return text
+
+    @staticmethod
+    def _classify(system: str, words: List[str]) -> Optional[str]:
+        """Routing / topic label, or None if this is not a classifier prompt"""
+        if "routing agent" in system:
+            scores = {
+                route: sum(1 for w in words if w in keywords)
+                for route, keywords in ROUTE_KEYWORDS.items()
+            }
+            route, score = max(scores.items(), key=lambda item: item[1])
+            return route if score else "general"
+        if "topic classifier" in system:
+            return "yes" if any(w in TOPIC_KEYWORDS for w in words) else "no"
+        return None
+
+    def _extractive_answer(self, system: str, words: List[str], max_tokens: int) -> str:
+        """Pick knowledge lines from the system prompt that overlap with the query"""
+        lines = [line.strip(" -*#") for line in system.splitlines() if line.strip().startswith(("-", "*"))]
+        query_words = {w for w in words if len(w) > 3}
+        relevant = [line for line in lines if query_words & {w.lower() for w in _WORD_RE.findall(line)}]
+
+        rng = random.Random(_stable_seed(str(self.seed), " ".join(words)))
+        if not relevant:
+            relevant = rng.sample(lines, min(4, len(lines))) if lines else ["Edson is an AI infrastructure engineer."]
+
+        answer = "Here is what I know about Edson: " + "; ".join(relevant) + "."
+        return " ".join(answer.split()[:max_tokens])
+
+    # ---- Call plumbing ----
+
+    def _call_settings(self, messages: List[BaseMessage], kwargs: Any):
+        """Per-call max tokens and time to first token"""
+        max_tokens = int(kwargs.get("max_tokens") or kwargs.get("num_predict") or self.max_tokens)
+        system = " ".join(str(m.content) for m in messages if m.type == "system")
+        is_classifier = "routing agent" in system or "topic classifier" in system
+        ttft = (MOCK_LLM_CLASSIFIER_TTFT_MS if is_classifier else self.ttft_ms) / 1000
+        return max_tokens, ttft
+
+    def _maybe_fail(self):
+        if self.failure_rate > 0 and _failure_rng.random() < self.failure_rate:
+            raise MockLLMError(f"Injected mock failure ({self.model})")
+
+    def _message(self, messages: List[BaseMessage], text: str) -> AIMessage:
+        input_tokens = count_message_tokens(messages)
+        output_tokens = len(text.split())
+        return AIMessage(
+            content=text,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+            response_metadata={"model_name": self.model},
+        )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        max_tokens, ttft = self._call_settings(messages, kwargs)
+        text = self._respond(messages, stop, max_tokens)
+        time.sleep(ttft + len(text.split()) / self.tokens_per_sec)
+        self._maybe_fail()
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages, text))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        max_tokens, ttft = self._call_settings(messages, kwargs)
+        text = self._respond(messages, stop, max_tokens)
+        await asyncio.sleep(ttft + len(text.split()) / self.tokens_per_sec)
+        self._maybe_fail()
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages, text))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        max_tokens, ttft = self._call_settings(messages, kwargs)
+        text = self._respond(messages, stop, max_tokens)
+        time.sleep(ttft)
+        self._maybe_fail()
+
+        for i, word in enumerate(text.split(" ")):
+            if i:
+                time.sleep(1 / self.tokens_per_sec)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else " " + word))
+
+        yield self._final_chunk(messages, text)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        max_tokens, ttft = self._call_settings(messages, kwargs)
+        text = self._respond(messages, stop, max_tokens)
+        await asyncio.sleep(ttft)
+        self._maybe_fail()
+
+        for i, word in enumerate(text.split(" ")):
+            if i:
+                await asyncio.sleep(1 / self.tokens_per_sec)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else " " + word))
+
+        yield self._final_chunk(messages, text)
+
+    def _final_chunk(self, messages: List[BaseMessage], text: str) -> ChatGenerationChunk:
+        """Empty chunk carrying usage metadata, like OpenAI's stream_options usage chunk"""
+        usage = self._message(messages, text).usage_metadata
+        return ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
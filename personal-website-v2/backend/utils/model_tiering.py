@@ -0,0 +1,116 @@
+"""Model tiering - route simple queries to a small model, complex ones to the large model"""
+
+import os
+import re
+from typing import Any, Dict, Optional
+
+import structlog
+from prometheus_client import Counter, Histogram
+
+from utils.llm_provider import get_llm
+
+logger = structlog.get_logger()
+
+TIER_SMALL = "small"
+TIER_LARGE = "large"
+
+# Configuration
+MODEL_TIERING_ENABLED = os.getenv("MODEL_TIERING_ENABLED", "true").lower() == "true"
+# Model names per tier. Unset small tier defaults to the provider's classifier
+# model, unset large tier defaults to the provider's primary model.
+MODEL_TIER_SMALL = os.getenv("MODEL_TIER_SMALL")
+MODEL_TIER_LARGE = os.getenv("MODEL_TIER_LARGE")
+# Queries longer than this (in words) always go to the large model
+TIER_SMALL_MAX_WORDS = int(os.getenv("TIER_SMALL_MAX_WORDS", "12"))
+# Any of these phrases escalates a query to the large model
+TIER_COMPLEX_KEYWORDS = [
+    keyword.strip()
+    for keyword in os.getenv(
+        "TIER_COMPLEX_KEYWORDS",
+        "compare,comparison,difference,versus,vs,why,explain,how did,how does,"
+        "trade-off,tradeoff,architecture,design,walk me through,in detail,"
+        "diferença,comparar,explique,explicar,por que,porquê,como funciona",
+    ).split(",")
+    if keyword.strip()
+]
+
+# Metrics
+MODEL_TIER_REQUESTS = Counter(
+    'model_tier_requests_total',
+    'Queries handled per model tier',
+    ['tier', 'agent'],
+)
+MODEL_TIER_LATENCY = Histogram(
+    'model_tier_latency_seconds',
+    'Agent generation latency per model tier',
+    ['tier'],
+)
+
+
+def _default_small_model() -> Optional[str]:
+    """Small model for the configured provider (same as the classifier model)"""
+    if os.getenv("LLM_PROVIDER", "").lower() == "mock":
+        return "mock-small"
+    if os.getenv("OLLAMA_BASE_URL"):
+        return os.getenv("OLLAMA_CLASSIFIER_MODEL", "phi3:mini")
+    if os.getenv("OPENAI_API_KEY"):
+        return os.getenv("OPENAI_CLASSIFIER_MODEL", "gpt-3.5-turbo")
+    return None
+
+
+def get_tiered_llms(temperature: float = 0.3, max_tokens: int = 300) -> Dict[str, Any]:
+    """
+    Get one LLM instance per tier
+
+    Both tiers share the large model when tiering is disabled or no
+    small model is available.
+    """
+    large_llm = get_llm(temperature=temperature, max_tokens=max_tokens, model_name=MODEL_TIER_LARGE)
+
+    small_model = MODEL_TIER_SMALL or _default_small_model()
+    if not MODEL_TIERING_ENABLED or large_llm is None or not small_model:
+        return {TIER_SMALL: large_llm, TIER_LARGE: large_llm}
+
+    small_llm = get_llm(temperature=temperature, max_tokens=max_tokens, model_name=small_model)
+
+    return {TIER_SMALL: small_llm or large_llm, TIER_LARGE: large_llm}
+
+
+class TieringPolicy:
+    """Decides which model tier should answer a query"""
+
+    def __init__(
+        self,
+        max_simple_words: int = TIER_SMALL_MAX_WORDS,
+        complex_keywords: Optional[list] = None,
+    ):
+        self.max_simple_words = max_simple_words
+        keywords = complex_keywords if complex_keywords is not None else TIER_COMPLEX_KEYWORDS
+        self._complex_pattern = (
+            re.compile(r"\b(" + "|".join(re.escape(k) for k in keywords) + r")\b", re.IGNORECASE)
+            if keywords
+            else None
+        )
+
+    def select_tier(self, query: str) -> str:
+        """
+        Select the model tier for a query
+
+        Returns: "small" | "large"
+        """
+        if not MODEL_TIERING_ENABLED:
+            return TIER_LARGE
+
+        # Long questions usually need synthesis across the knowledge base
+        if len(query.split()) > self.max_simple_words:
+            return TIER_LARGE
+
+        # Several questions in one message
+        if query.count("?") > 1:
+            return TIER_LARGE
+
+        # Comparative / explanatory phrasing
+        if self._complex_pattern and self._complex_pattern.search(query):
+            return TIER_LARGE
+
+        return TIER_SMALL
@@ -0,0 +1,163 @@
+"""On-demand sampling profiler for the event-loop thread"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+import structlog
+
+logger = structlog.get_logger()
+
+# Configuration
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "false").lower() == "true"
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "60"))
+PROFILER_MAX_DEPTH = 128
+
+# id(task) -> chat pipeline stage; only written while a profile is running
+_task_stages: Dict[int, str] = {}
+_active: Optional["SamplingProfiler"] = None
+
+
+class ProfilerBusyError(RuntimeError):
+    """A profile is already running in this process"""
+
+
+def enter_stage(name: str) -> Optional[Tuple[int, Optional[str]]]:
+    """
+    Attribute the current task's samples to a pipeline stage
+
+    Returns a marker for exit_stage, or None when no profile is running -
+    the idle cost is one global lookup.
+    """
+    if _active is None:
+        return None
+    task = asyncio.current_task()
+    if task is None:
+        return None
+    key = id(task)
+    previous = _task_stages.get(key)
+    _task_stages[key] = name
+    return key, previous
+
+
+def exit_stage(marker: Optional[Tuple[int, Optional[str]]]):
+    """Restore the stage attribution saved by enter_stage"""
+    if marker is None:
+        return
+    key, previous = marker
+    if previous is None:
+        _task_stages.pop(key, None)
+    else:
+        _task_stages[key] = previous
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def _task_label(task: asyncio.Task) -> str:
+    """Name the task after its coroutine (uvicorn's Task-N names are meaningless)"""
+    coro = task.get_coro()
+    return getattr(coro, "__qualname__", None) or task.get_name()
+
+
+class SamplingProfiler:
+    """
+    Samples the event-loop thread's Python stack from a background thread
+
+    Nothing runs between profiles. While running, every interval the sampler
+    reads the loop thread's current frame (sys._current_frames) and the
+    loop's current task, and counts the stack as
+    "task:<coroutine>;stage:<stage>;file:func;...". The result is in
+    collapsed-stack format, ready for flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, thread_id: int, interval_ms: float = PROFILER_INTERVAL_MS):
+        self.loop = loop
+        self.thread_id = thread_id
+        self.interval = interval_ms / 1000
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self._started = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+
+        frames = []
+        while frame is not None and len(frames) < PROFILER_MAX_DEPTH:
+            frames.append(_frame_label(frame))
+            frame = frame.f_back
+        frames.reverse()
+
+        task = asyncio.current_task(self.loop)
+        if task is None:
+            prefix = ["loop:idle" if "selectors.py:select" in frames[-1:] else "loop:callbacks"]
+        else:
+            prefix = [f"task:{_task_label(task)}"]
+            stage = _task_stages.get(id(task))
+            if stage:
+                prefix.append(f"stage:{stage}")
+
+        self.stacks[";".join(prefix + frames)] += 1
+        self.samples += 1
+
+    def _run(self):
+        next_tick = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                self._sample()
+            except Exception as e:  # never take the process down while profiling
+                logger.warning("profiler_sample_failed", error=str(e))
+            next_tick += self.interval
+            self._stop.wait(max(0.0, next_tick - time.perf_counter()))
+
+    def start(self):
+        global _active
+        if _active is not None:
+            raise ProfilerBusyError("A profile is already running")
+        _active = self
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        global _active
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self._started
+        _active = None
+        _task_stages.clear()
+
+    def collapsed(self) -> str:
+        """Collapsed stacks, one "frame;frame;... count" line per stack"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def is_profiling() -> bool:
+    return _active is not None
+
+
+async def profile(seconds: float, interval_ms: float = PROFILER_INTERVAL_MS) -> SamplingProfiler:
+    """Profile the running event loop for the given duration"""
+    profiler = SamplingProfiler(asyncio.get_running_loop(), threading.get_ident(), interval_ms)
+    profiler.start()
+    logger.info("profile_started", seconds=seconds, interval_ms=interval_ms)
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.stop()
+
+    logger.info("profile_completed", samples=profiler.samples, stacks=len(profiler.stacks))
+    return profiler
@@ -0,0 +1,276 @@
+"""LLM call resilience - jittered retries under a retry budget, and hedged requests"""
+
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional
+
+import structlog
+from prometheus_client import Counter
+from tenacity import AsyncRetrying, RetryCallState, stop_after_attempt, wait_random_exponential
+
+logger = structlog.get_logger()
+
+# Configuration
+LLM_RETRY_ATTEMPTS = int(os.getenv("LLM_RETRY_ATTEMPTS", "3"))  # including the first try
+LLM_RETRY_BASE_MS = float(os.getenv("LLM_RETRY_BASE_MS", "200"))
+LLM_RETRY_MAX_MS = float(os.getenv("LLM_RETRY_MAX_MS", "2000"))
+# Retries and hedges allowed per original call, plus a floor per second
+LLM_RETRY_BUDGET_RATIO = float(os.getenv("LLM_RETRY_BUDGET_RATIO", "0.1"))
+LLM_RETRY_BUDGET_MIN_PER_SEC = float(os.getenv("LLM_RETRY_BUDGET_MIN_PER_SEC", "1"))
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+# Hedge after this percentile of recent latencies (first token when streaming)
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+LLM_HEDGE_MIN_DELAY_MS = float(os.getenv("LLM_HEDGE_MIN_DELAY_MS", "100"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "50"))
+
+# Provider exceptions worth retrying, by class name - the SDKs are imported lazily
+TRANSIENT_ERRORS = frozenset({
+    "APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError",  # openai
+    "ClientConnectionError", "ClientPayloadError", "ServerDisconnectedError",  # aiohttp (Ollama)
+    "ConnectError", "ReadTimeout", "ConnectTimeout", "RemoteProtocolError",  # httpx
+    "MockLLMError",
+})
+
+# Metrics
+LLM_RETRIES = Counter('llm_retries_total', 'LLM call retries', ['stage', 'result'])  # retried | budget_exhausted | attempts_exhausted
+LLM_HEDGES = Counter('llm_hedges_total', 'Hedged LLM requests', ['stage', 'result'])
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Whether a failed LLM call may succeed if tried again"""
+    if isinstance(exc, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = getattr(exc, "status_code", None)
+    if isinstance(status, int) and (status == 429 or status >= 500):
+        return True
+    return any(cls.__name__ in TRANSIENT_ERRORS for cls in type(exc).__mro__)
+
+
+class RetryBudget:
+    """
+    Token bucket that caps retries and hedges at a share of real traffic
+
+    Every original call deposits `ratio` tokens, and `min_per_sec` tokens
+    trickle in over time so a quiet service can still retry. A retry or
+    hedge spends one token. During an outage the bucket drains and calls
+    fail fast instead of multiplying load on the provider.
+    """
+
+    def __init__(
+        self,
+        ratio: float = LLM_RETRY_BUDGET_RATIO,
+        min_per_sec: float = LLM_RETRY_BUDGET_MIN_PER_SEC,
+        capacity: Optional[float] = None,
+    ):
+        self.ratio = ratio
+        self.min_per_sec = min_per_sec
+        self.capacity = capacity if capacity is not None else max(10.0, 10 * min_per_sec)
+        self._balance = self.capacity
+        self._refilled_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._balance = min(self.capacity, self._balance + (now - self._refilled_at) * self.min_per_sec)
+        self._refilled_at = now
+
+    def deposit(self):
+        """Count an original (first-attempt) call"""
+        with self._lock:
+            self._refill()
+            self._balance = min(self.capacity, self._balance + self.ratio)
+
+    def try_spend(self) -> bool:
+        """Take one token for a retry or hedge; False when the budget is exhausted"""
+        with self._lock:
+            self._refill()
+            if self._balance < 1:
+                return False
+            self._balance -= 1
+            return True
+
+
+class LatencyTracker:
+    """Recent latencies per stage, for picking the hedge delay"""
+
+    def __init__(self, window: int = 500, percentile: float = LLM_HEDGE_PERCENTILE, min_samples: int = LLM_HEDGE_MIN_SAMPLES):
+        self.window = window
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+        self._delays: Dict[str, float] = {}
+
+    def observe(self, stage: str, seconds: float):
+        samples = self._samples.get(stage)
+        if samples is None:
+            samples = self._samples[stage] = deque(maxlen=self.window)
+        samples.append(seconds)
+        if len(samples) >= self.min_samples and len(samples) % 10 == 0:
+            ordered = sorted(samples)
+            index = min(len(ordered) - 1, math.ceil(self.percentile * len(ordered)) - 1)
+            self._delays[stage] = max(LLM_HEDGE_MIN_DELAY_MS / 1000, ordered[index])
+
+    def hedge_delay(self, stage: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None until enough samples are seen"""
+        return self._delays.get(stage)
+
+
+retry_budget = RetryBudget()
+latencies = LatencyTracker()
+
+
+def _should_retry(stage: str, max_attempts: int = LLM_RETRY_ATTEMPTS) -> Callable[[RetryCallState], bool]:
+    def predicate(retry_state: RetryCallState) -> bool:
+        exc = retry_state.outcome.exception()
+        if exc is None or not is_transient(exc):
+            return False
+        # Only charge retries that will happen - tenacity stops after the last attempt
+        if retry_state.attempt_number >= max_attempts:
+            LLM_RETRIES.labels(stage=stage, result="attempts_exhausted").inc()
+            return False
+        if not retry_budget.try_spend():
+            LLM_RETRIES.labels(stage=stage, result="budget_exhausted").inc()
+            return False
+        LLM_RETRIES.labels(stage=stage, result="retried").inc()
+        logger.warning("llm_call_retrying", stage=stage, error=str(exc), error_type=type(exc).__name__)
+        return True
+
+    return predicate
+
+
+def _retrying(stage: str) -> AsyncRetrying:
+    return AsyncRetrying(
+        stop=stop_after_attempt(LLM_RETRY_ATTEMPTS),
+        wait=wait_random_exponential(multiplier=LLM_RETRY_BASE_MS / 1000, max=LLM_RETRY_MAX_MS / 1000),
+        retry=_should_retry(stage),
+        reraise=True,
+    )
+
+
+def _abandon(task: asyncio.Task):
+    """Cancel a copy nobody waits for (and silence its result)"""
+    task.cancel()
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+
+def _discard(task: asyncio.Task, on_discarded: Optional[Callable[[Any], None]]):
+    """Charge a hedge copy whose result is not used, cancelling it if still running"""
+    if not task.done():
+        _abandon(task)
+        result = None
+    elif task.cancelled() or task.exception() is not None:
+        return
+    else:
+        result = task.result()
+    if on_discarded is not None:
+        on_discarded(result)
+
+
+async def _hedged(call: Callable[[], Awaitable], stage: str, on_discarded: Optional[Callable[[Any], None]] = None):
+    """
+    Run call; if it is slower than the stage's p95, race a second copy
+
+    The first copy to succeed wins; the call fails only when both copies
+    do. The provider still bills the other copy, so on_discarded gets its
+    result - or None when it is cancelled before finishing.
+    """
+    delay = latencies.hedge_delay(stage) if LLM_HEDGE_ENABLED else None
+    start_time = time.perf_counter()
+    tasks = [asyncio.ensure_future(call())]
+
+    try:
+        if delay is not None:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and retry_budget.try_spend():
+                LLM_HEDGES.labels(stage=stage, result="fired").inc()
+                tasks.append(asyncio.ensure_future(call()))
+                pending = set(tasks)
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    # Both copies may finish in the same wait - prefer one that succeeded
+                    winner = next((task for task in done if task.exception() is None), None)
+                    if winner is not None:
+                        LLM_HEDGES.labels(stage=stage, result="won" if winner is tasks[1] else "lost").inc()
+                        latencies.observe(stage, time.perf_counter() - start_time)
+                        for task in tasks:
+                            if task is not winner:
+                                _discard(task, on_discarded)
+                        return winner.result()
+                LLM_HEDGES.labels(stage=stage, result="failed").inc()
+                raise tasks[0].exception()
+
+        result = await tasks[0]
+        latencies.observe(stage, time.perf_counter() - start_time)
+        return result
+    finally:
+        # Everything still running if we were cancelled
+        for task in tasks:
+            if not task.done():
+                _abandon(task)
+
+
+async def resilient_call(call: Callable[[], Awaitable], stage: str, on_discarded: Optional[Callable[[Any], None]] = None):
+    """
+    Await call() with hedging and jittered retries on transient errors
+
+    call must start a fresh request each time it is invoked. on_discarded
+    is called with the result of a losing hedge copy (None if it was
+    cancelled mid-flight) so its usage can be charged.
+    """
+    retry_budget.deposit()
+    async for attempt in _retrying(stage):
+        with attempt:
+            return await _hedged(call, stage, on_discarded)
+
+
+async def _first_chunk(stream: AsyncIterator):
+    """(stream, first chunk) - StopAsyncIteration propagates for an empty stream"""
+    return stream, await stream.__anext__()
+
+
+async def _open_stream(
+    open_stream: Callable[[], AsyncIterator],
+    stage: str,
+    on_discarded: Optional[Callable[[Any], None]] = None,
+):
+    """Open a stream and wait for its first chunk, hedging a slow first token"""
+    def discarded(result):
+        if on_discarded is not None:
+            # The losing copy produced at most its first chunk
+            on_discarded(result[1] if result is not None else None)
+
+    return await _hedged(lambda: _first_chunk(open_stream()), stage, discarded)
+
+
+async def resilient_stream(
+    open_stream: Callable[[], AsyncIterator],
+    stage: str,
+    on_discarded: Optional[Callable[[Any], None]] = None,
+) -> AsyncIterator:
+    """
+    Stream from open_stream() with hedging and retries before the first chunk
+
+    Retries and hedges only happen until the first chunk arrives - after
+    that the client has partial output and errors propagate. on_discarded
+    is called with a losing hedge copy's first chunk (None if it was
+    cancelled before sending one).
+    """
+    retry_budget.deposit()
+    stream, first = None, None
+    try:
+        async for attempt in _retrying(stage):
+            with attempt:
+                stream, first = await _open_stream(open_stream, stage, on_discarded)
+    except StopAsyncIteration:
+        return
+
+    try:
+        yield first
+        async for chunk in stream:
+            yield chunk
+    finally:
+        await stream.aclose()
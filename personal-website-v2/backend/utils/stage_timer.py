@@ -0,0 +1,47 @@
+"""Per-stage timing for the chat pipeline"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+from prometheus_client import Histogram
+
+from utils import profiler
+
+# Metrics
+CHAT_STAGE_DURATION = Histogram(
+    'chat_stage_duration_seconds',
+    'Chat pipeline stage duration',
+    ['stage'],
+    buckets=[0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30],
+)
+
+
+class StageTimer:
+    """
+    Records how long each pipeline stage of a request takes
+
+    Durations are exported to Prometheus and rendered as a Server-Timing
+    header so clients (and the load-test harness) see per-stage latency.
+    While the sampling profiler runs, samples are attributed to the stage.
+    """
+
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block as one stage"""
+        marker = profiler.enter_stage(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            profiler.exit_stage(marker)
+            duration = time.perf_counter() - start
+            self.durations[name] = self.durations.get(name, 0.0) + duration
+            CHAT_STAGE_DURATION.labels(stage=name).observe(duration)
+
+    def server_timing(self) -> str:
+        """Server-Timing header value (durations in milliseconds)"""
+        return ", ".join(f"{name};dur={duration * 1000:.2f}" for name, duration in self.durations.items())
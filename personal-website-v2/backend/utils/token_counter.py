@@ -0,0 +1,167 @@
+"""Token accounting for LLM calls - provider usage metadata with tiktoken fallback"""
+
+import contextvars
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import structlog
+from prometheus_client import Counter
+
+logger = structlog.get_logger()
+
+# Encoding used when the provider does not report usage. cl100k_base is close
+# enough for llama/qwen/phi style tokenizers for budgeting purposes.
+TIKTOKEN_ENCODING = "cl100k_base"
+
+# Metrics
+LLM_TOKENS = Counter(
+    'llm_tokens_total',
+    'LLM tokens consumed',
+    ['stage', 'model', 'kind'],
+)
+LLM_CALLS = Counter(
+    'llm_calls_total',
+    'LLM calls made',
+    ['stage', 'model', 'source'],
+)
+
+
+@lru_cache(maxsize=1)
+def get_encoder():
+    """Get the cached tiktoken encoder (None if it cannot be loaded)"""
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(TIKTOKEN_ENCODING)
+    except Exception as e:
+        # tiktoken downloads its BPE files on first use - may fail offline
+        logger.warning("tiktoken_unavailable", error=str(e))
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens in text using tiktoken, falling back to a character estimate"""
+    if not text:
+        return 0
+
+    encoder = get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+
+    # ~4 characters per token for English/Portuguese prose
+    return max(1, len(text) // 4)
+
+
+def count_message_tokens(messages: Iterable[Any]) -> int:
+    """Count prompt tokens for a list of chat messages"""
+    total = 0
+    for message in messages:
+        content = getattr(message, "content", message)
+        # Per-message overhead for role/separators (OpenAI chat format)
+        total += count_tokens(str(content)) + 4
+    return total
+
+
+def get_model_name(llm: Any) -> str:
+    """Best-effort model name for an LLM instance"""
+    for attr in ("model_name", "model"):
+        value = getattr(llm, attr, None)
+        if isinstance(value, str) and value:
+            return value
+    return "unknown"
+
+
+def extract_usage(response: Any) -> Optional[Tuple[int, int]]:
+    """
+    Extract (prompt_tokens, completion_tokens) reported by the provider
+
+    Supports:
+    - LangChain usage_metadata (OpenAI and OpenAI-compatible APIs)
+    - OpenAI token_usage in response_metadata
+    - Ollama prompt_eval_count / eval_count in response_metadata
+    """
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        return int(usage.get("input_tokens", 0)), int(usage.get("output_tokens", 0))
+
+    metadata = getattr(response, "response_metadata", None) or {}
+
+    token_usage = metadata.get("token_usage")
+    if token_usage:
+        return (
+            int(token_usage.get("prompt_tokens", 0)),
+            int(token_usage.get("completion_tokens", 0)),
+        )
+
+    if "eval_count" in metadata or "prompt_eval_count" in metadata:
+        return int(metadata.get("prompt_eval_count", 0)), int(metadata.get("eval_count", 0))
+
+    return None
+
+
+@dataclass
+class TokenLedger:
+    """Token usage accumulated across every LLM call in a request"""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    by_stage: Dict[str, int] = field(default_factory=dict)
+    by_model: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, stage: str, model: str, prompt_tokens: int, completion_tokens: int):
+        """Add one call's usage to the ledger"""
+        total = prompt_tokens + completion_tokens
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.by_stage[stage] = self.by_stage.get(stage, 0) + total
+        self.by_model[model] = self.by_model.get(model, 0) + total
+
+
+_current_ledger: contextvars.ContextVar[Optional[TokenLedger]] = contextvars.ContextVar(
+    "token_ledger", default=None
+)
+
+
+def start_ledger() -> TokenLedger:
+    """Start a new ledger for the current request context"""
+    ledger = TokenLedger()
+    _current_ledger.set(ledger)
+    return ledger
+
+
+def get_ledger() -> Optional[TokenLedger]:
+    """Get the ledger for the current request context, if any"""
+    return _current_ledger.get()
+
+
+def record_llm_usage(stage: str, llm: Any, messages: Iterable[Any], response: Any) -> Tuple[int, int]:
+    """
+    Record token usage for a completed LLM call
+
+    Uses provider-reported usage when available, otherwise counts the
+    prompt and completion with tiktoken. Returns (prompt_tokens, completion_tokens).
+    """
+    model = get_model_name(llm)
+    usage = extract_usage(response)
+
+    if usage is not None:
+        prompt_tokens, completion_tokens = usage
+        source = "provider"
+    else:
+        prompt_tokens = count_message_tokens(messages)
+        completion_tokens = count_tokens(getattr(response, "content", "") or "")
+        source = "tiktoken"
+
+    LLM_CALLS.labels(stage=stage, model=model, source=source).inc()
+    LLM_TOKENS.labels(stage=stage, model=model, kind="prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels(stage=stage, model=model, kind="completion").inc(completion_tokens)
+
+    ledger = get_ledger()
+    if ledger is not None:
+        ledger.add(stage, model, prompt_tokens, completion_tokens)
+
+    return prompt_tokens, completion_tokens
@@ -8,6 +8,14 @@ interface Message {
   timestamp: Date
 }
 
+// Usage piggybacked on chat responses (same shape as GET /api/chat/usage)
+interface TokenUsage {
+  tokens_used_today: number
+  tokens_remaining: number
+  requests_today: number
+  is_rate_limited: boolean
+}
+
 interface ChatBotProps {
   language?: 'en' | 'pt'
 }
@@ -16,7 +24,8 @@ export default function ChatBot({ language = 'en' }: ChatBotProps) {
   const [messages, setMessages] = useState<Message[]>([])
   const [input, setInput] = useState('')
   const [isLoading, setIsLoading] = useState(false)
-  const [tokensRemaining, setTokensRemaining] = useState(50)
+  const [tokensRemaining, setTokensRemaining] = useState(20000)
+  const [tokensPerDay, setTokensPerDay] = useState(20000)
   const [conversationId, setConversationId] = useState<string | null>(null)
   const [error, setError] = useState<string | null>(null)
   const messagesEndRef = useRef<HTMLDivElement>(null)
@@ -39,8 +48,11 @@ export default function ChatBot({ language = 'en' }: ChatBotProps) {
 
   const fetchTokenUsage = async () => {
     try {
-      const response = await axios.get(`${API_URL}/api/chat/usage`)
+      // The response carries an ETag, so the browser revalidates with
+      // If-None-Match and an unchanged usage costs a 304 with no body
+      const response = await axios.get<TokenUsage>(`${API_URL}/api/chat/usage`)
       setTokensRemaining(response.data.tokens_remaining)
+      setTokensPerDay(response.data.tokens_used_today + response.data.tokens_remaining)
     } catch (err) {
       console.error('Failed to fetch token usage:', err)
     }
@@ -75,7 +87,14 @@ export default function ChatBot({ language = 'en' }: ChatBotProps) {
 
       setMessages((prev) => [...prev, assistantMessage])
       setConversationId(response.data.conversation_id)
-      setTokensRemaining(response.data.tokens_remaining)
+      // Current usage comes with the answer - no extra /api/chat/usage call
+      const usage: TokenUsage | undefined = response.data.usage
+      if (usage) {
+        setTokensRemaining(usage.tokens_remaining)
+        setTokensPerDay(usage.tokens_used_today + usage.tokens_remaining)
+      } else {
+        setTokensRemaining(response.data.tokens_remaining)
+      }
 
       if (!response.data.is_on_topic) {
         setError(
@@ -90,6 +109,8 @@ export default function ChatBot({ language = 'en' }: ChatBotProps) {
       let errorMessage = 'Failed to send message. Please try again.'
 
       if (err.response?.status === 429) {
+        // Rejected requests carry no usage - refresh the counter
+        fetchTokenUsage()
         errorMessage =
           language === 'pt'
             ? 'Limite de taxa excedido. Tente novamente mais tarde.'
@@ -143,7 +164,7 @@ export default function ChatBot({ language = 'en' }: ChatBotProps) {
           <span className="text-neural-green font-mono">
             {language === 'pt' ? 'Tokens restantes' : 'Tokens remaining'}:
           </span>{' '}
-          <span className="text-neural-blue font-bold">{tokensRemaining}</span> / 50
+          <span className="text-neural-blue font-bold">{tokensRemaining}</span> / {tokensPerDay}
         </div>
         <div className="text-xs text-gray-500">
           {language === 'pt'